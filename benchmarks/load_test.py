@@ -0,0 +1,254 @@
+"""
+End-to-end load test of the conversation handlers
+
+Simulates a whole classroom going through /start -> goal -> /assess ->
+score at once. Synthetic Updates are fed through the same per-user update
+processor as in production, replies go to a fake Telegram bot and Sheets
+calls to the in-process fake backend (database/fake_sheets.py).
+
+Usage:
+    python -m benchmarks.load_test --users 2000 --ramp 10 --output results.json
+
+Reports throughput, p50/p95/p99 handler latency per step, Sheets calls
+per user, event loop lag and memory growth as JSON.
+"""
+import os
+import tempfile
+
+# Must be set before the project settings are imported
+os.environ["SHEETS_BACKEND"] = "fake"
+os.environ.setdefault("STATE_STORE", "memory")
+os.environ.setdefault("REMINDERS_ENABLED", "False")
+os.environ.setdefault("JOURNAL_DIR", tempfile.mkdtemp(prefix="goalbuddy-load-"))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import argparse
+import asyncio
+import json
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import numpy as np
+from telegram import Bot, Update
+
+from config.settings import settings
+from bot.handlers import assess_command, handle_text_message, start_command
+from bot.update_processor import PerUserUpdateProcessor
+from database.fake_sheets import get_fake_backend
+from database.journal import get_drainer, get_journal
+from database.sheets import get_db
+from database.write_queue import get_write_queue
+
+
+class FakeBot(Bot):
+    """Bot that records outgoing messages instead of calling Telegram"""
+    
+    def __init__(self, latency: float):
+        super().__init__(token="123456:LOADTEST")
+        with self._unfrozen():
+            self.latency = latency
+            # Bot objects are frozen after __init__, so count in a mutable container
+            self.sent = Counter()
+    
+    async def send_message(self, chat_id, text, *args, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.sent["send_message"] += 1
+        return None
+
+
+class LoadTest:
+    """One load test run"""
+    
+    def __init__(
+        self,
+        users: int,
+        ramp: float,
+        think: float,
+        bot_latency: float,
+        sheets_latency: float,
+        sheets_quota: int,
+        concurrency: int
+    ):
+        """
+        Args:
+            users: Number of simulated participants
+            ramp: Seconds over which participants arrive
+            think: Max seconds a participant waits between two messages
+            bot_latency: Simulated Telegram API latency per reply
+            sheets_latency: Simulated Sheets API latency per call
+            sheets_quota: Sheets reads and writes allowed per minute each (0 = unlimited)
+            concurrency: Max concurrently processed updates
+        """
+        self.users = users
+        self.ramp = ramp
+        self.think = think
+        self.concurrency = concurrency
+        self.backend = get_fake_backend()
+        self.backend.latency = sheets_latency
+        self.backend.quota_per_minute = sheets_quota
+        self.bot = FakeBot(bot_latency)
+        self.processor = PerUserUpdateProcessor(concurrency)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self._update_id = 0
+        self._max_lag = 0.0
+    
+    def _update(self, user_id: int, text: str) -> Update:
+        """Build a private-chat text message update"""
+        self._update_id += 1
+        message = {
+            "message_id": self._update_id,
+            "date": int(datetime.now(timezone.utc).timestamp()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Participant"},
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text)}]
+        return Update.de_json({"update_id": self._update_id, "message": message}, self.bot)
+    
+    async def _send(self, step: str, handler, user_id: int, text: str) -> None:
+        """Process one update and record how long its handler took"""
+        update = self._update(user_id, text)
+        context = SimpleNamespace(bot=self.bot, args=[])
+        
+        async def timed():
+            started = time.perf_counter()
+            try:
+                await handler(update, context)
+            except Exception as e:
+                self.errors[type(e).__name__] += 1
+            self.latencies[step].append(time.perf_counter() - started)
+        
+        await self.processor.process_update(update, timed())
+    
+    async def _participant(self, user_id: int) -> None:
+        """One participant's conversation"""
+        await asyncio.sleep(random.uniform(0, self.ramp))
+        await self._send("start", start_command, user_id, "/start")
+        await asyncio.sleep(random.uniform(0, self.think))
+        await self._send("goal", handle_text_message, user_id, f"Освоить промпт-инжиниринг, участник {user_id}")
+        await asyncio.sleep(random.uniform(0, self.think))
+        await self._send("assess", assess_command, user_id, "/assess")
+        await asyncio.sleep(random.uniform(0, self.think))
+        await self._send("score", handle_text_message, user_id, str(random.randint(0, 100)))
+    
+    async def _watch_loop_lag(self, interval: float = 0.05) -> None:
+        """Track how late the event loop wakes up (time other tasks blocked it)"""
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            self._max_lag = max(self._max_lag, time.perf_counter() - started - interval)
+    
+    async def run(self) -> Dict[str, Any]:
+        """Run the scenario and return the report"""
+        db = await asyncio.to_thread(get_db)
+        self.backend.reset_stats()
+        
+        tracemalloc.start()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        
+        lag_watcher = asyncio.get_running_loop().create_task(self._watch_loop_lag())
+        await self.processor.initialize()
+        get_drainer().start()
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(self._participant(user_id) for user_id in range(1, self.users + 1)))
+        handled = time.perf_counter() - started
+        
+        # Everything acknowledged, now wait until it has reached Sheets
+        while get_drainer().backlog_bytes or get_write_queue().pending_count:
+            await asyncio.sleep(0.1)
+        await get_drainer().stop()
+        await get_write_queue().close()
+        await get_journal().close()
+        drained = time.perf_counter() - started
+        
+        lag_watcher.cancel()
+        memory_after, memory_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        db.shutdown()
+        
+        sheets = self.backend.stats
+        updates = sum(len(values) for values in self.latencies.values())
+        
+        return {
+            "users": self.users,
+            "ramp_seconds": self.ramp,
+            "think_seconds": self.think,
+            "concurrency": self.concurrency,
+            "sheets_latency_seconds": self.backend.latency,
+            "sheets_quota_per_minute": self.backend.quota_per_minute,
+            "updates": updates,
+            "errors": dict(self.errors),
+            "replies": dict(self.bot.sent),
+            "handled_seconds": round(handled, 3),
+            "drained_seconds": round(drained, 3),
+            "throughput_updates_per_second": round(updates / handled, 1),
+            "latency_ms": {
+                step: {
+                    "p50": round(float(np.percentile(values, 50)) * 1000, 2),
+                    "p95": round(float(np.percentile(values, 95)) * 1000, 2),
+                    "p99": round(float(np.percentile(values, 99)) * 1000, 2),
+                    "max": round(max(values) * 1000, 2),
+                }
+                for step, values in self.latencies.items()
+            },
+            "max_loop_lag_ms": round(self._max_lag * 1000, 2),
+            "sheets": {
+                **sheets,
+                "calls_per_user": round(sheets["total_calls"] / self.users, 4),
+                "rows": len(db.mirror),
+            },
+            "memory": {
+                "python_growth_mb": round((memory_after - memory_before) / 2**20, 2),
+                "python_peak_mb": round(memory_peak / 2**20, 2),
+                "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            },
+        }
+
+
+def main() -> None:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Load test the bot handlers offline")
+    parser.add_argument("--users", type=int, default=1000, help="Simulated participants")
+    parser.add_argument("--ramp", type=float, default=5.0, help="Seconds over which participants arrive")
+    parser.add_argument("--think", type=float, default=1.0, help="Max seconds between a participant's messages")
+    parser.add_argument("--bot-latency", type=float, default=0.05, help="Simulated Telegram API latency")
+    parser.add_argument(
+        "--sheets-latency", type=float, default=settings.FAKE_SHEETS_LATENCY, help="Simulated Sheets API latency"
+    )
+    parser.add_argument(
+        "--sheets-quota", type=int, default=settings.FAKE_SHEETS_QUOTA_PER_MINUTE,
+        help="Sheets reads and writes per minute each (0 = unlimited)"
+    )
+    parser.add_argument("--concurrency", type=int, default=settings.CONCURRENT_UPDATES, help="Concurrent updates")
+    parser.add_argument("--seed", type=int, default=21, help="Random seed")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+    
+    random.seed(args.seed)
+    load_test = LoadTest(
+        args.users, args.ramp, args.think, args.bot_latency,
+        args.sheets_latency, args.sheets_quota, args.concurrency
+    )
+    report = asyncio.run(load_test.run())
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,19 @@
 """
 Telegram bot handlers for commands, messages, and callbacks
 """
+import asyncio
+import time
+
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from database.sheets import get_db
-from bot.states import UserState
+from config.settings import settings
+from database.state_store import get_state_store
+from database.journal import get_journal
+from database.sharding import DEFAULT_SHARD, get_router
+from database.sheets import get_db_async
+from bot.states import UserState, ProgressOption
+from bot.throttling import GOALS_DEBOUNCED, is_goal_resubmission
 from bot.messages import (
     WELCOME_MESSAGE,
     GOAL_CONFIRMATION,
@@ -16,21 +24,37 @@ from bot.messages import (
     ERROR_GOAL_TOO_SHORT,
     ERROR_GOAL_TOO_LONG,
     ERROR_GENERAL,
+    PROGRESS_THANKS,
+    STATS_REPORT,
+    STATS_DAY_LINE,
+    STATS_EMPTY,
+    STATS_UNKNOWN_SHARD,
 )
 from utils.validators import validate_assessment_score, validate_goal_text, safe_log_snippet
 from utils.logger import logger
+from utils.metrics import instrument_handler
+from scheduler.tasks import schedule_day2_reminder
 
 
-# User state tracking (in-memory, keyed by user_id)
-# Stores: user_id -> {'state': UserState, 'row_number': int, 'goal_text': str}
-user_states = {}
+# User state tracking lives in the state store (see database/state_store.py)
+# Stores: user_id -> {'state': UserState, 'goal_seq': int, 'row_number': int, 'goal_text': str, 'goal_time': float,
+#                     'shard': str}
+# 'goal_seq' is the goal's journal sequence number, the journal drainer
+# resolves it to a sheet row when the goal reaches Google Sheets.
+# 'goal_time' (epoch seconds) is when the goal was set, for debouncing resubmissions
+# 'shard' is the user's cohort shard (see database/sharding.py), row numbers are per shard
 
 
+@instrument_handler
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Handle /start command
     Initiates goal setting flow
     
+    A deep link (t.me/<bot>?start=<payload>) routes the user to the
+    cohort shard with that payload, otherwise the user keeps their shard
+    (unless it was removed from COHORT_SHARDS) or is routed by date.
+    
     Security:
         - Does not log user_id or username (anonymity requirement)
     """
@@ -39,12 +63,32 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     logger.info("User initiated /start command")
     
-    # Set user state to awaiting goal
-    user_states[user_id] = {'state': UserState.AWAITING_GOAL}
+    store = get_state_store()
+    previous = store.get(user_id) or {}
+    payload = context.args[0] if context.args else None
+    # States saved before sharding belong to the default shard
+    previous_shard = previous.get('shard', DEFAULT_SHARD) if previous else None
+    router = get_router()
+    if payload or previous_shard is None or not router.is_configured(previous_shard):
+        shard = router.resolve(payload).name
+    else:
+        shard = previous_shard
+    
+    # Set user state to awaiting goal, keeping the previous goal's reference
+    # so the same goal sent again within GOAL_DEBOUNCE_SECONDS replaces it
+    # instead of adding a row. An assessed goal is never replaced, its row
+    # already holds the score
+    user_data = {'state': UserState.AWAITING_GOAL, 'shard': shard}
+    if previous.get('state') != UserState.COMPLETED and previous_shard == shard:
+        user_data.update({key: previous[key] for key in ('goal_seq', 'row_number', 'goal_time') if key in previous})
+        if 'goal_text' in previous:
+            user_data['previous_goal_text'] = previous['goal_text']
+    store.set(user_id, user_data)
     
     await update.message.reply_text(WELCOME_MESSAGE, parse_mode='Markdown')
 
 
+@instrument_handler
 async def assess_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Handle /assess command
@@ -59,14 +103,16 @@ async def assess_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info("User requested assessment")
     
     # Check if user has a goal in current session
-    user_data = user_states.get(user_id)
+    store = get_state_store()
+    user_data = store.get(user_id)
     
     if not user_data or 'goal_text' not in user_data:
         await update.message.reply_text(ERROR_NO_GOAL)
         return
     
     # Set state to awaiting assessment
-    user_states[user_id]['state'] = UserState.AWAITING_ASSESSMENT
+    user_data['state'] = UserState.AWAITING_ASSESSMENT
+    store.set(user_id, user_data)
     
     goal_text = user_data['goal_text']
     message = ASSESSMENT_REQUEST.format(goal=goal_text)
@@ -74,6 +120,7 @@ async def assess_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(message, parse_mode='Markdown')
 
 
+@instrument_handler
 async def handle_text_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Handle text messages based on user state
@@ -82,7 +129,8 @@ async def handle_text_message(update: Update, context: ContextTypes.DEFAULT_TYPE
     user_id = user.id
     text = update.message.text.strip()
     
-    user_data = user_states.get(user_id, {})
+    store = get_state_store()
+    user_data = store.get(user_id) or {}
     current_state = user_data.get('state', UserState.IDLE)
     
     # State: Awaiting Goal
@@ -97,25 +145,54 @@ async def handle_text_message(update: Update, context: ContextTypes.DEFAULT_TYPE
                 await update.message.reply_text(ERROR_GOAL_TOO_LONG)
             return
         
-        # Save goal to database (anonymous)
-        row_number = get_db().save_user_goal(text)
+        # The same goal resubmitted within the debounce window replaces the
+        # previous one, a different goal is saved as a new one
+        goal_seq = user_data.get('goal_seq')
+        row_number = user_data.get('row_number')
+        shard = user_data.get('shard')
+        if not get_router().is_configured(shard):
+            # The user's shard was removed, its rows stay with it
+            shard = get_router().resolve().name
+            goal_seq = row_number = None
+        debounce = bool(goal_seq) and (
+            time.time() - user_data.get('goal_time', 0) < settings.GOAL_DEBOUNCE_SECONDS
+            and is_goal_resubmission(user_data.get('previous_goal_text'), text)
+        )
         
-        if row_number:
-            # Send confirmation
-            confirmation = GOAL_CONFIRMATION.format(goal=text)
-            await update.message.reply_text(confirmation, parse_mode='Markdown')
-            
-            # Update state and store goal info in memory
-            user_states[user_id] = {
-                'state': UserState.GOAL_SET,
-                'row_number': row_number,
-                'goal_text': text
-            }
-            
-            # Log without user_id, with sanitized goal snippet
-            logger.info(f"✅ Saved anonymous goal to row {row_number}: {safe_log_snippet(text)}")
-        else:
+        # Journal goal locally (anonymous), it is written to Sheets in the background
+        try:
+            if debounce:
+                await get_journal().append_goal_revision(goal_seq, row_number, text, shard)
+                GOALS_DEBOUNCED.inc()
+            else:
+                goal_seq = await get_journal().append_goal(text, shard)
+                row_number = None
+        except Exception as e:
+            logger.error(f"❌ Failed to journal goal: {e}")
             await update.message.reply_text(ERROR_GENERAL)
+            return
+        
+        # Update state and store goal info
+        new_data = {
+            'state': UserState.GOAL_SET,
+            'goal_seq': goal_seq,
+            'goal_text': text,
+            'goal_time': user_data['goal_time'] if debounce else time.time(),
+            'shard': shard
+        }
+        if row_number:
+            new_data['row_number'] = row_number
+        store.set(user_id, new_data)
+        
+        # Send confirmation without waiting for the Sheets round trip
+        confirmation = GOAL_CONFIRMATION.format(goal=text)
+        await update.message.reply_text(confirmation, parse_mode='Markdown')
+        
+        # Log without user_id, with sanitized goal snippet
+        logger.info(f"✅ Journaled anonymous goal: {safe_log_snippet(text)}")
+        
+        if settings.REMINDERS_ENABLED:
+            schedule_day2_reminder(user_id)
     
     # State: Awaiting Assessment
     elif current_state == UserState.AWAITING_ASSESSMENT:
@@ -126,28 +203,32 @@ async def handle_text_message(update: Update, context: ContextTypes.DEFAULT_TYPE
             await update.message.reply_text(ERROR_INVALID_ASSESSMENT)
             return
         
-        # Get row number from user state
+        # Goal reference from user state (journal sequence and/or sheet row)
+        goal_seq = user_data.get('goal_seq')
         row_number = user_data.get('row_number')
         
-        if not row_number:
+        if 'goal_text' not in user_data or not (goal_seq or row_number):
             await update.message.reply_text(ERROR_NO_GOAL)
             return
         
-        # Save assessment
-        success = get_db().save_final_assessment(row_number, score)
-        
-        if success:
-            # Send thanks message
-            thanks = ASSESSMENT_THANKS.format(percent=score)
-            await update.message.reply_text(thanks, parse_mode='Markdown')
-            
-            # Update state
-            user_states[user_id]['state'] = UserState.COMPLETED
-            
-            # Log without user_id
-            logger.info(f"✅ Saved assessment for row {row_number}: {score}%")
-        else:
+        # Journal assessment, the drainer writes it to the goal's row
+        try:
+            await get_journal().append_assessment(goal_seq, row_number, score, user_data.get('shard'))
+        except Exception as e:
+            logger.error(f"❌ Failed to journal assessment: {e}")
             await update.message.reply_text(ERROR_GENERAL)
+            return
+        
+        # Send thanks message
+        thanks = ASSESSMENT_THANKS.format(percent=score)
+        await update.message.reply_text(thanks, parse_mode='Markdown')
+        
+        # Update state
+        user_data['state'] = UserState.COMPLETED
+        store.set(user_id, user_data)
+        
+        # Log without user_id
+        logger.info(f"✅ Journaled assessment: {score}%")
     
     else:
         # User sent message without being in a specific state
@@ -155,6 +236,91 @@ async def handle_text_message(update: Update, context: ContextTypes.DEFAULT_TYPE
         pass
 
 
+@instrument_handler
+async def progress_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Handle Day 2 progress buttons from the reminder
+    
+    Security:
+        - Does not log user_id or username (anonymity requirement)
+    """
+    query = update.callback_query
+    await query.answer()
+    
+    valid_options = {option.value for option in ProgressOption}
+    if query.data not in valid_options:
+        return
+    
+    logger.info(f"User reported Day 2 progress: {query.data}")
+    
+    await query.edit_message_reply_markup(reply_markup=None)
+    await query.message.reply_text(PROGRESS_THANKS)
+
+
+def _format_quantiles(quantiles: dict) -> str:
+    """Format quantiles as 'a / b / c / d / e' ('–' for missing values)"""
+    return " / ".join("–" if value is None else f"{value:g}" for value in quantiles.values())
+
+
+@instrument_handler
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Handle /stats command (facilitators only)
+    Sends cohort statistics computed from the local UserData mirror
+    
+    `/stats <shard>` reports another cohort shard than the current one.
+    
+    Security:
+        - Only users listed in ADMIN_USER_IDS get an answer
+        - Does not log user_id or username (anonymity requirement)
+    """
+    if update.effective_user.id not in settings.ADMIN_USER_IDS:
+        return
+    
+    logger.info("Admin requested statistics")
+    
+    # NumPy is only needed here, keep it off the startup path
+    from database.cohort_stats import compute_cohort_stats, load_columns
+    
+    router = get_router()
+    shard = context.args[0] if context.args else router.resolve().name
+    if shard not in router.names():
+        await update.message.reply_text(
+            STATS_UNKNOWN_SHARD.format(shard=shard, shards=", ".join(router.names()))
+        )
+        return
+    
+    db = await get_db_async(shard)
+    stats = await asyncio.to_thread(lambda: compute_cohort_stats(load_columns(db.mirror)))
+    
+    if not stats['participants']:
+        await update.message.reply_text(STATS_EMPTY)
+        return
+    
+    hours = stats['hours_histogram']
+    days = "\n".join(
+        STATS_DAY_LINE.format(
+            date=day['date'],
+            goals=day['goals'],
+            completed=day['completed'],
+            completion_rate=day['completion_rate'] * 100,
+            median="–" if day['median'] is None else f"{day['median']:g}%"
+        )
+        for day in stats['days'][-14:]
+    )
+    
+    report = STATS_REPORT.format(
+        participants=stats['participants'],
+        completed=stats['completed'],
+        completion_rate=stats['completion_rate'] * 100,
+        score_quantiles=_format_quantiles(stats['score_quantiles']),
+        hours_quantiles=_format_quantiles(stats['hours_quantiles']),
+        hours_0=hours[0], hours_1=hours[1], hours_2=hours[2], hours_3=hours[3],
+        days=days
+    )
+    await update.message.reply_text(report, parse_mode='Markdown')
+
+
 async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Handle errors in handlers
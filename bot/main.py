@@ -2,18 +2,85 @@
 Main entry point for GoalBuddy21 Telegram bot
 Initializes and runs the application
 """
+import time
+
+# Startup is measured from here, before the heavy imports below
+_STARTED_AT = time.perf_counter()
+
+import asyncio
 import sys
-from telegram.ext import Application, CommandHandler, MessageHandler, filters
+from telegram import Update
+from telegram.ext import (
+    Application,
+    CallbackQueryHandler,
+    CommandHandler,
+    MessageHandler,
+    TypeHandler,
+    filters,
+)
 
 from config.settings import settings
 from utils.logger import logger
+from utils.metrics import metrics
 from bot.handlers import (
     start_command,
     assess_command,
     handle_text_message,
+    progress_callback,
+    stats_command,
     error_handler,
 )
-from database.sheets import get_db
+from bot.throttling import throttle_update
+from bot.monitoring import start_monitoring, stop_monitoring
+from bot.update_processor import PerUserUpdateProcessor
+from database.dead_letters import close_dead_letters
+from database.sharding import get_router
+from database.sheets import get_db_async, get_ready_dbs, shutdown_dbs
+from database.state_store import get_state_store
+from database.write_queue import get_write_queues
+from database.journal import get_drainer, get_journal
+from scheduler.analytics_publisher import get_analytics_publisher
+from scheduler.tasks import restore_pending_reminders, shutdown_scheduler
+
+
+STARTUP_SECONDS = metrics.gauge(
+    "startup_seconds", "Seconds from process start to each startup milestone", ("milestone",)
+)
+
+
+def _startup_milestone(milestone: str) -> None:
+    """Record and log how long startup took up to a milestone"""
+    elapsed = time.perf_counter() - _STARTED_AT
+    STARTUP_SECONDS.set(elapsed, milestone=milestone)
+    logger.info(f"⏱ Startup: {milestone} after {elapsed:.2f}s")
+
+
+async def warm_up(app: Application) -> None:
+    """
+    Connect to Google Sheets and set up the command menu in the background
+    
+    Updates are accepted meanwhile: goals and assessments go to the local
+    journal, which is drained once the connection is ready.
+    """
+    try:
+        await app.bot.set_my_commands([
+            ("start", "Начать работу и поставить цель"),
+            ("assess", "Оценить свой прогресс (0-100%)"),
+        ])
+        logger.info("✅ Bot commands set up")
+    except Exception as e:
+        logger.warning(f"⚠️ Could not set up bot commands: {e}")
+    
+    # Every cohort shard connects in parallel, one failing does not stop the others
+    shards = get_router().names()
+    results = await asyncio.gather(*[get_db_async(shard) for shard in shards], return_exceptions=True)
+    for shard, result in zip(shards, results):
+        if isinstance(result, Exception):
+            # The drainer and publisher retry the connection on their own
+            logger.error(f"❌ Google Sheets warm-up failed for shard '{shard}': {result}")
+    
+    if get_ready_dbs():
+        _startup_milestone("sheets_ready")
 
 
 def main() -> None:
@@ -31,38 +98,100 @@ def main() -> None:
         logger.error("Configuration validation failed")
         sys.exit(1)
     
+    # Without a volume every redeploy loses user states, reminders and undrained journal records
+    ephemeral = settings.ephemeral_data_paths()
+    if ephemeral:
+        logger.warning(
+            f"⚠️ Local data is not on persistent storage and will be lost on redeploy: {', '.join(ephemeral)}. "
+            f"Mount a volume at /app/data (see RAILWAY_DEPLOY.md)"
+        )
+    
     logger.info("Starting GoalBuddy21 bot...")
     
     try:
         # Create application
-        application = Application.builder().token(settings.BOT_TOKEN).build()
+        application = (
+            Application.builder()
+            .token(settings.BOT_TOKEN)
+            .concurrent_updates(PerUserUpdateProcessor(settings.CONCURRENT_UPDATES))
+            .build()
+        )
+        
+        # Initialize state store (Google Sheets connects in the background, see warm_up)
+        get_state_store()
         
-        # Initialize database
-        db = get_db()
+        # Anti-flood throttling runs before every other handler
+        if settings.THROTTLE_USER_RATE > 0:
+            application.add_handler(TypeHandler(Update, throttle_update), group=-1)
         
         # Register handlers
         application.add_handler(CommandHandler("start", start_command))
         application.add_handler(CommandHandler("assess", assess_command))
+        application.add_handler(CommandHandler("stats", stats_command))
         application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text_message))
+        application.add_handler(CallbackQueryHandler(progress_callback))
         
         # Register error handler
         application.add_error_handler(error_handler)
         
-        # Set up bot commands (shown in menu)
-        async def setup_bot_commands(app):
-            await app.bot.set_my_commands([
-                ("start", "Начать работу и поставить цель"),
-                ("assess", "Оценить свой прогресс (0-100%)"),
-            ])
-            logger.info("✅ Bot commands set up")
+        # Start background work on the bot's loop, without waiting for Google Sheets
+        async def start_background_tasks(app):
+            # Replay journaled records that have not reached Sheets yet
+            get_drainer().start()
+            get_analytics_publisher().start()
+            await start_monitoring()
+            
+            if settings.REMINDERS_ENABLED:
+                restore_pending_reminders(app.bot)
+            
+            # Keep a reference, the loop only holds tasks weakly
+            app.bot_data['warm_up'] = asyncio.get_running_loop().create_task(warm_up(app))
+            _startup_milestone("accepting_updates")
+        
+        application.post_init = start_background_tasks
+        
+        # Flush batched writes before the process exits
+        async def flush_pending_writes(app):
+            await shutdown_scheduler()
+            await get_drainer().stop()
+            for queue in get_write_queues():
+                await queue.close()
+            await get_journal().close()
+            
+            # Final statistics, including the writes flushed above
+            publisher = get_analytics_publisher()
+            await publisher.stop()
+            for shard in get_ready_dbs():
+                try:
+                    await publisher.publish_shard(shard)
+                except Exception as e:
+                    logger.error(f"❌ Failed to publish analytics of shard '{shard}': {e}")
+            await stop_monitoring()
+            shutdown_dbs()
+            get_state_store().close()
+            close_dead_letters()
         
-        application.post_init = setup_bot_commands
+        application.post_shutdown = flush_pending_writes
         
         logger.info("✅ All handlers registered")
-        logger.info("✅ Bot is ready and polling for updates...")
         
         # Run bot
-        application.run_polling()
+        if settings.BOT_MODE == "webhook":
+            webhook_url = f"{settings.WEBHOOK_URL.rstrip('/')}/{settings.WEBHOOK_PATH}"
+            logger.info(f"✅ Bot is ready and listening for webhook updates on port {settings.WEBHOOK_PORT}...")
+            
+            application.run_webhook(
+                listen=settings.WEBHOOK_LISTEN,
+                port=settings.WEBHOOK_PORT,
+                url_path=settings.WEBHOOK_PATH,
+                webhook_url=webhook_url,
+                secret_token=settings.WEBHOOK_SECRET_TOKEN,
+                max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+                allowed_updates=Update.ALL_TYPES,
+            )
+        else:
+            logger.info("✅ Bot is ready and polling for updates...")
+            application.run_polling()
         
     except KeyboardInterrupt:
         logger.info("\nShutting down gracefully...")
@@ -17,6 +17,21 @@ GOAL_CONFIRMATION = """Отлично! 🎯
 Если ты захочешь изменить цель, напиши мне /start"""
 
 
+# Day 2 - Progress Reminder
+REMINDER_MESSAGE = """Привет! 👋
+Как продвигается твоя цель?
+**"{goal}"**
+
+Выбери вариант ниже 👇"""
+
+BUTTON_ON_TRACK = "✅ Всё идёт по плану"
+BUTTON_DIFFICULTIES = "🤔 Есть сложности"
+BUTTON_NOT_STARTED = "⏳ Ещё не начал(а)"
+
+PROGRESS_THANKS = """Спасибо, что поделился(ась)! 💪
+Завтра попросим оценить прогресс — команда /assess"""
+
+
 # Day 3 - Final Assessment
 ASSESSMENT_REQUEST = """Оцени, пожалуйста, насколько процентов ты продвинулся(ась) к своей цели
 **"{goal}"**
@@ -45,6 +60,31 @@ ERROR_GOAL_TOO_LONG = """❌ Цель слишком длинная. Пожал
 
 ERROR_GENERAL = """❌ Произошла ошибка. Попробуй позже или обратись к организаторам."""
 
+THROTTLED_MESSAGE = """⏳ Слишком много сообщений подряд. Подожди немного и попробуй снова."""
+
+
+# Facilitator report (/stats)
+STATS_REPORT = """📊 *Статистика интенсива*
+
+Участников: {participants}
+Завершили оценку: {completed} ({completion_rate:.0f}%)
+
+*Результаты, %* (P10 / P25 / медиана / P75 / P90)
+{score_quantiles}
+
+*Время до оценки, ч* (P10 / P25 / медиана / P75 / P90)
+{hours_quantiles}
+До суток: {hours_0} · 1–2 дня: {hours_1} · 2–3 дня: {hours_2} · больше: {hours_3}
+
+*По дням постановки цели*
+{days}"""
+
+STATS_DAY_LINE = "{date}: целей {goals}, оценок {completed} ({completion_rate:.0f}%), медиана {median}"
+
+STATS_EMPTY = "📊 Пока нет ни одной цели."
+
+STATS_UNKNOWN_SHARD = "Нет когорты «{shard}». Доступные когорты: {shards}"
+
 
 
 
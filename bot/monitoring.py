@@ -0,0 +1,160 @@
+"""
+Metrics wiring for the running bot
+Exposes the components' own counters through utils.metrics and serves them locally
+"""
+from typing import Optional
+
+from config.settings import settings
+from utils.logger import logger
+from utils.metrics import LoopLagMonitor, MetricsServer, metrics
+from database.journal import get_drainer
+from database.rate_limiter import get_rate_limiter
+from database.sheets import get_ready_dbs
+from database.state_store import get_state_store
+from database.write_queue import get_write_queues
+from scheduler.job_store import get_reminder_store
+from scheduler.tasks import get_broadcast_stats
+
+
+def register_runtime_metrics() -> None:
+    """
+    Register scrape-time metrics for the Sheets quota, cache, queues and states
+    
+    Nothing here waits for Google Sheets. Database metrics are labelled by
+    cohort shard and cover the shards connected at scrape time, so each
+    shard's series appear as soon as that shard connects.
+    """
+    limiter_stats = get_rate_limiter().stats
+    metrics.callback(
+        "sheets_limiter_requests_total", "Sheets requests admitted by the client-side quota",
+        "counter", lambda: limiter_stats["requests"]
+    )
+    metrics.callback(
+        "sheets_limiter_throttled_total", "Sheets requests that had to wait for quota",
+        "counter", lambda: limiter_stats["throttled"]
+    )
+    metrics.callback(
+        "sheets_rate_limited_total", "Sheets requests rejected by Google with a quota error",
+        "counter", lambda: limiter_stats["rate_limited"]
+    )
+    
+    def per_shard(value):
+        return lambda: {shard: value(db) for shard, db in get_ready_dbs().items()}
+    
+    metrics.callback(
+        "sheets_circuit_state", "1 for the current state of each shard's Sheets circuit breaker", "gauge",
+        lambda: {
+            (shard, state): int(state == db.breaker.state)
+            for shard, db in get_ready_dbs().items()
+            for state in ("closed", "open", "half_open")
+        },
+        ("shard", "state")
+    )
+    metrics.callback(
+        "sheets_circuit_opened_total", "Times the Sheets circuit breaker opened",
+        "counter", per_shard(lambda db: db.breaker.stats["opened"]), ("shard",)
+    )
+    metrics.callback(
+        "sheets_circuit_rejected_total", "Sheets calls rejected while the circuit was open",
+        "counter", per_shard(lambda db: db.breaker.stats["rejected"]), ("shard",)
+    )
+    
+    metrics.callback(
+        "read_cache_events_total", "Read cache hits, misses, coalesced loads, evictions and expiries",
+        "counter",
+        lambda: {
+            (shard, event): count
+            for shard, db in get_ready_dbs().items()
+            for event, count in db.cache_stats.items() if event != 'size'
+        },
+        ("shard", "event")
+    )
+    metrics.callback(
+        "read_cache_size", "Entries in the read cache",
+        "gauge", per_shard(lambda db: len(db.read_cache)), ("shard",)
+    )
+    metrics.callback(
+        "mirror_rows", "Rows in the local UserData mirror",
+        "gauge", per_shard(lambda db: len(db.mirror)), ("shard",)
+    )
+    
+    if settings.SHEETS_BACKEND == "fake":
+        from database.fake_sheets import get_fake_backend
+        
+        backend = get_fake_backend()
+        metrics.callback(
+            "fake_sheets_calls_total", "Calls served by the fake Sheets backend",
+            "counter", lambda: backend.stats["calls"], ("method",)
+        )
+    
+    # Write path: journal -> drainer -> write-behind queue -> Sheets
+    metrics.callback(
+        "journal_backlog_bytes", "Journal bytes not yet written to Sheets",
+        "gauge", lambda: get_drainer().backlog_bytes
+    )
+    metrics.callback(
+        "write_queue_pending", "Writes waiting in the write-behind queue",
+        "gauge", lambda: {queue.shard: queue.pending_count for queue in get_write_queues()}, ("shard",)
+    )
+    
+    # Reminders
+    metrics.callback(
+        "reminders_total", "Reminder send outcomes", "counter",
+        lambda: {outcome: get_broadcast_stats()[outcome] for outcome in ("sent", "failed", "retried")},
+        ("outcome",)
+    )
+    metrics.callback(
+        "reminders_in_progress", "Reminders queued, sending or waiting for a retry",
+        "gauge", lambda: get_broadcast_stats()["pending"]
+    )
+    if settings.REMINDERS_ENABLED:
+        metrics.callback(
+            "reminders_scheduled", "Reminders waiting in the reminder store",
+            "gauge", lambda: get_reminder_store().count()
+        )
+    
+    metrics.callback(
+        "user_states", "Users per conversation state", "gauge",
+        lambda: get_state_store().count_by_state(), ("state",)
+    )
+
+
+# Lazy initialization of metrics server and loop lag monitor
+_server_instance: Optional[MetricsServer] = None
+_lag_monitor_instance: Optional[LoopLagMonitor] = None
+
+
+async def start_monitoring() -> None:
+    """
+    Start serving metrics on the running event loop (no-op if METRICS_PORT is 0)
+    
+    Runs before Google Sheets is connected, so the journal backlog, reminder
+    queue and user states are visible while the shards are still warming up.
+    """
+    global _server_instance, _lag_monitor_instance
+    if not settings.METRICS_PORT or _server_instance is not None:
+        return
+    
+    register_runtime_metrics()
+    
+    _lag_monitor_instance = LoopLagMonitor(settings.METRICS_LOOP_LAG_INTERVAL)
+    _lag_monitor_instance.start()
+    
+    _server_instance = MetricsServer(settings.METRICS_HOST, settings.METRICS_PORT)
+    try:
+        await _server_instance.start()
+    except OSError as e:
+        # Metrics are optional, the bot keeps running without them
+        logger.error(f"❌ Could not start metrics server: {e}")
+        _server_instance = None
+
+
+async def stop_monitoring() -> None:
+    """Stop the metrics server and loop lag monitor"""
+    global _server_instance, _lag_monitor_instance
+    if _lag_monitor_instance is not None:
+        await _lag_monitor_instance.stop()
+        _lag_monitor_instance = None
+    if _server_instance is not None:
+        await _server_instance.stop()
+        _server_instance = None
@@ -0,0 +1,182 @@
+"""
+Anti-flood throttling in front of the handlers
+Runs as a TypeHandler in group -1, before any other handler sees the update
+"""
+import re
+import time
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Optional
+
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop, ContextTypes
+
+from config.settings import settings
+from bot.messages import THROTTLED_MESSAGE
+from utils.logger import logger
+from utils.metrics import metrics
+from utils.rate_limit import TokenBucket
+
+
+THROTTLED_UPDATES = metrics.counter(
+    "updates_throttled_total", "Updates dropped by the anti-flood throttle", ("reason",)
+)
+GOALS_DEBOUNCED = metrics.counter(
+    "goals_debounced_total", "Goal resubmissions merged into the user's previous goal"
+)
+
+
+class UpdateThrottler:
+    """
+    Per-user token buckets plus a global budget
+    
+    Each user may send `user_burst` updates back-to-back and `user_rate`
+    per second after that. When the whole bot goes over the global
+    budget, only users who have recently used up half of their own burst
+    are throttled, so a few flooding accounts are cut off first and the
+    rest of the cohort is not slowed down.
+    """
+    
+    # Buckets of the least recently active users are dropped beyond this
+    MAX_TRACKED_USERS = 10000
+    
+    def __init__(
+        self,
+        user_rate: float,
+        user_burst: float,
+        global_rate: float,
+        global_burst: float,
+        notice_interval: float
+    ):
+        """
+        Args:
+            user_rate: Updates per second allowed per user
+            user_burst: Updates a user may send back-to-back
+            global_rate: Updates per second for the whole bot (0 = no global budget)
+            global_burst: Updates the whole bot may take back-to-back
+            notice_interval: Min seconds between two "slow down" replies to one user
+        """
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.notice_interval = notice_interval
+        self._global = TokenBucket(global_rate, global_burst) if global_rate > 0 else None
+        
+        # user_id -> [bucket, monotonic time of the last notice]
+        self._users: "OrderedDict[int, list]" = OrderedDict()
+    
+    def _entry(self, user_id: int) -> list:
+        entry = self._users.get(user_id)
+        if entry is None:
+            entry = self._users[user_id] = [TokenBucket(self.user_rate, self.user_burst), 0.0]
+            while len(self._users) > self.MAX_TRACKED_USERS:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(user_id)
+        return entry
+    
+    def check(self, user_id: int) -> Optional[str]:
+        """
+        Take a token for one update
+        
+        Args:
+            user_id: Telegram user ID
+        
+        Returns:
+            None if the update may pass, otherwise the reason ("user" or "global")
+        """
+        bucket = self._entry(user_id)[0]
+        
+        if bucket.try_acquire() > 0:
+            return "user"
+        
+        if (
+            self._global is not None
+            and self._global.try_acquire() > 0
+            and bucket.available < self.user_burst / 2
+        ):
+            return "global"
+        
+        return None
+    
+    def should_notify(self, user_id: int) -> bool:
+        """True at most once per notice_interval per user"""
+        entry = self._entry(user_id)
+        now = time.monotonic()
+        if now - entry[1] < self.notice_interval:
+            return False
+        entry[1] = now
+        return True
+
+
+def _normalize_goal(text: str) -> str:
+    """Case, repeated whitespace and trailing punctuation do not make a new goal"""
+    return re.sub(r"\s+", " ", text.casefold()).strip(" .!?,;:")
+
+
+def is_goal_resubmission(previous: Optional[str], text: str) -> bool:
+    """
+    True if a goal is the previous one sent again (a double tap or a typo fix)
+    
+    A different goal is never merged into the previous one, it gets its own row.
+    
+    Args:
+        previous: Text of the user's previous goal, if known
+        text: Newly submitted goal text
+    """
+    if not previous:
+        return False
+    
+    previous, text = _normalize_goal(previous), _normalize_goal(text)
+    return previous == text or SequenceMatcher(None, previous, text).ratio() >= settings.GOAL_DEBOUNCE_SIMILARITY
+
+
+# Lazy initialization of throttler
+_throttler_instance = None
+
+
+def get_throttler() -> UpdateThrottler:
+    """Get or create throttler instance (lazy initialization)"""
+    global _throttler_instance
+    if _throttler_instance is None:
+        _throttler_instance = UpdateThrottler(
+            settings.THROTTLE_USER_RATE,
+            settings.THROTTLE_USER_BURST,
+            settings.THROTTLE_GLOBAL_RATE,
+            settings.THROTTLE_GLOBAL_BURST,
+            settings.THROTTLE_NOTICE_INTERVAL
+        )
+    return _throttler_instance
+
+
+async def throttle_update(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """
+    Drop an update before the handlers if its user is flooding
+    
+    A throttled user gets a short reply at most once per
+    THROTTLE_NOTICE_INTERVAL, nothing touches the state store or storage.
+    
+    Security:
+        - Does not log user_id or username (anonymity requirement)
+    """
+    user = update.effective_user
+    if user is None or user.id in settings.ADMIN_USER_IDS:
+        return
+    
+    throttler = get_throttler()
+    reason = throttler.check(user.id)
+    if reason is None:
+        return
+    
+    THROTTLED_UPDATES.inc(reason=reason)
+    logger.info(f"Throttled an update ({reason} limit)")
+    
+    if throttler.should_notify(user.id):
+        try:
+            if update.callback_query:
+                await update.callback_query.answer(THROTTLED_MESSAGE)
+            elif update.effective_message:
+                await update.effective_message.reply_text(THROTTLED_MESSAGE)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not send throttle notice: {e}")
+    
+    raise ApplicationHandlerStop
@@ -0,0 +1,73 @@
+"""
+Update processing strategy
+Runs different users' updates in parallel and each user's updates in order
+"""
+import asyncio
+from typing import Any, Awaitable, Dict, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    Update processor with per-user serialisation and bounded global parallelism
+    
+    Updates of the same user wait for each other in arrival order, so the
+    read-modify-write of a user's state in the handlers never races. An
+    update takes one of the global processing slots only once it holds its
+    user's lock, so the waiting updates of a user sending many messages
+    hold no slots and everyone else keeps being served.
+    """
+    
+    def __init__(self, max_concurrent_updates: int):
+        """
+        Args:
+            max_concurrent_updates: Max number of updates processed at the same time
+        """
+        super().__init__(max_concurrent_updates)
+        
+        # user_id -> [lock, number of updates holding or waiting for it]
+        self._user_locks: Dict[int, list] = {}
+    
+    @staticmethod
+    def _user_key(update: object) -> Optional[int]:
+        """Get the ID updates are serialised by (user, or chat for channel posts)"""
+        if not isinstance(update, Update):
+            return None
+        
+        if update.effective_user:
+            return update.effective_user.id
+        if update.effective_chat:
+            return update.effective_chat.id
+        return None
+    
+    async def process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        """Process update after the same user's earlier updates, then within the global limit"""
+        key = self._user_key(update)
+        
+        if key is None:
+            await super().process_update(update, coroutine)
+            return
+        
+        entry = self._user_locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        
+        try:
+            # The global slot is taken inside the user's lock, never while waiting for it
+            async with entry[0]:
+                await super().process_update(update, coroutine)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._user_locks[key]
+    
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        """Run the handlers"""
+        await coroutine
+    
+    async def initialize(self) -> None:
+        """Nothing to allocate"""
+    
+    async def shutdown(self) -> None:
+        """Nothing to release"""
@@ -3,8 +3,10 @@ Application settings and configuration
 Loads from environment variables
 """
 import os
+import re
 import json
 from pathlib import Path
+from typing import List, Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -17,87 +19,215 @@ class Settings:
     # Telegram Bot
     BOT_TOKEN: str = os.getenv("BOT_TOKEN", "")
     
+    # Telegram IDs allowed to use facilitator commands (/stats), comma-separated
+    ADMIN_USER_IDS: frozenset = frozenset(
+        int(user_id) for user_id in os.getenv("ADMIN_USER_IDS", "").split(",") if user_id.strip()
+    )
+    
+    # Update delivery: "polling" (default) or "webhook"
+    BOT_MODE: str = os.getenv("BOT_MODE", "polling").lower()
+    
+    # Webhook mode (embedded HTTP listener, Telegram pushes updates to WEBHOOK_URL)
+    WEBHOOK_URL: str = os.getenv("WEBHOOK_URL", "")
+    WEBHOOK_PATH: str = os.getenv("WEBHOOK_PATH", "webhook")
+    WEBHOOK_LISTEN: str = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+    WEBHOOK_PORT: int = int(os.getenv("WEBHOOK_PORT", os.getenv("PORT", "8080")))
+    WEBHOOK_SECRET_TOKEN: str = os.getenv("WEBHOOK_SECRET_TOKEN", "")
+    WEBHOOK_MAX_CONNECTIONS: int = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40"))
+    
+    # Number of updates processed concurrently (each user's updates stay in order)
+    CONCURRENT_UPDATES: int = int(os.getenv("CONCURRENT_UPDATES", "32"))
+    
+    # Anti-flood: per-user token bucket (THROTTLE_USER_RATE=0 disables throttling),
+    # global budget that cuts off the heaviest users first, min seconds between notices
+    THROTTLE_USER_RATE: float = float(os.getenv("THROTTLE_USER_RATE", "0.5"))
+    THROTTLE_USER_BURST: float = float(os.getenv("THROTTLE_USER_BURST", "6"))
+    THROTTLE_GLOBAL_RATE: float = float(os.getenv("THROTTLE_GLOBAL_RATE", "30"))
+    THROTTLE_GLOBAL_BURST: float = float(os.getenv("THROTTLE_GLOBAL_BURST", "100"))
+    THROTTLE_NOTICE_INTERVAL: float = float(os.getenv("THROTTLE_NOTICE_INTERVAL", "30"))
+    
+    # The same goal sent again within this many seconds replaces the previous one (no new row);
+    # texts at least this similar (0-1) count as the same goal, a different goal always gets a new row
+    GOAL_DEBOUNCE_SECONDS: float = float(os.getenv("GOAL_DEBOUNCE_SECONDS", "300"))
+    GOAL_DEBOUNCE_SIMILARITY: float = float(os.getenv("GOAL_DEBOUNCE_SIMILARITY", "0.9"))
+    
     # Google Sheets
     SPREADSHEET_ID: str = os.getenv("SPREADSHEET_ID", "")
     
-    # Google Credentials - support for Railway deployment
-    # Try to load from environment variable first (for Railway/Docker)
-    @staticmethod
-    def _setup_credentials_path():
-        """Setup Google credentials, supporting Railway environment variable"""
+    # Cohort shards: JSON list routing cohorts (by /start payload or date range)
+    # to their own worksheets or spreadsheets, see database/sharding.py
+    COHORT_SHARDS: str = os.getenv("COHORT_SHARDS", "")
+    
+    # Google Credentials: key file, or GOOGLE_CREDENTIALS env var with the JSON (Railway/Docker)
+    CREDENTIALS_PATH: str = os.getenv("CREDENTIALS_PATH", "credentials/google_credentials.json")
+    
+    # Parsed GOOGLE_CREDENTIALS, read on first connect instead of at import
+    _credentials_info: Optional[dict] = None
+    
+    @classmethod
+    def google_credentials_info(cls) -> Optional[dict]:
+        """
+        Service account info from the GOOGLE_CREDENTIALS env var
+        
+        Returns:
+            Credentials dict, or None if the variable is not set or invalid
+            (CREDENTIALS_PATH is used then)
+        """
         creds_env = os.getenv("GOOGLE_CREDENTIALS")
+        if not creds_env:
+            return None
         
-        if creds_env:
-            try:
-                # Clean up the JSON string
-                # Remove leading/trailing whitespace and newlines
-                creds_env = creds_env.strip()
-                
-                # Railway might format JSON with extra whitespace - that's okay
-                # json.loads handles multiline JSON just fine
-                
-                # Try to parse JSON
-                credentials_data = json.loads(creds_env)
-                
-                # Validate it's a dict with required fields
-                if not isinstance(credentials_data, dict):
-                    raise ValueError("GOOGLE_CREDENTIALS must be a JSON object")
-                
-                required_fields = ["type", "client_email", "private_key"]
-                missing_fields = [f for f in required_fields if f not in credentials_data]
-                
-                if missing_fields:
-                    raise ValueError(f"GOOGLE_CREDENTIALS missing required fields: {', '.join(missing_fields)}")
-                
-                if credentials_data.get("type") != "service_account":
-                    raise ValueError("GOOGLE_CREDENTIALS must be a service_account type")
-                
-                # Create credentials file
-                credentials_path = "/tmp/google_credentials.json"
-                Path(credentials_path).parent.mkdir(exist_ok=True)
-                with open(credentials_path, 'w') as f:
-                    json.dump(credentials_data, f, indent=2)
-                
-                print(f"✓ Created credentials file from GOOGLE_CREDENTIALS env var")
-                print(f"  Path: {credentials_path}")
-                print(f"  Type: {credentials_data.get('type')}")
-                print(f"  Client: {credentials_data.get('client_email')}")
-                print(f"  Project: {credentials_data.get('project_id', 'N/A')}")
-                
-                return credentials_path
-                
-            except json.JSONDecodeError as e:
-                print(f"✗ Error parsing GOOGLE_CREDENTIALS JSON: {e}")
-                print(f"  Error position: line {e.lineno}, column {e.colno}")
-                print(f"  First 200 chars: {creds_env[:200]}...")
-                print(f"  Last 100 chars: ...{creds_env[-100:]}")
-                print(f"  Hint: Check for syntax errors (trailing commas, missing quotes, etc.)")
-                # Fall back to default path
-                return os.getenv("CREDENTIALS_PATH", "credentials/google_credentials.json")
-                
-            except ValueError as e:
-                print(f"✗ Validation error: {e}")
-                return os.getenv("CREDENTIALS_PATH", "credentials/google_credentials.json")
-                
-            except Exception as e:
-                print(f"✗ Error processing GOOGLE_CREDENTIALS: {e}")
-                return os.getenv("CREDENTIALS_PATH", "credentials/google_credentials.json")
-        else:
-            # Use file path from environment or default
-            return os.getenv("CREDENTIALS_PATH", "credentials/google_credentials.json")
-    
-    CREDENTIALS_PATH: str = _setup_credentials_path.__func__()
+        if cls._credentials_info is not None:
+            return cls._credentials_info
+        
+        try:
+            # Clean up the JSON string
+            # Remove leading/trailing whitespace and newlines
+            creds_env = creds_env.strip()
+            
+            # Railway might format JSON with extra whitespace - that's okay
+            # json.loads handles multiline JSON just fine
+            
+            # Try to parse JSON
+            credentials_data = json.loads(creds_env)
+            
+            # Validate it's a dict with required fields
+            if not isinstance(credentials_data, dict):
+                raise ValueError("GOOGLE_CREDENTIALS must be a JSON object")
+            
+            required_fields = ["type", "client_email", "private_key"]
+            missing_fields = [f for f in required_fields if f not in credentials_data]
+            
+            if missing_fields:
+                raise ValueError(f"GOOGLE_CREDENTIALS missing required fields: {', '.join(missing_fields)}")
+            
+            if credentials_data.get("type") != "service_account":
+                raise ValueError("GOOGLE_CREDENTIALS must be a service_account type")
+            
+            print(f"✓ Loaded credentials from GOOGLE_CREDENTIALS env var")
+            print(f"  Type: {credentials_data.get('type')}")
+            print(f"  Client: {credentials_data.get('client_email')}")
+            print(f"  Project: {credentials_data.get('project_id', 'N/A')}")
+            
+            cls._credentials_info = credentials_data
+            return credentials_data
+            
+        except json.JSONDecodeError as e:
+            print(f"✗ Error parsing GOOGLE_CREDENTIALS JSON: {e}")
+            print(f"  Error position: line {e.lineno}, column {e.colno}")
+            print(f"  First 200 chars: {creds_env[:200]}...")
+            print(f"  Last 100 chars: ...{creds_env[-100:]}")
+            print(f"  Hint: Check for syntax errors (trailing commas, missing quotes, etc.)")
+            # Fall back to the key file
+            return None
+            
+        except ValueError as e:
+            print(f"✗ Validation error: {e}")
+            return None
+            
+        except Exception as e:
+            print(f"✗ Error processing GOOGLE_CREDENTIALS: {e}")
+            return None
     
     # Scheduler
     SCHEDULER_TIMEZONE: str = os.getenv("SCHEDULER_TIMEZONE", "Europe/Moscow")
     
+    # Sheets backend: "google" or "fake" (in-process stand-in, no network or credentials)
+    SHEETS_BACKEND: str = os.getenv("SHEETS_BACKEND", "google").lower()
+    FAKE_SHEETS_LATENCY: float = float(os.getenv("FAKE_SHEETS_LATENCY", "0.05"))
+    FAKE_SHEETS_RATE_LIMIT_PROBABILITY: float = float(os.getenv("FAKE_SHEETS_RATE_LIMIT_PROBABILITY", "0"))
+    FAKE_SHEETS_QUOTA_PER_MINUTE: int = int(os.getenv("FAKE_SHEETS_QUOTA_PER_MINUTE", "60"))
+    
+    # Cached worksheet layout, saves the metadata request on restart
+    SHEETS_METADATA_CACHE: str = os.getenv("SHEETS_METADATA_CACHE", "data/sheets_metadata.json")
+    
+    # Max worker threads for blocking Google Sheets calls
+    SHEETS_MAX_WORKERS: int = int(os.getenv("SHEETS_MAX_WORKERS", "4"))
+    
+    # Sheets HTTP transport: keep-alive pool (one connection per worker plus the
+    # startup and token threads), per-request timeouts, token refresh ahead of expiry
+    SHEETS_POOL_SIZE: int = int(os.getenv("SHEETS_POOL_SIZE", str(SHEETS_MAX_WORKERS + 2)))
+    SHEETS_CONNECT_TIMEOUT: float = float(os.getenv("SHEETS_CONNECT_TIMEOUT", "5"))
+    SHEETS_READ_TIMEOUT: float = float(os.getenv("SHEETS_READ_TIMEOUT", "30"))
+    SHEETS_TOKEN_REFRESH_MARGIN: float = float(os.getenv("SHEETS_TOKEN_REFRESH_MARGIN", "300"))
+    
+    # Client-side Sheets quota (Google default: 60 reads and 60 writes per minute per user)
+    SHEETS_READ_QUOTA_PER_MINUTE: int = int(os.getenv("SHEETS_READ_QUOTA_PER_MINUTE", "60"))
+    SHEETS_WRITE_QUOTA_PER_MINUTE: int = int(os.getenv("SHEETS_WRITE_QUOTA_PER_MINUTE", "60"))
+    SHEETS_QUOTA_BURST: int = int(os.getenv("SHEETS_QUOTA_BURST", "10"))
+    
+    # Retries for quota and transient Sheets errors (exponential backoff with jitter)
+    SHEETS_MAX_RETRIES: int = int(os.getenv("SHEETS_MAX_RETRIES", "5"))
+    SHEETS_BACKOFF_BASE: float = float(os.getenv("SHEETS_BACKOFF_BASE", "1.0"))
+    SHEETS_BACKOFF_MAX: float = float(os.getenv("SHEETS_BACKOFF_MAX", "32.0"))
+    
+    # Circuit breaker: opens when FAILURE_RATE of the last WINDOW calls failed or took
+    # longer than SLOW_CALL_SECONDS, then rejects calls for OPEN_SECONDS before a probe
+    SHEETS_BREAKER_WINDOW: int = int(os.getenv("SHEETS_BREAKER_WINDOW", "20"))
+    SHEETS_BREAKER_MIN_CALLS: int = int(os.getenv("SHEETS_BREAKER_MIN_CALLS", "5"))
+    SHEETS_BREAKER_FAILURE_RATE: float = float(os.getenv("SHEETS_BREAKER_FAILURE_RATE", "0.5"))
+    SHEETS_BREAKER_SLOW_CALL_SECONDS: float = float(os.getenv("SHEETS_BREAKER_SLOW_CALL_SECONDS", "10"))
+    SHEETS_BREAKER_OPEN_SECONDS: float = float(os.getenv("SHEETS_BREAKER_OPEN_SECONDS", "30"))
+    
+    # Write-behind queue (batched Sheets writes)
+    WRITE_QUEUE_MAX_BATCH: int = int(os.getenv("WRITE_QUEUE_MAX_BATCH", "100"))
+    WRITE_QUEUE_FLUSH_INTERVAL: float = float(os.getenv("WRITE_QUEUE_FLUSH_INTERVAL", "2.0"))
+    # Failed flushes (while the circuit is closed) before a write is set aside as undeliverable
+    WRITE_QUEUE_MAX_ATTEMPTS: int = int(os.getenv("WRITE_QUEUE_MAX_ATTEMPTS", "10"))
+    DEAD_LETTER_DB_PATH: str = os.getenv("DEAD_LETTER_DB_PATH", "data/dead_letters.db")
+    
+    # Local UserData mirror: minimum seconds between syncs triggered by unknown rows
+    MIRROR_SYNC_INTERVAL: float = float(os.getenv("MIRROR_SYNC_INTERVAL", "30"))
+    
+    # Read-through cache for point reads (LRU + TTL)
+    READ_CACHE_MAX_SIZE: int = int(os.getenv("READ_CACHE_MAX_SIZE", "10000"))
+    READ_CACHE_TTL: float = float(os.getenv("READ_CACHE_TTL", "300"))
+    
+    # Analytics sheet: seconds between publishes of cohort statistics
+    ANALYTICS_PUBLISH_INTERVAL: float = float(os.getenv("ANALYTICS_PUBLISH_INTERVAL", "300"))
+    
+    # UserData export: rows per Sheets request
+    EXPORT_PAGE_SIZE: int = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+    
+    # Conversation state store: "sqlite" (survives restarts) or "memory"
+    STATE_STORE: str = os.getenv("STATE_STORE", "sqlite").lower()
+    STATE_DB_PATH: str = os.getenv("STATE_DB_PATH", "data/state.db")
+    
+    # Local write-ahead journal (goals are acknowledged once fsynced here)
+    JOURNAL_DIR: str = os.getenv("JOURNAL_DIR", "data/journal")
+    JOURNAL_COMMIT_INTERVAL: float = float(os.getenv("JOURNAL_COMMIT_INTERVAL", "0.005"))
+    JOURNAL_DRAIN_BATCH: int = int(os.getenv("JOURNAL_DRAIN_BATCH", "500"))
+    JOURNAL_MAX_BYTES: int = int(os.getenv("JOURNAL_MAX_BYTES", str(16 * 1024 * 1024)))
+    # Seconds the drainer waits for a shard before replaying the other shards without it
+    JOURNAL_REPLAY_TIMEOUT: float = float(os.getenv("JOURNAL_REPLAY_TIMEOUT", "10"))
+    
+    # Prometheus metrics endpoint (GET /metrics), 0 disables it
+    METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "9108"))
+    METRICS_LOOP_LAG_INTERVAL: float = float(os.getenv("METRICS_LOOP_LAG_INTERVAL", "0.5"))
+    
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     LOG_FILE: str = os.getenv("LOG_FILE", "logs/bot.log")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text").lower()
     
     # Testing mode (shortens delays for testing)
     TESTING_MODE: bool = os.getenv("TESTING_MODE", "False").lower() == "true"
     
+    # Day 2 reminders (off by default: they require keeping the Telegram ID until sent)
+    REMINDERS_ENABLED: bool = os.getenv("REMINDERS_ENABLED", "False").lower() == "true"
+    
+    REMINDER_DB_PATH: str = os.getenv("REMINDER_DB_PATH", "data/reminders.db")
+    
+    # Reminder broadcast: due reminders are collected every bucket and sent
+    # within Telegram's limits (~30 msg/s per bot, ~1 msg/s per chat)
+    REMINDER_BUCKET_SECONDS: int = int(os.getenv("REMINDER_BUCKET_SECONDS", "60"))
+    REMINDER_DISPATCH_LIMIT: int = int(os.getenv("REMINDER_DISPATCH_LIMIT", "5000"))
+    BROADCAST_RATE_PER_SECOND: float = float(os.getenv("BROADCAST_RATE_PER_SECOND", "25"))
+    BROADCAST_CHAT_INTERVAL: float = float(os.getenv("BROADCAST_CHAT_INTERVAL", "1.0"))
+    BROADCAST_WORKERS: int = int(os.getenv("BROADCAST_WORKERS", "8"))
+    BROADCAST_MAX_ATTEMPTS: int = int(os.getenv("BROADCAST_MAX_ATTEMPTS", "5"))
+    
     # Reminder delay (1 minute for testing, 24 hours for production)
     REMINDER_DELAY_SECONDS: int = 60 if TESTING_MODE else 86400  # 24 * 60 * 60
     
@@ -114,11 +244,37 @@ class Settings:
         if not cls.BOT_TOKEN:
             errors.append("BOT_TOKEN is not set")
         
-        if not cls.SPREADSHEET_ID:
+        if not cls.SPREADSHEET_ID and cls.SHEETS_BACKEND != "fake":
             errors.append("SPREADSHEET_ID is not set")
         
+        if cls.COHORT_SHARDS:
+            from database.sharding import parse_shards
+            try:
+                parse_shards(cls.COHORT_SHARDS, cls.SPREADSHEET_ID)
+            except ValueError as e:
+                errors.append(str(e))
+        
+        if cls.SHEETS_BACKEND not in ("google", "fake"):
+            errors.append(f"SHEETS_BACKEND must be 'google' or 'fake', got '{cls.SHEETS_BACKEND}'")
+        
+        if cls.BOT_MODE not in ("polling", "webhook"):
+            errors.append(f"BOT_MODE must be 'polling' or 'webhook', got '{cls.BOT_MODE}'")
+        
+        if cls.BOT_MODE == "webhook":
+            if not cls.WEBHOOK_URL.startswith("https://"):
+                errors.append("WEBHOOK_URL must be set to a public https:// URL in webhook mode")
+            
+            # Telegram accepts 1-256 characters A-Z, a-z, 0-9, _ and -
+            if not re.fullmatch(r'[A-Za-z0-9_-]{1,256}', cls.WEBHOOK_SECRET_TOKEN):
+                errors.append("WEBHOOK_SECRET_TOKEN must be set (1-256 chars: A-Z, a-z, 0-9, _ and -)")
+            
+            if not 1 <= cls.WEBHOOK_MAX_CONNECTIONS <= 100:
+                errors.append("WEBHOOK_MAX_CONNECTIONS must be between 1 and 100")
+        
         # Check credentials: either file exists OR GOOGLE_CREDENTIALS env var is set
-        if not os.getenv("GOOGLE_CREDENTIALS") and not Path(cls.CREDENTIALS_PATH).exists():
+        if cls.SHEETS_BACKEND == "fake":
+            pass
+        elif not os.getenv("GOOGLE_CREDENTIALS") and not Path(cls.CREDENTIALS_PATH).exists():
             errors.append(f"Google credentials not found: set GOOGLE_CREDENTIALS env var or provide {cls.CREDENTIALS_PATH}")
         
         if errors:
@@ -129,15 +285,95 @@ class Settings:
         
         return True
     
+    @classmethod
+    def local_data_paths(cls) -> List[str]:
+        """Local files and directories that must survive a redeploy"""
+        paths = [cls.JOURNAL_DIR, cls.DEAD_LETTER_DB_PATH]
+        if cls.STATE_STORE != "memory":
+            paths.append(cls.STATE_DB_PATH)
+        if cls.REMINDERS_ENABLED:
+            paths.append(cls.REMINDER_DB_PATH)
+        return paths
+    
+    @classmethod
+    def ephemeral_data_paths(cls) -> List[str]:
+        """
+        Local data paths that are lost when the container is replaced
+        
+        In a container (Docker, Railway), a path is only persistent on a
+        mounted volume. Outside a container everything counts as persistent.
+        
+        Returns:
+            Paths from local_data_paths() that are not on a mounted volume
+        """
+        if not (os.getenv("RAILWAY_ENVIRONMENT") or Path("/.dockerenv").exists()):
+            return []
+        
+        ephemeral = []
+        for path in cls.local_data_paths():
+            resolved = Path(path).resolve()
+            mounted = any(
+                parent != Path(parent.anchor) and os.path.ismount(parent)
+                for parent in (resolved, *resolved.parents)
+            )
+            if not mounted:
+                ephemeral.append(path)
+        return ephemeral
+    
     @classmethod
     def display(cls) -> None:
         """Display current configuration (hiding sensitive data)"""
         print("\nGoalBuddy21 Configuration:")
         print(f"  Bot Token: {'Set' if cls.BOT_TOKEN else 'Not set'}")
+        print(f"  Admins: {len(cls.ADMIN_USER_IDS)}")
+        print(f"  Mode: {cls.BOT_MODE}")
+        if cls.BOT_MODE == "webhook":
+            print(f"  Webhook: {cls.WEBHOOK_URL.rstrip('/')}/{cls.WEBHOOK_PATH} (port {cls.WEBHOOK_PORT})")
+            print(f"  Webhook Secret: {'Set' if cls.WEBHOOK_SECRET_TOKEN else 'Not set'}")
+        print(f"  Concurrent Updates: {cls.CONCURRENT_UPDATES}")
+        if cls.THROTTLE_USER_RATE > 0:
+            print(
+                f"  Throttling: {cls.THROTTLE_USER_RATE}/s per user (burst {cls.THROTTLE_USER_BURST:g}), "
+                f"{cls.THROTTLE_GLOBAL_RATE}/s global, repeated goals debounced for {cls.GOAL_DEBOUNCE_SECONDS:.0f}s"
+            )
+        else:
+            print(f"  Throttling: OFF (repeated goals debounced for {cls.GOAL_DEBOUNCE_SECONDS:.0f}s)")
         print(f"  Spreadsheet ID: {'Set' if cls.SPREADSHEET_ID else 'Not set'}")
+        print(f"  Cohort Shards: {'Configured' if cls.COHORT_SHARDS else 'OFF (single UserData sheet)'}")
         print(f"  Credentials Path: {cls.CREDENTIALS_PATH}")
+        if cls.SHEETS_BACKEND == "fake":
+            print(
+                f"  Sheets Backend: FAKE (latency {cls.FAKE_SHEETS_LATENCY}s, "
+                f"rate limit errors {cls.FAKE_SHEETS_RATE_LIMIT_PROBABILITY:.0%}, "
+                f"quota {cls.FAKE_SHEETS_QUOTA_PER_MINUTE}/min)"
+            )
         print(f"  Timezone: {cls.SCHEDULER_TIMEZONE}")
-        print(f"  Log Level: {cls.LOG_LEVEL}")
+        print(f"  Sheets Workers: {cls.SHEETS_MAX_WORKERS}")
+        print(
+            f"  Sheets HTTP: pool {cls.SHEETS_POOL_SIZE}, timeouts {cls.SHEETS_CONNECT_TIMEOUT}s connect / "
+            f"{cls.SHEETS_READ_TIMEOUT}s read, token refresh {cls.SHEETS_TOKEN_REFRESH_MARGIN:.0f}s before expiry"
+        )
+        print(f"  Sheets Quota: {cls.SHEETS_READ_QUOTA_PER_MINUTE} reads/min, {cls.SHEETS_WRITE_QUOTA_PER_MINUTE} writes/min")
+        print(
+            f"  Sheets Circuit Breaker: opens at {cls.SHEETS_BREAKER_FAILURE_RATE:.0%} of last "
+            f"{cls.SHEETS_BREAKER_WINDOW} calls failed or >{cls.SHEETS_BREAKER_SLOW_CALL_SECONDS}s, "
+            f"probes after {cls.SHEETS_BREAKER_OPEN_SECONDS}s"
+        )
+        print(
+            f"  Write Queue: batch {cls.WRITE_QUEUE_MAX_BATCH}, every {cls.WRITE_QUEUE_FLUSH_INTERVAL}s, "
+            f"dead letter after {cls.WRITE_QUEUE_MAX_ATTEMPTS} attempts ({cls.DEAD_LETTER_DB_PATH})"
+        )
+        print(f"  UserData Mirror: sync at most every {cls.MIRROR_SYNC_INTERVAL}s on unknown rows")
+        print(f"  Read Cache: {cls.READ_CACHE_MAX_SIZE} entries, TTL {cls.READ_CACHE_TTL}s")
+        print(f"  Analytics: published every {cls.ANALYTICS_PUBLISH_INTERVAL}s")
+        print(f"  State Store: {cls.STATE_STORE} ({cls.STATE_DB_PATH})")
+        print(
+            f"  Journal: {cls.JOURNAL_DIR} (group commit {cls.JOURNAL_COMMIT_INTERVAL}s, "
+            f"replay timeout {cls.JOURNAL_REPLAY_TIMEOUT}s)"
+        )
+        print(f"  Metrics: {f'http://{cls.METRICS_HOST}:{cls.METRICS_PORT}/metrics' if cls.METRICS_PORT else 'OFF'}")
+        print(f"  Log Level: {cls.LOG_LEVEL} ({cls.LOG_FORMAT})")
+        print(f"  Day 2 Reminders: {'ON' if cls.REMINDERS_ENABLED else 'OFF'}")
         print(f"  Testing Mode: {'ON (1 min delays)' if cls.TESTING_MODE else 'OFF (24h delays)'}")
         print()
 
@@ -0,0 +1,259 @@
+"""
+Running statistics for the Analytics worksheet
+Updated per saved goal/assessment, published by scheduler/analytics_publisher.py
+"""
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _parse_date(value: str) -> Optional[float]:
+    """Convert a sheet date to a unix timestamp (None if empty or malformed)"""
+    try:
+        return datetime.strptime(value, DATE_FORMAT).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _percentile(counts: Dict[int, int], total: int, q: float) -> Optional[int]:
+    """
+    Nearest-rank percentile of a histogram
+    
+    Args:
+        counts: value -> number of occurrences
+        total: Sum of all counts
+        q: Percentile (0-100)
+    """
+    if total == 0:
+        return None
+    
+    rank = max(1, -(-total * q // 100))
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if seen >= rank:
+            return value
+    return None
+
+
+class AnalyticsAggregator:
+    """
+    Cohort statistics maintained in O(1) per event
+    
+    Scores are kept as an exact 0-100 histogram, so mean, median and
+    percentiles never need the rows. Time to assessment is kept as a
+    histogram of whole hours. A re-assessed row replaces its previous
+    contribution.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        
+        # row -> goal timestamp, row -> (percent, hours to assessment)
+        self._goals: Dict[int, Optional[float]] = {}
+        self._assessments: Dict[int, Tuple[int, Optional[int]]] = {}
+        
+        self._score_counts: Dict[int, int] = {}
+        self._score_sum = 0
+        self._hours_counts: Dict[int, int] = {}
+        self._hours_sum = 0
+        self._hours_total = 0
+        
+        # Bumped on every change, lets the publisher skip idle intervals
+        self.version = 0
+    
+    def _reset(self) -> None:
+        self._goals.clear()
+        self._assessments.clear()
+        self._score_counts.clear()
+        self._score_sum = 0
+        self._hours_counts.clear()
+        self._hours_sum = 0
+        self._hours_total = 0
+    
+    def _add_goal(self, row_number: int, goal_date: str) -> None:
+        self._goals[row_number] = _parse_date(goal_date)
+    
+    def _remove_assessment(self, row_number: int) -> None:
+        previous = self._assessments.pop(row_number, None)
+        if previous is not None:
+            old_percent, old_hours = previous
+            self._score_counts[old_percent] -= 1
+            self._score_sum -= old_percent
+            if old_hours is not None:
+                self._hours_counts[old_hours] -= 1
+                self._hours_sum -= old_hours
+                self._hours_total -= 1
+    
+    def _add_assessment(self, row_number: int, percent: int, final_date: str) -> None:
+        self._remove_assessment(row_number)
+        
+        percent = max(0, min(100, int(percent)))
+        goal_at = self._goals.get(row_number)
+        final_at = _parse_date(final_date)
+        hours = None
+        if goal_at is not None and final_at is not None and final_at >= goal_at:
+            hours = int((final_at - goal_at) // 3600)
+        
+        self._assessments[row_number] = (percent, hours)
+        self._score_counts[percent] = self._score_counts.get(percent, 0) + 1
+        self._score_sum += percent
+        if hours is not None:
+            self._hours_counts[hours] = self._hours_counts.get(hours, 0) + 1
+            self._hours_sum += hours
+            self._hours_total += 1
+    
+    def record_goals(self, goals: Iterable[Tuple[int, str]]) -> None:
+        """
+        Count saved goals
+        
+        Args:
+            goals: (row_number, goal_date) pairs
+        """
+        with self._lock:
+            for row_number, goal_date in goals:
+                self._add_goal(row_number, goal_date)
+            self.version += 1
+    
+    def record_assessments(self, assessments: Dict[int, Tuple[int, str]]) -> None:
+        """
+        Count saved assessments
+        
+        Args:
+            assessments: Mapping of row_number -> (percent, final_date)
+        """
+        with self._lock:
+            for row_number, (percent, final_date) in assessments.items():
+                self._add_assessment(row_number, percent, final_date)
+            self.version += 1
+    
+    def apply_rows(self, rows: Iterable[Tuple[int, str, str, Optional[int], str]]) -> None:
+        """
+        Replace the contribution of changed rows (after a mirror sync)
+        
+        Costs O(1) per row, so a sync only pays for the rows it changed.
+        
+        Args:
+            rows: Current (row_number, goal_text, goal_date, final_percent, final_date) of each changed row
+        """
+        with self._lock:
+            for row_number, goal_text, goal_date, percent, final_date in rows:
+                if not goal_text:
+                    # Row cleared in the sheet
+                    self._remove_assessment(row_number)
+                    self._goals.pop(row_number, None)
+                    continue
+                self._add_goal(row_number, goal_date)
+                if percent is not None:
+                    self._add_assessment(row_number, percent, final_date)
+                else:
+                    self._remove_assessment(row_number)
+            self.version += 1
+    
+    def rebuild(self, rows: Iterable[Tuple[int, str, str, Optional[int], str]]) -> None:
+        """
+        Recompute everything from full rows (startup only, O(rows))
+        
+        Args:
+            rows: (row_number, goal_text, goal_date, final_percent, final_date) tuples
+        """
+        with self._lock:
+            self._reset()
+            for row_number, goal_text, goal_date, percent, final_date in rows:
+                if not goal_text:
+                    continue
+                self._add_goal(row_number, goal_date)
+                if percent is not None:
+                    self._add_assessment(row_number, percent, final_date)
+            self.version += 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Current statistics
+        
+        Returns:
+            Dict with participants, completed, completion_rate, mean, median,
+            p25/p75/p90, histogram (ten 10% bins, the last one includes 100)
+            and hours_mean/hours_median/hours_p90 for time to assessment
+        """
+        with self._lock:
+            participants = len(self._goals)
+            completed = len(self._assessments)
+            
+            histogram = [0] * 10
+            for percent, count in self._score_counts.items():
+                histogram[min(percent // 10, 9)] += count
+            
+            return {
+                'participants': participants,
+                'completed': completed,
+                'completion_rate': completed / participants if participants else 0.0,
+                'mean': self._score_sum / completed if completed else None,
+                'median': _percentile(self._score_counts, completed, 50),
+                'p25': _percentile(self._score_counts, completed, 25),
+                'p75': _percentile(self._score_counts, completed, 75),
+                'p90': _percentile(self._score_counts, completed, 90),
+                'histogram': histogram,
+                'hours_mean': self._hours_sum / self._hours_total if self._hours_total else None,
+                'hours_median': _percentile(self._hours_counts, self._hours_total, 50),
+                'hours_p90': _percentile(self._hours_counts, self._hours_total, 90),
+            }
+
+
+def _cell(value: Any) -> Any:
+    """Format a statistic for the sheet"""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return round(value, 2)
+    return value
+
+
+def build_analytics_rows(stats: Dict[str, Any], cohort: Optional[Dict[str, Any]] = None) -> List[List[Any]]:
+    """
+    Lay out a snapshot as Analytics sheet rows
+    
+    The summary has a fixed size, the per-day section below it only grows.
+    
+    Args:
+        stats: Snapshot from AnalyticsAggregator.snapshot()
+        cohort: Result of database.cohort_stats.compute_cohort_stats (per-day section)
+    
+    Returns:
+        Rows starting at A1
+    """
+    rows = [
+        ["Статистика по интенсиву", ""],
+        ["Обновлено", datetime.now().strftime(DATE_FORMAT)],
+        ["Участников", stats['participants']],
+        ["Завершили оценку", stats['completed']],
+        ["Доля завершивших, %", _cell(stats['completion_rate'] * 100)],
+        ["Средний результат, %", _cell(stats['mean'])],
+        ["Медиана, %", _cell(stats['median'])],
+        ["25-й перцентиль, %", _cell(stats['p25'])],
+        ["75-й перцентиль, %", _cell(stats['p75'])],
+        ["90-й перцентиль, %", _cell(stats['p90'])],
+        ["Время до оценки (среднее), ч", _cell(stats['hours_mean'])],
+        ["Время до оценки (медиана), ч", _cell(stats['hours_median'])],
+        ["Время до оценки (90-й перцентиль), ч", _cell(stats['hours_p90'])],
+        ["", ""],
+        ["Распределение результатов", "Участников"],
+    ]
+    
+    for index, count in enumerate(stats['histogram']):
+        upper = 100 if index == 9 else index * 10 + 9
+        rows.append([f"{index * 10}–{upper}%", count])
+    
+    if cohort is not None:
+        rows.append(["", ""])
+        rows.append(["День постановки цели", "Целей", "Оценок", "Доля оценок, %", "Медиана, %"])
+        for day in cohort['days']:
+            rows.append([
+                day['date'], day['goals'], day['completed'],
+                _cell(day['completion_rate'] * 100), _cell(day['median'])
+            ])
+    
+    return rows
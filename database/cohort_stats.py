@@ -0,0 +1,159 @@
+"""
+Vectorised cohort statistics for facilitator reports
+Works on NumPy columns loaded from the UserData mirror
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+
+from database.mirror import UserDataMirror
+
+
+# Quantiles reported for scores and time to assessment
+QUANTILES = [10, 25, 50, 75, 90]
+
+# Time to assessment buckets, in hours
+HOURS_BINS = [0, 24, 48, 72, np.inf]
+
+
+@dataclass
+class CohortColumns:
+    """UserData columns as arrays (one element per row with a goal)"""
+    goal_at: np.ndarray        # datetime64[s], NaT if missing
+    final_percent: np.ndarray  # float64, NaN if not assessed
+    final_at: np.ndarray       # datetime64[s], NaT if missing
+    
+    def __len__(self) -> int:
+        return len(self.goal_at)
+
+
+def _parse_one(value: str) -> np.datetime64:
+    try:
+        return np.datetime64(datetime.strptime(value, "%Y-%m-%d %H:%M:%S"), "s")
+    except (TypeError, ValueError):
+        return np.datetime64("NaT")
+
+
+def _to_datetime(values: List[str]) -> np.ndarray:
+    """Parse sheet dates in one pass, malformed values become NaT"""
+    try:
+        return np.array(values, dtype="datetime64[s]")
+    except ValueError:
+        pass
+    
+    # Parse everything shaped like "YYYY-MM-DD HH:MM:SS" at once, the rest is NaT
+    strings = np.array(values, dtype=str)
+    shaped = (np.char.str_len(strings) == 19) & (np.char.find(strings, "-") == 4)
+    result = np.full(len(strings), np.datetime64("NaT"), dtype="datetime64[s]")
+    try:
+        result[shaped] = strings[shaped].astype("datetime64[s]")
+    except ValueError:
+        result[shaped] = [_parse_one(value) for value in strings[shaped]]
+    return result
+
+
+def load_columns(mirror: UserDataMirror) -> CohortColumns:
+    """
+    Copy the mirror into NumPy arrays (rows without a goal are skipped)
+    
+    Args:
+        mirror: UserData mirror
+    
+    Returns:
+        CohortColumns
+    """
+    goal_text, goal_date, final_percent, final_date = mirror.columns()
+    keep = np.array(goal_text, dtype=object) != ""
+    
+    return CohortColumns(
+        goal_at=_to_datetime(goal_date)[keep],
+        # None becomes NaN
+        final_percent=np.array(final_percent, dtype=np.float64)[keep],
+        final_at=_to_datetime(final_date)[keep],
+    )
+
+
+def _group_medians(groups: np.ndarray, values: np.ndarray, group_count: int) -> np.ndarray:
+    """Median of values per group id (NaN for empty groups), one sort for all groups"""
+    medians = np.full(group_count, np.nan)
+    if len(values) == 0:
+        return medians
+    
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order]
+    
+    counts = np.bincount(groups, minlength=group_count)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    present = counts > 0
+    
+    low = starts[present] + (counts[present] - 1) // 2
+    high = starts[present] + counts[present] // 2
+    medians[present] = (values[low] + values[high]) / 2
+    return medians
+
+
+def compute_cohort_stats(columns: CohortColumns) -> Dict[str, Any]:
+    """
+    Grouped aggregates in one vectorised pass
+    
+    Cohorts are the calendar days goals were set on.
+    
+    Args:
+        columns: Loaded columns
+    
+    Returns:
+        Dict with participants, completed, completion_rate, score_quantiles,
+        hours_quantiles (QUANTILES -> value), hours_histogram (counts per
+        HOURS_BINS bucket) and days (list of per-day dicts with date,
+        goals, completed, completion_rate, median)
+    """
+    assessed = ~np.isnan(columns.final_percent)
+    participants = len(columns)
+    completed = int(assessed.sum())
+    
+    scores = columns.final_percent[assessed]
+    score_quantiles = np.percentile(scores, QUANTILES) if completed else [None] * len(QUANTILES)
+    
+    # Time between goal and assessment
+    timed = assessed & ~np.isnat(columns.goal_at) & ~np.isnat(columns.final_at)
+    hours = (columns.final_at[timed] - columns.goal_at[timed]).astype(np.float64) / 3600
+    hours = hours[hours >= 0]
+    hours_quantiles = np.percentile(hours, QUANTILES) if len(hours) else [None] * len(QUANTILES)
+    hours_histogram, _ = np.histogram(hours, bins=HOURS_BINS)
+    
+    # Per-day cohorts
+    dated = ~np.isnat(columns.goal_at)
+    days, groups = np.unique(columns.goal_at[dated].astype("datetime64[D]"), return_inverse=True)
+    groups = groups.ravel()
+    goals_per_day = np.bincount(groups, minlength=len(days))
+    done = assessed[dated]
+    completed_per_day = np.bincount(groups, weights=done, minlength=len(days))
+    medians = _group_medians(groups[done], columns.final_percent[dated][done], len(days))
+    
+    return {
+        'participants': participants,
+        'completed': completed,
+        'completion_rate': completed / participants if participants else 0.0,
+        'score_quantiles': {q: _scalar(v) for q, v in zip(QUANTILES, score_quantiles)},
+        'hours_quantiles': {q: _scalar(v) for q, v in zip(QUANTILES, hours_quantiles)},
+        'hours_histogram': [int(count) for count in hours_histogram],
+        'days': [
+            {
+                'date': str(day),
+                'goals': int(goals),
+                'completed': int(done_count),
+                'completion_rate': float(done_count / goals) if goals else 0.0,
+                'median': _scalar(median),
+            }
+            for day, goals, done_count, median in zip(days, goals_per_day, completed_per_day, medians)
+        ],
+    }
+
+
+def _scalar(value: Any) -> Any:
+    """NumPy scalar to float rounded for reports (None for missing values)"""
+    if value is None or np.isnan(value):
+        return None
+    return round(float(value), 1)
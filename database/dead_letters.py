@@ -0,0 +1,133 @@
+"""
+Dead-letter store for writes that cannot be delivered to Google Sheets
+Keeps them on disk instead of retrying them forever
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+from config.settings import settings
+from utils.logger import logger
+from utils.metrics import metrics
+
+
+DEAD_LETTERS = metrics.counter(
+    "write_dead_letters_total", "Writes set aside as undeliverable", ("shard", "kind")
+)
+
+
+class DeadLetteredError(Exception):
+    """Set on a write's future once the write was moved to the dead-letter store"""
+
+
+class DeadLetterStore:
+    """
+    Undeliverable writes in a local SQLite file (WAL mode)
+    
+    A write lands here when Sheets rejects it for good (a bad range, a
+    deleted worksheet) or after WRITE_QUEUE_MAX_ATTEMPTS failed flushes.
+    Nothing is deleted automatically, the records can be inspected and
+    written by hand.
+    """
+    
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path: SQLite database file
+        """
+        path = path or settings.DEAD_LETTER_DB_PATH
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS dead_letters (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                shard TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                error TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        
+        logger.info(f"✅ Dead-letter store opened: {path}")
+    
+    def add(self, shard: str, kind: str, payload: Dict[str, Any], error: str, attempts: int) -> None:
+        """
+        Set a write aside
+        
+        Args:
+            shard: Cohort shard the write was meant for
+            kind: "goal", "assessment" or "goal_revision"
+            payload: The write itself (JSON-serialisable)
+            error: Why it was given up
+            attempts: Failed flushes so far
+        """
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO dead_letters (shard, kind, payload, error, attempts, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (shard, kind, json.dumps(payload, ensure_ascii=False), error, attempts, now)
+            )
+        
+        DEAD_LETTERS.inc(shard=shard, kind=kind)
+        logger.error(f"❌ Undeliverable {kind} for {shard} moved to the dead-letter store after {attempts} attempts: {error}")
+    
+    def list(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Oldest dead-lettered writes first
+        
+        Args:
+            limit: Max number of records
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, shard, kind, payload, error, attempts, created_at FROM dead_letters ORDER BY id LIMIT ?",
+                (limit,)
+            ).fetchall()
+        
+        return [
+            {
+                "id": row_id, "shard": shard, "kind": kind, "payload": json.loads(payload),
+                "error": error, "attempts": attempts, "created_at": created_at,
+            }
+            for row_id, shard, kind, payload, error, attempts, created_at in rows
+        ]
+    
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM dead_letters").fetchone()[0]
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# Lazy initialization of dead-letter store
+_store_instance = None
+
+
+def get_dead_letters() -> DeadLetterStore:
+    """Get or create dead-letter store instance (lazy initialization)"""
+    global _store_instance
+    if _store_instance is None:
+        _store_instance = DeadLetterStore()
+    return _store_instance
+
+
+def close_dead_letters() -> None:
+    """Close the dead-letter store if it was opened"""
+    global _store_instance
+    if _store_instance is not None:
+        _store_instance.close()
+        _store_instance = None
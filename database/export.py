@@ -0,0 +1,205 @@
+"""
+Streaming export of the UserData worksheet
+Pages through fixed-size A:D ranges, so memory does not grow with the sheet
+
+Usage:
+    python -m database.export --format csv --output userdata.csv
+    python -m database.export --format jsonl --output userdata.jsonl --start-row 50002
+    python -m database.export --shard spring --output spring.csv
+"""
+import argparse
+import asyncio
+import csv
+import json
+import sys
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from config.settings import settings
+from database.mirror import FIRST_DATA_ROW
+from database.sharding import get_router
+from database.sheets import SheetsDatabase
+from utils.logger import logger
+
+
+FIELDS = ["row_number", "goal_text", "goal_date", "final_percent", "final_date"]
+FORMATS = ("csv", "jsonl", "parquet")
+
+
+async def iter_user_data(
+    db: SheetsDatabase,
+    start_row: int = FIRST_DATA_ROW,
+    page_size: int = None
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Yield UserData rows page by page
+    
+    Args:
+        db: Database to read from
+        start_row: First sheet row to export (resume point)
+        page_size: Rows per Sheets request
+    
+    Yields:
+        Lists of row dicts (keys as in FIELDS), one list per page
+    """
+    page_size = page_size or settings.EXPORT_PAGE_SIZE
+    row_number = max(start_row, FIRST_DATA_ROW)
+    
+    while True:
+        last_row = row_number + page_size - 1
+        values = await db.read_user_data_range(f"A{row_number}:D{last_row}")
+        
+        page = []
+        for offset, cells in enumerate(values):
+            cells = list(cells) + [""] * (4 - len(cells))
+            if not any(cells):
+                continue
+            page.append({
+                "row_number": row_number + offset,
+                "goal_text": cells[0],
+                "goal_date": cells[1],
+                "final_percent": int(cells[2]) if cells[2].isdigit() else None,
+                "final_date": cells[3],
+            })
+        
+        if page:
+            yield page
+        
+        # Sheets trims trailing empty rows, a short page is the last one
+        if len(values) < page_size:
+            return
+        row_number = last_row + 1
+
+
+class _CsvWriter:
+    def __init__(self, path: str, append: bool):
+        self._file = open(path, "a" if append else "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=FIELDS)
+        if not append or self._file.tell() == 0:
+            self._writer.writeheader()
+    
+    def write(self, page: List[Dict[str, Any]]) -> None:
+        self._writer.writerows(page)
+        self._file.flush()
+    
+    def close(self) -> None:
+        self._file.close()
+
+
+class _JsonlWriter:
+    def __init__(self, path: str, append: bool):
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+    
+    def write(self, page: List[Dict[str, Any]]) -> None:
+        self._file.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in page)
+        self._file.flush()
+    
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ParquetWriter:
+    """One row group per page (needs pyarrow; a resumed export starts a new file)"""
+    
+    def __init__(self, path: str, append: bool):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+        
+        self._pa = pa
+        self._schema = pa.schema([
+            ("row_number", pa.int64()),
+            ("goal_text", pa.string()),
+            ("goal_date", pa.string()),
+            ("final_percent", pa.int64()),
+            ("final_date", pa.string()),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+    
+    def write(self, page: List[Dict[str, Any]]) -> None:
+        self._writer.write_table(self._pa.Table.from_pylist(page, schema=self._schema))
+    
+    def close(self) -> None:
+        self._writer.close()
+
+
+_WRITERS = {"csv": _CsvWriter, "jsonl": _JsonlWriter, "parquet": _ParquetWriter}
+
+
+async def export_user_data(
+    output: str,
+    fmt: str = "csv",
+    start_row: int = FIRST_DATA_ROW,
+    page_size: int = None,
+    db: Optional[SheetsDatabase] = None,
+    shard: Optional[str] = None
+) -> int:
+    """
+    Export UserData to a file, one page in memory at a time
+    
+    CSV and JSONL exports resumed with start_row append to the output file.
+    
+    Args:
+        output: Output file path
+        fmt: "csv", "jsonl" or "parquet"
+        start_row: First sheet row to export
+        page_size: Rows per Sheets request
+        db: Database to read from (default: a new connection without the mirror)
+        shard: Cohort shard to export when db is not given (default: the default shard)
+    
+    Returns:
+        Last exported sheet row (resume with start_row = this + 1), or start_row - 1 if none
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    
+    own_db = db is None
+    if own_db:
+        db = await asyncio.to_thread(SheetsDatabase, False, get_router().get(shard))
+    
+    writer = _WRITERS[fmt](output, append=start_row > FIRST_DATA_ROW)
+    last_row = start_row - 1
+    exported = 0
+    
+    try:
+        async for page in iter_user_data(db, start_row, page_size):
+            writer.write(page)
+            last_row = page[-1]["row_number"]
+            exported += len(page)
+            logger.info(f"Exported {exported} rows (up to row {last_row})")
+    finally:
+        writer.close()
+        if own_db:
+            db.shutdown()
+    
+    logger.info(f"✅ Exported {exported} rows to {output}")
+    return last_row
+
+
+def main() -> None:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Export the UserData worksheet")
+    parser.add_argument("--format", choices=FORMATS, default="csv", help="Output format")
+    parser.add_argument("--output", required=True, help="Output file")
+    parser.add_argument(
+        "--start-row", type=int, default=FIRST_DATA_ROW,
+        help="First sheet row to export, to resume an interrupted export"
+    )
+    parser.add_argument("--page-size", type=int, default=None, help="Rows per Sheets request")
+    parser.add_argument("--shard", default=None, help="Cohort shard to export (see COHORT_SHARDS)")
+    args = parser.parse_args()
+    
+    try:
+        last_row = asyncio.run(
+            export_user_data(args.output, args.format, args.start_row, args.page_size, shard=args.shard)
+        )
+    except Exception as e:
+        logger.error(f"❌ Export failed: {e}")
+        sys.exit(1)
+    
+    print(f"Last exported row: {last_row} (resume with --start-row {last_row + 1})")
+
+
+if __name__ == "__main__":
+    main()
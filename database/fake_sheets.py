@@ -0,0 +1,371 @@
+"""
+In-process stand-in for the gspread surface used by SheetsDatabase
+Lets the bot, benchmarks and tests run without network or credentials
+
+Selected with SHEETS_BACKEND=fake. Supports per-call latency, random
+RATE_LIMIT_EXCEEDED errors and per-minute quota emulation, so batching,
+caching and retry behaviour can be measured offline.
+"""
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import gspread
+from gspread.cell import Cell
+
+from config.settings import settings
+
+
+# "A1", "C5:D5", "A2:D", optionally prefixed with a sheet name
+_A1_RE = re.compile(r"^(?:.*!)?([A-Z]+)(\d+)?(?::([A-Z]+)(\d+)?)?$")
+
+# Google applies quotas per minute, separately for reads and writes
+_READ_METHODS = {
+    "open_by_key", "worksheet", "fetch_sheet_metadata", "values_batch_get",
+    "get_all_values", "cell", "get", "get_values", "batch_get",
+}
+
+
+def _column_index(letters: str) -> int:
+    """Convert column letters to a 1-based index (A -> 1, AA -> 27)"""
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index
+
+
+def _column_letters(index: int) -> str:
+    """Convert a 1-based column index to letters (1 -> A, 27 -> AA)"""
+    letters = ""
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def _parse_range(a1_range: str) -> Tuple[int, int, Optional[int], int]:
+    """
+    Parse an A1 range
+    
+    Returns:
+        Tuple of (first_row, first_col, last_row or None if open-ended, last_col), 1-based
+    """
+    match = _A1_RE.match(a1_range)
+    if not match:
+        raise ValueError(f"Unsupported range: {a1_range}")
+    
+    first_col = _column_index(match.group(1))
+    first_row = int(match.group(2) or 1)
+    if match.group(3) is None:
+        return first_row, first_col, first_row, first_col
+    
+    last_col = _column_index(match.group(3))
+    last_row = int(match.group(4)) if match.group(4) else None
+    return first_row, first_col, last_row, last_col
+
+
+class FakeResponse:
+    """Minimal requests.Response look-alike for gspread.exceptions.APIError"""
+    
+    def __init__(self, status_code: int, message: str, status: str):
+        self.status_code = status_code
+        self._payload = {"error": {"code": status_code, "message": message, "status": status}}
+        self.text = json.dumps(self._payload)
+    
+    def json(self) -> Dict[str, Any]:
+        return self._payload
+
+
+class FakeBackend:
+    """
+    Shared state and fault injection for all fake spreadsheets
+    
+    Counts calls per method and emulates the per-minute read/write quota
+    with a sliding window.
+    """
+    
+    def __init__(
+        self,
+        latency: float = None,
+        rate_limit_probability: float = None,
+        quota_per_minute: int = None
+    ):
+        """
+        Args:
+            latency: Seconds each call takes
+            rate_limit_probability: Chance (0-1) of a random RATE_LIMIT_EXCEEDED error
+            quota_per_minute: Reads and writes allowed per minute each (0 = unlimited)
+        """
+        self.latency = settings.FAKE_SHEETS_LATENCY if latency is None else latency
+        self.rate_limit_probability = (
+            settings.FAKE_SHEETS_RATE_LIMIT_PROBABILITY
+            if rate_limit_probability is None else rate_limit_probability
+        )
+        self.quota_per_minute = (
+            settings.FAKE_SHEETS_QUOTA_PER_MINUTE if quota_per_minute is None else quota_per_minute
+        )
+        
+        self._lock = threading.Lock()
+        self._windows: Dict[str, deque] = {"read": deque(), "write": deque()}
+        self.spreadsheets: Dict[str, "FakeSpreadsheet"] = {}
+        
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+    
+    def call(self, method: str) -> None:
+        """Account for one API call, sleeping and raising like the real API would"""
+        kind = "read" if method in _READ_METHODS else "write"
+        
+        with self._lock:
+            self.calls[method] += 1
+            
+            if self.quota_per_minute:
+                now = time.monotonic()
+                window = self._windows[kind]
+                while window and now - window[0] >= 60:
+                    window.popleft()
+                
+                if len(window) >= self.quota_per_minute:
+                    self.errors["quota"] += 1
+                    raise self._rate_limit_error(kind)
+                window.append(now)
+            
+            injected = random.random() < self.rate_limit_probability
+            if injected:
+                self.errors["injected"] += 1
+        
+        if self.latency:
+            time.sleep(self.latency)
+        
+        if injected:
+            raise self._rate_limit_error(kind)
+    
+    @staticmethod
+    def _rate_limit_error(kind: str) -> gspread.exceptions.APIError:
+        return gspread.exceptions.APIError(FakeResponse(
+            429,
+            f"Quota exceeded for quota metric '{kind.capitalize()} requests' "
+            f"and limit '{kind.capitalize()} requests per minute per user' (RATE_LIMIT_EXCEEDED)",
+            "RESOURCE_EXHAUSTED"
+        ))
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Calls per method and injected/quota errors"""
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                "total_calls": sum(self.calls.values()),
+                "errors": dict(self.errors),
+            }
+    
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.errors.clear()
+
+
+class FakeWorksheet:
+    """A worksheet kept as a list of rows"""
+    
+    def __init__(self, backend: FakeBackend, title: str, rows: int = 1000, cols: int = 26, sheet_id: int = 0):
+        self._backend = backend
+        self._lock = threading.Lock()
+        self.id = sheet_id
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self._rows: List[List[Any]] = []
+    
+    @property
+    def properties(self) -> Dict[str, Any]:
+        """Worksheet properties as returned in spreadsheet metadata"""
+        return {
+            "sheetId": self.id,
+            "title": self.title,
+            "gridProperties": {"rowCount": self.row_count, "columnCount": self.col_count},
+        }
+    
+    def _used_rows(self) -> int:
+        """Number of rows up to the last non-empty one"""
+        count = len(self._rows)
+        while count and not any(cell not in ("", None) for cell in self._rows[count - 1]):
+            count -= 1
+        return count
+    
+    def _read(self, first_row: int, first_col: int, last_row: Optional[int], last_col: int) -> List[List[str]]:
+        """Formatted values of a range, trailing empty rows and cells trimmed like the API does"""
+        last_row = self._used_rows() if last_row is None else min(last_row, self._used_rows())
+        
+        values = []
+        for row in self._rows[first_row - 1:last_row]:
+            cells = ["" if cell is None else str(cell) for cell in row[first_col - 1:last_col]]
+            while cells and cells[-1] == "":
+                cells.pop()
+            values.append(cells)
+        
+        while values and not values[-1]:
+            values.pop()
+        return values
+    
+    def _write(self, first_row: int, first_col: int, values: List[List[Any]]) -> None:
+        for row_offset, row_values in enumerate(values):
+            row_index = first_row - 1 + row_offset
+            while len(self._rows) <= row_index:
+                self._rows.append([])
+            row = self._rows[row_index]
+            needed = first_col - 1 + len(row_values)
+            if len(row) < needed:
+                row.extend([""] * (needed - len(row)))
+            row[first_col - 1:needed] = row_values
+        
+        self.row_count = max(self.row_count, len(self._rows))
+    
+    def _append(self, rows: List[List[Any]]) -> Dict[str, Any]:
+        with self._lock:
+            first_row = self._used_rows() + 1
+            del self._rows[first_row - 1:]
+            self._write(first_row, 1, [list(row) for row in rows])
+            last_row = first_row + len(rows) - 1
+            width = max((len(row) for row in rows), default=1)
+        
+        last_col = _column_letters(width)
+        return {
+            "tableRange": f"{self.title}!A1:{last_col}{first_row - 1}",
+            "updates": {
+                "updatedRange": f"{self.title}!A{first_row}:{last_col}{last_row}",
+                "updatedRows": len(rows),
+            },
+        }
+    
+    def append_row(self, values: List[Any], **kwargs) -> Dict[str, Any]:
+        self._backend.call("append_row")
+        return self._append([values])
+    
+    def append_rows(self, values: List[List[Any]], **kwargs) -> Dict[str, Any]:
+        self._backend.call("append_rows")
+        return self._append(values)
+    
+    def get_all_values(self, **kwargs) -> List[List[str]]:
+        self._backend.call("get_all_values")
+        with self._lock:
+            return self._read(1, 1, None, self.col_count)
+    
+    def cell(self, row: int, col: int, **kwargs) -> Cell:
+        self._backend.call("cell")
+        with self._lock:
+            values = self._read(row, col, row, col)
+        return Cell(row, col, values[0][0] if values and values[0] else None)
+    
+    def get(self, range_name: str = None, **kwargs) -> List[List[str]]:
+        self._backend.call("get")
+        with self._lock:
+            return self._read(*_parse_range(range_name or "A1:Z"))
+    
+    def get_values(self, range_name: str = None, **kwargs) -> List[List[str]]:
+        self._backend.call("get_values")
+        with self._lock:
+            return self._read(*_parse_range(range_name or "A1:Z"))
+    
+    def batch_get(self, ranges: List[str], **kwargs) -> List[List[List[str]]]:
+        self._backend.call("batch_get")
+        with self._lock:
+            return [self._read(*_parse_range(a1_range)) for a1_range in ranges]
+    
+    def update(self, range_name: str, values: List[List[Any]] = None, **kwargs) -> Dict[str, Any]:
+        self._backend.call("update")
+        first_row, first_col, _, _ = _parse_range(range_name)
+        with self._lock:
+            self._write(first_row, first_col, values or [])
+        return {"updatedRange": f"{self.title}!{range_name}", "updatedRows": len(values or [])}
+    
+    def batch_update(self, data: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+        self._backend.call("batch_update")
+        with self._lock:
+            for item in data:
+                first_row, first_col, _, _ = _parse_range(item["range"])
+                self._write(first_row, first_col, item["values"])
+        return {"totalUpdatedRanges": len(data)}
+
+
+class FakeSpreadsheet:
+    """A spreadsheet holding fake worksheets by title"""
+    
+    def __init__(self, backend: FakeBackend, key: str):
+        self._backend = backend
+        self.id = key
+        self._worksheets: Dict[str, FakeWorksheet] = {}
+    
+    def worksheet(self, title: str) -> FakeWorksheet:
+        self._backend.call("worksheet")
+        if title not in self._worksheets:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return self._worksheets[title]
+    
+    def add_worksheet(self, title: str, rows: int, cols: int, **kwargs) -> FakeWorksheet:
+        self._backend.call("add_worksheet")
+        worksheet = FakeWorksheet(self._backend, title, rows, cols, sheet_id=len(self._worksheets))
+        self._worksheets[title] = worksheet
+        return worksheet
+    
+    def worksheets(self) -> List[FakeWorksheet]:
+        self._backend.call("fetch_sheet_metadata")
+        return list(self._worksheets.values())
+    
+    def fetch_sheet_metadata(self, **kwargs) -> Dict[str, Any]:
+        self._backend.call("fetch_sheet_metadata")
+        return {
+            "properties": {"title": self.id},
+            "sheets": [{"properties": worksheet.properties} for worksheet in self._worksheets.values()],
+        }
+    
+    def worksheet_from_properties(self, properties: Dict[str, Any]) -> FakeWorksheet:
+        """Worksheet by metadata properties, like gspread.Worksheet(spreadsheet, properties)"""
+        return self._worksheets[properties["title"]]
+    
+    def values_batch_get(self, ranges: List[str], **kwargs) -> Dict[str, Any]:
+        self._backend.call("values_batch_get")
+        value_ranges = []
+        for a1_range in ranges:
+            title, _, cells = a1_range.rpartition("!")
+            worksheet = self._worksheets.get(title.strip("'"))
+            if worksheet is None:
+                raise gspread.exceptions.APIError(FakeResponse(
+                    400, f"Unable to parse range: {a1_range}", "INVALID_ARGUMENT"
+                ))
+            with worksheet._lock:
+                values = worksheet._read(*_parse_range(cells))
+            value_range = {"range": a1_range, "majorDimension": "ROWS"}
+            if values:
+                value_range["values"] = values
+            value_ranges.append(value_range)
+        return {"spreadsheetId": self.id, "valueRanges": value_ranges}
+
+
+class FakeClient:
+    """Stand-in for gspread.Client (spreadsheets live as long as the backend)"""
+    
+    def __init__(self, backend: FakeBackend):
+        self.backend = backend
+    
+    def open_by_key(self, key: str) -> FakeSpreadsheet:
+        self.backend.call("open_by_key")
+        if key not in self.backend.spreadsheets:
+            self.backend.spreadsheets[key] = FakeSpreadsheet(self.backend, key)
+        return self.backend.spreadsheets[key]
+
+
+# Lazy initialization of fake backend
+_backend_instance = None
+
+
+def get_fake_backend() -> FakeBackend:
+    """Get or create the shared fake backend (lazy initialization)"""
+    global _backend_instance
+    if _backend_instance is None:
+        _backend_instance = FakeBackend()
+    return _backend_instance
@@ -0,0 +1,669 @@
+"""
+Local write-ahead journal for goals and assessments
+Records are made durable on local disk before the user is answered and
+replayed to Google Sheets in the background
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from database.dead_letters import DeadLetteredError, get_dead_letters
+from database.sharding import DEFAULT_SHARD, get_router
+from database.sheets import get_db_async
+from database.write_queue import get_write_queue
+from utils.logger import logger
+
+
+class JournalCheckpoint:
+    """
+    Drain progress of the journal, kept in SQLite next to it
+    
+    Stores the byte offset up to which records were written to Sheets,
+    the last sequence number, and the sheet row of every drained goal
+    (so assessments can reference goals by sequence number).
+    """
+    
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite database file
+        """
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint "
+            "(id INTEGER PRIMARY KEY CHECK (id = 1), offset INTEGER NOT NULL, last_seq INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS goal_rows (seq INTEGER PRIMARY KEY, row_number INTEGER NOT NULL)"
+        )
+        self._conn.execute("INSERT OR IGNORE INTO checkpoint (id, offset, last_seq) VALUES (1, 0, 0)")
+    
+    def load(self) -> Tuple[int, int]:
+        """
+        Returns:
+            Tuple of (offset, last_seq)
+        """
+        with self._lock:
+            return self._conn.execute("SELECT offset, last_seq FROM checkpoint WHERE id = 1").fetchone()
+    
+    def save(self, offset: int, last_seq: int) -> None:
+        """Persist drain progress"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE checkpoint SET offset = ?, last_seq = MAX(last_seq, ?) WHERE id = 1",
+                (offset, last_seq)
+            )
+    
+    def save_goal_rows(self, rows: Dict[int, int]) -> None:
+        """Remember sheet rows of drained goals (seq -> row_number)"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO goal_rows (seq, row_number) VALUES (?, ?)",
+                rows.items()
+            )
+    
+    def goal_rows(self, seqs: List[int]) -> Dict[int, int]:
+        """Look up sheet rows of drained goals"""
+        if not seqs:
+            return {}
+        
+        with self._lock:
+            placeholders = ",".join("?" * len(seqs))
+            return dict(self._conn.execute(
+                f"SELECT seq, row_number FROM goal_rows WHERE seq IN ({placeholders})",
+                seqs
+            ).fetchall())
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class WriteAheadJournal:
+    """
+    Append-only JSON-lines journal with group-commit fsync
+    
+    Concurrent appends within one commit window are written and fsynced
+    together, so one fsync covers a whole burst of participants. An
+    append returns only after its record is on disk.
+    """
+    
+    def __init__(self, directory: str = None, commit_interval: float = None):
+        """
+        Args:
+            directory: Directory for the journal and its checkpoint
+            commit_interval: Seconds to collect appends before one fsync
+        """
+        directory = Path(directory or settings.JOURNAL_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        
+        self.commit_interval = settings.JOURNAL_COMMIT_INTERVAL if commit_interval is None else commit_interval
+        self.path = directory / "journal.log"
+        self.checkpoint = JournalCheckpoint(str(directory / "checkpoint.db"))
+        
+        self._file = open(self.path, "ab")
+        self._recover()
+        
+        # (encoded record, future resolved once the record is durable)
+        self._pending: List[Tuple[bytes, asyncio.Future]] = []
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._has_pending: Optional[asyncio.Event] = None
+        self._committed: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        
+        logger.info(f"✅ Journal opened: {self.path} (next seq {self._next_seq})")
+    
+    def _recover(self) -> None:
+        """Drop a torn last record and find the next sequence number"""
+        offset, last_seq = self.checkpoint.load()
+        size = self.path.stat().st_size
+        
+        if offset > size:
+            # Journal was truncated after a full drain, before the checkpoint was reset
+            offset = 0
+            self.checkpoint.save(0, last_seq)
+        
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        
+        # A record without its newline was never acknowledged
+        complete = data[:data.rfind(b"\n") + 1]
+        if len(complete) < len(data):
+            logger.warning("⚠️ Dropping incomplete last journal record")
+            self._file.truncate(offset + len(complete))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        
+        for line in complete.splitlines():
+            last_seq = max(last_seq, json.loads(line)["seq"])
+        
+        self._next_seq = last_seq + 1
+        self.committed_size = offset + len(complete)
+        
+        # Records up to this seq were journaled by an earlier run
+        self.recovered_seq = last_seq
+    
+    def _ensure_started(self) -> None:
+        """Start the group-commit writer on the running event loop"""
+        if self._task is not None:
+            return
+        
+        self._write_lock = asyncio.Lock()
+        self._has_pending = asyncio.Event()
+        self._committed = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def append(self, record: Dict[str, Any]) -> int:
+        """
+        Append a record and wait until it is durable
+        
+        Args:
+            record: JSON-serialisable record (a 'seq' field is added)
+        
+        Returns:
+            Sequence number of the record
+        """
+        self._ensure_started()
+        
+        seq = self._next_seq
+        self._next_seq += 1
+        
+        line = json.dumps({"seq": seq, **record}, ensure_ascii=False).encode("utf-8") + b"\n"
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((line, future))
+        self._has_pending.set()
+        
+        await future
+        return seq
+    
+    async def append_goal(self, goal_text: str, shard: Optional[str] = None) -> int:
+        """
+        Journal a new anonymous goal
+        
+        Args:
+            goal_text: User's goal text
+            shard: Cohort shard the goal belongs to (None: the default shard)
+        
+        Returns:
+            Sequence number of the goal record
+        """
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return await self.append({"type": "goal", "goal_text": goal_text, "goal_date": now, "shard": shard})
+    
+    async def append_goal_revision(
+        self,
+        goal_seq: int,
+        row_number: Optional[int],
+        goal_text: str,
+        shard: Optional[str] = None
+    ) -> int:
+        """
+        Journal a new text for an earlier goal (a resubmission within the debounce window)
+        
+        Args:
+            goal_seq: Sequence number of the goal record
+            row_number: Sheet row of the goal, if already known
+            goal_text: New goal text
+            shard: Cohort shard of the goal (None: the default shard)
+        
+        Returns:
+            Sequence number of the revision record
+        """
+        return await self.append({
+            "type": "goal_revision",
+            "goal_seq": goal_seq,
+            "row_number": row_number,
+            "goal_text": goal_text,
+            "shard": shard,
+        })
+    
+    async def append_assessment(
+        self,
+        goal_seq: Optional[int],
+        row_number: Optional[int],
+        percent: int,
+        shard: Optional[str] = None
+    ) -> int:
+        """
+        Journal a final self-assessment
+        
+        Args:
+            goal_seq: Sequence number of the goal record
+            row_number: Sheet row of the goal, if already known
+            percent: Self-assessment percentage (0-100)
+            shard: Cohort shard of the goal (None: the default shard)
+        
+        Returns:
+            Sequence number of the assessment record
+        """
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return await self.append({
+            "type": "assessment",
+            "goal_seq": goal_seq,
+            "row_number": row_number,
+            "percent": percent,
+            "final_date": now,
+            "shard": shard,
+        })
+    
+    def _write_batch(self, data: bytes) -> None:
+        """Write and fsync one group commit (runs in a worker thread)"""
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+    
+    async def _run(self) -> None:
+        """Group-commit writer loop"""
+        while True:
+            await self._has_pending.wait()
+            
+            if self.commit_interval:
+                await asyncio.sleep(self.commit_interval)
+            
+            async with self._write_lock:
+                batch = self._pending
+                self._pending = []
+                self._has_pending.clear()
+                
+                data = b"".join(line for line, _ in batch)
+                try:
+                    await asyncio.to_thread(self._write_batch, data)
+                except Exception as e:
+                    logger.error(f"❌ Journal write failed: {e}")
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                
+                self.committed_size += len(data)
+            
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+            
+            self._committed.set()
+    
+    async def wait_for_records(self, offset: int, timeout: float) -> None:
+        """Wait until records beyond offset are committed or timeout passes"""
+        if self.committed_size > offset:
+            return
+        
+        if self._committed is None:
+            # Nothing appended by this process yet
+            await asyncio.sleep(timeout)
+            return
+        
+        self._committed.clear()
+        try:
+            await asyncio.wait_for(self._committed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+    
+    def read(self, offset: int, max_records: int) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Read committed records starting at a byte offset
+        
+        Returns:
+            Tuple of (records, offset after the last returned record)
+        """
+        records = []
+        
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            while len(records) < max_records and offset < self.committed_size:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break
+                records.append(json.loads(line))
+                offset += len(line)
+        
+        return records, offset
+    
+    async def truncate_if_drained(self, offset: int) -> bool:
+        """
+        Start the journal over once everything in it has been drained
+        
+        Returns:
+            True if the journal was truncated
+        """
+        if offset < settings.JOURNAL_MAX_BYTES or self._write_lock is None:
+            return False
+        
+        async with self._write_lock:
+            if offset != self.committed_size or self._pending:
+                return False
+            
+            await asyncio.to_thread(self._truncate)
+            self.committed_size = 0
+            return True
+    
+    def _truncate(self) -> None:
+        """Empty the journal file (runs in a worker thread)"""
+        self._file.truncate(0)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+    
+    async def close(self) -> None:
+        """Commit pending records and close the journal"""
+        if self._task is not None:
+            while self._pending:
+                await asyncio.sleep(self.commit_interval or 0.001)
+            
+            async with self._write_lock:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        
+        self._file.close()
+        self.checkpoint.close()
+
+
+class JournalDrainer:
+    """
+    Replays journal records to Google Sheets in the background
+    
+    Records are replayed in rounds, each shard's records in order. A
+    round normally waits for every shard, so records that arrive
+    meanwhile make the next round a large batch. A shard still busy
+    after JOURNAL_REPLAY_TIMEOUT (its spreadsheet is down) catches up on
+    its own and only holds back its own records. The checkpoint advances
+    in journal order, past the rounds every shard has finished.
+    
+    Records of a shard removed from COHORT_SHARDS are moved to the
+    dead-letter store, they are never written to another shard.
+    
+    Resumes from the checkpoint after a crash. A goal with a known row is
+    not written again. Goals journaled by an earlier run without a known
+    row may have been appended just before it stopped, they are looked up
+    in the sheet first, so replaying them does not duplicate rows.
+    """
+    
+    # Rounds read ahead of the checkpoint; reading pauses beyond this
+    # (only reached while a shard has been down for that many rounds)
+    MAX_ROUNDS_IN_FLIGHT = 64
+    
+    def __init__(self, journal: WriteAheadJournal, batch_size: int = None):
+        """
+        Args:
+            journal: Journal to drain
+            batch_size: Max records replayed per round
+        """
+        self.journal = journal
+        self.batch_size = batch_size or settings.JOURNAL_DRAIN_BATCH
+        self.offset, self.last_seq = journal.checkpoint.load()
+        self.offset = min(self.offset, journal.committed_size)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        
+        # Offset after the last record handed to a shard
+        self._read_offset = self.offset
+        # Rounds in journal order: (offset after the round, its last seq, one task per shard)
+        self._rounds: deque = deque()
+        # Shard name -> its latest replay task, the next one waits for it
+        self._shard_tails: Dict[str, asyncio.Task] = {}
+    
+    @property
+    def backlog_bytes(self) -> int:
+        """Journal bytes not yet written to Sheets"""
+        return self.journal.committed_size - self.offset
+    
+    def start(self) -> None:
+        """Start draining on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def stop(self, timeout: float = 30.0) -> None:
+        """
+        Stop draining once the rounds in flight finish (undrained records stay in the journal)
+        
+        Args:
+            timeout: Seconds to wait for the rounds in flight before cancelling them
+        """
+        if self._task is None:
+            return
+        
+        self._stopping = True
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            pass
+        self._task = None
+    
+    async def _run(self) -> None:
+        """Drainer loop"""
+        try:
+            while not self._stopping:
+                try:
+                    self._advance_checkpoint()
+                    
+                    if self.offset == self._read_offset and await self.journal.truncate_if_drained(self.offset):
+                        self.offset = self._read_offset = 0
+                        self.journal.checkpoint.save(0, self.last_seq)
+                    
+                    if len(self._rounds) >= self.MAX_ROUNDS_IN_FLIGHT:
+                        await asyncio.wait(self._rounds[0][2], timeout=1.0)
+                        continue
+                    
+                    records, next_offset = self.journal.read(self._read_offset, self.batch_size)
+                    if not records:
+                        await self._wait()
+                        continue
+                    
+                    waiting = self._start_round(records, next_offset)
+                    if waiting:
+                        await asyncio.wait(waiting, timeout=settings.JOURNAL_REPLAY_TIMEOUT)
+                    else:
+                        await asyncio.sleep(0)
+                
+                except Exception as e:
+                    logger.error(f"❌ Journal drain failed, retrying: {e}")
+                    await asyncio.sleep(settings.WRITE_QUEUE_FLUSH_INTERVAL)
+            
+            # Finish the rounds in flight, stop() bounds how long
+            while self._rounds:
+                await asyncio.wait(self._rounds[0][2])
+                if not self._advance_checkpoint():
+                    break
+        finally:
+            for _, _, tasks in self._rounds:
+                for task in tasks:
+                    task.cancel()
+            self._rounds.clear()
+            self._shard_tails.clear()
+            self._read_offset = self.offset
+    
+    def _start_round(self, records: List[Dict[str, Any]], next_offset: int) -> List[asyncio.Task]:
+        """
+        Hand a batch of records to their shards
+        
+        Returns:
+            Replay tasks of the shards that were not still busy with an earlier round
+        """
+        # Records journaled before sharding have no shard
+        router = get_router()
+        by_shard: Dict[str, List[Dict[str, Any]]] = {}
+        for r in records:
+            shard = r.get("shard") or DEFAULT_SHARD
+            if router.is_configured(shard):
+                by_shard.setdefault(shard, []).append(r)
+            else:
+                # Its row numbers mean nothing in any other shard's worksheet
+                get_dead_letters().add(shard, r["type"], r, f"Cohort shard '{shard}' is not configured", 0)
+        
+        loop = asyncio.get_running_loop()
+        tasks = []
+        waiting = []
+        for shard, shard_records in by_shard.items():
+            previous = self._shard_tails.get(shard)
+            task = loop.create_task(self._replay_after(previous, shard, shard_records))
+            self._shard_tails[shard] = task
+            tasks.append(task)
+            if previous is None or previous.done():
+                waiting.append(task)
+        
+        self._rounds.append((next_offset, records[-1]["seq"], tasks))
+        self._read_offset = next_offset
+        return waiting
+    
+    @staticmethod
+    def _succeeded(task: asyncio.Task) -> bool:
+        return task.done() and not task.cancelled() and task.exception() is None
+    
+    def _advance_checkpoint(self) -> bool:
+        """
+        Move the checkpoint past the rounds every shard has finished
+        
+        Returns:
+            True if the checkpoint moved
+        """
+        drained = 0
+        while self._rounds and all(self._succeeded(task) for task in self._rounds[0][2]):
+            self.offset, self.last_seq, _ = self._rounds.popleft()
+            drained += 1
+        
+        if drained:
+            self.journal.checkpoint.save(self.offset, self.last_seq)
+        return drained > 0
+    
+    async def _wait(self) -> None:
+        """Wait for new records or for the oldest round in flight to finish"""
+        waiter = asyncio.ensure_future(self.journal.wait_for_records(self._read_offset, timeout=1.0))
+        try:
+            await asyncio.wait(
+                {waiter, *(self._rounds[0][2] if self._rounds else ())},
+                return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            waiter.cancel()
+    
+    async def _replay_after(self, previous: Optional[asyncio.Task], shard: str, records: List[Dict[str, Any]]) -> None:
+        """Replay one shard's records once its previous round is done, retrying on errors"""
+        if previous is not None:
+            await asyncio.wait({previous})
+            # Only on stop: later records may reference the earlier ones
+            if not self._succeeded(previous):
+                raise RuntimeError(f"Earlier journal records of {shard} were not replayed")
+        
+        while True:
+            try:
+                await self._replay_shard(shard, records)
+                logger.info(f"✅ Drained {len(records)} journal records to Sheets ({shard})")
+                return
+            except Exception as e:
+                if self._stopping:
+                    raise
+                logger.error(f"❌ Journal replay for {shard} failed, retrying: {e}")
+                await asyncio.sleep(settings.WRITE_QUEUE_FLUSH_INTERVAL)
+    
+    async def _replay_shard(self, shard: str, records: List[Dict[str, Any]]) -> None:
+        """Write one shard's records through its write-behind queue"""
+        queue = get_write_queue(shard)
+        checkpoint = self.journal.checkpoint
+        
+        goals = [r for r in records if r["type"] == "goal"]
+        assessments = [r for r in records if r["type"] == "assessment"]
+        
+        # Latest text per goal; records are in journal order
+        revisions = {r["goal_seq"]: r for r in records if r["type"] == "goal_revision"}
+        
+        # Goals first, so assessments in the same batch can find their rows
+        known_rows = checkpoint.goal_rows([r["seq"] for r in goals])
+        new_goals = [r for r in goals if r["seq"] not in known_rows]
+        
+        # Goals of an earlier run may have been appended before it stopped
+        recovered = [r for r in new_goals if r["seq"] <= self.journal.recovered_seq]
+        if recovered:
+            db = await get_db_async(shard)
+            db.mark_goals_unconfirmed([(r["goal_text"], r["goal_date"]) for r in recovered])
+        
+        # A goal revised before it was written is written once, with its latest text
+        # (a recovered goal keeps its text, it is looked up by it)
+        for r in new_goals:
+            if r["seq"] <= self.journal.recovered_seq:
+                continue
+            revision = revisions.pop(r["seq"], None)
+            if revision is not None:
+                r["goal_text"] = revision["goal_text"]
+        
+        if new_goals:
+            row_numbers = await asyncio.gather(*[
+                queue.submit_goal(r["goal_text"], r["goal_date"]) for r in new_goals
+            ], return_exceptions=True)
+            self._raise_unless_dead_lettered(row_numbers)
+            checkpoint.save_goal_rows({
+                r["seq"]: row for r, row in zip(new_goals, row_numbers)
+                if not isinstance(row, BaseException)
+            })
+        
+        futures = []
+        
+        if revisions:
+            revision_rows = checkpoint.goal_rows([
+                seq for seq, r in revisions.items() if not r.get("row_number")
+            ])
+            for seq, r in revisions.items():
+                row_number = r.get("row_number") or revision_rows.get(seq)
+                if not row_number:
+                    logger.error(f"❌ No sheet row for journaled goal revision {r['seq']}, skipping")
+                    continue
+                futures.append(queue.submit_goal_revision(row_number, r["goal_text"]))
+        
+        if assessments:
+            goal_rows = checkpoint.goal_rows([
+                r["goal_seq"] for r in assessments
+                if not r.get("row_number") and r.get("goal_seq")
+            ])
+            
+            for r in assessments:
+                row_number = r.get("row_number") or goal_rows.get(r.get("goal_seq"))
+                if not row_number:
+                    logger.error(f"❌ No sheet row for journaled assessment {r['seq']}, skipping")
+                    continue
+                futures.append(queue.submit_assessment(row_number, r["percent"], r["final_date"]))
+        
+        self._raise_unless_dead_lettered(await asyncio.gather(*futures, return_exceptions=True))
+    
+    @staticmethod
+    def _raise_unless_dead_lettered(results: List[Any]) -> None:
+        """
+        Re-raise the first failed write, except writes moved to the dead-letter store
+        
+        Those are set aside for good and must not stop the replay. Records
+        that need the row of a dead-lettered goal are skipped later.
+        """
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, DeadLetteredError):
+                raise result
+
+
+# Lazy initialization of journal
+_journal_instance = None
+_drainer_instance = None
+
+
+def get_journal() -> WriteAheadJournal:
+    """Get or create journal instance (lazy initialization)"""
+    global _journal_instance
+    if _journal_instance is None:
+        _journal_instance = WriteAheadJournal()
+    return _journal_instance
+
+
+def get_drainer() -> JournalDrainer:
+    """Get or create journal drainer instance (lazy initialization)"""
+    global _drainer_instance
+    if _drainer_instance is None:
+        _drainer_instance = JournalDrainer(get_journal())
+    return _drainer_instance
@@ -0,0 +1,256 @@
+"""
+Local mirror of the UserData worksheet
+Serves reads from memory and keeps itself in sync with incremental reads
+"""
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utils.logger import logger
+
+
+# First data row of UserData (row 1 holds the headers)
+FIRST_DATA_ROW = 2
+
+# (row_number, goal_text, goal_date, final_percent, final_date)
+MirrorRow = Tuple[int, str, str, Optional[int], str]
+
+
+def _parse_percent(value: str) -> Optional[int]:
+    """Convert a final_percent cell to int (None if empty or not a number)"""
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class UserDataMirror:
+    """
+    Columnar in-memory copy of UserData (goal_text, goal_date, final_percent, final_date)
+    
+    Each column is a list indexed by sheet row minus FIRST_DATA_ROW. The
+    mirror is updated by the bot's own writes and reconciled with the sheet
+    by sync ranges: the rows after the last known row, plus the C:D cells of
+    rows that have no assessment yet (the only cells that still change).
+    """
+    
+    # Above this many open C:D ranges, refresh one span covering all of them
+    MAX_REFRESH_RANGES = 50
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.goal_text: List[str] = []
+        self.goal_date: List[str] = []
+        self.final_percent: List[Optional[int]] = []
+        self.final_date: List[str] = []
+        
+        # Last row confirmed by a sync (rows the bot appended later may have
+        # gaps if someone else appended in between, so they are re-read)
+        self._synced_row = FIRST_DATA_ROW - 1
+        
+        # Monotonic time of the last sync, None until the first one
+        self.synced_at: Optional[float] = None
+    
+    @property
+    def last_row(self) -> int:
+        """Last sheet row held by the mirror (1 if it has no data rows)"""
+        return FIRST_DATA_ROW + len(self.goal_text) - 1
+    
+    def __len__(self) -> int:
+        return len(self.goal_text)
+    
+    def _grow(self, row_number: int) -> int:
+        """Make room for a row and return its column index"""
+        index = row_number - FIRST_DATA_ROW
+        missing = index + 1 - len(self.goal_text)
+        if missing > 0:
+            self.goal_text.extend([""] * missing)
+            self.goal_date.extend([""] * missing)
+            self.final_percent.extend([None] * missing)
+            self.final_date.extend([""] * missing)
+        return index
+    
+    def get_row(self, row_number: int) -> Optional[Tuple[str, str, Optional[int], str]]:
+        """
+        Get a mirrored row
+        
+        Args:
+            row_number: Row number in the sheet
+        
+        Returns:
+            Tuple of (goal_text, goal_date, final_percent, final_date), or None if unknown
+        """
+        index = row_number - FIRST_DATA_ROW
+        with self._lock:
+            if index < 0 or index >= len(self.goal_text):
+                return None
+            return (
+                self.goal_text[index], self.goal_date[index],
+                self.final_percent[index], self.final_date[index]
+            )
+    
+    def get_goal(self, row_number: int) -> Optional[str]:
+        """
+        Get goal text of a mirrored row
+        
+        Returns:
+            Goal text, or None if the row is unknown or empty
+        """
+        row = self.get_row(row_number)
+        return row[0] or None if row else None
+    
+    def columns(self) -> Tuple[List[str], List[str], List[Optional[int]], List[str]]:
+        """
+        Consistent copy of all columns
+        
+        Returns:
+            Tuple of (goal_text, goal_date, final_percent, final_date) lists
+        """
+        with self._lock:
+            return (
+                list(self.goal_text), list(self.goal_date),
+                list(self.final_percent), list(self.final_date)
+            )
+    
+    def rows(self) -> Iterator[MirrorRow]:
+        """
+        Iterate over a consistent copy of all mirrored rows
+        
+        Yields:
+            Tuples of (row_number, goal_text, goal_date, final_percent, final_date)
+        """
+        for index, row in enumerate(zip(*self.columns())):
+            yield (index + FIRST_DATA_ROW, *row)
+    
+    def apply_goals(self, row_numbers: Sequence[int], rows: Sequence[Sequence[str]]) -> None:
+        """
+        Record goals the bot has appended
+        
+        Args:
+            row_numbers: Sheet rows of the goals
+            rows: Written values [goal_text, goal_date, ...], same order
+        """
+        with self._lock:
+            for row_number, values in zip(row_numbers, rows):
+                index = self._grow(row_number)
+                self.goal_text[index] = values[0]
+                self.goal_date[index] = values[1]
+    
+    def apply_goal_texts(self, texts: Dict[int, str]) -> None:
+        """
+        Record goal texts the bot has overwritten
+        
+        Args:
+            texts: Mapping of row_number -> goal_text
+        """
+        with self._lock:
+            for row_number, goal_text in texts.items():
+                self.goal_text[self._grow(row_number)] = goal_text
+    
+    def apply_assessments(self, assessments: Dict[int, Tuple[int, str]]) -> None:
+        """
+        Record assessments the bot has written
+        
+        Args:
+            assessments: Mapping of row_number -> (percent, final_date)
+        """
+        with self._lock:
+            for row_number, (percent, final_date) in assessments.items():
+                index = self._grow(row_number)
+                self.final_percent[index] = percent
+                self.final_date[index] = final_date
+    
+    def sync_ranges(self) -> List[str]:
+        """
+        A1 ranges to read for an incremental sync
+        
+        Returns:
+            Tail range first ("A{n}:D" after the last synced row), then
+            C:D ranges of rows without an assessment
+        """
+        with self._lock:
+            open_rows = [
+                index + FIRST_DATA_ROW
+                for index, percent in enumerate(self.final_percent)
+                if percent is None
+            ]
+            tail = f"A{self._synced_row + 1}:D"
+        
+        # Compress open rows into contiguous spans
+        spans: List[List[int]] = []
+        for row in open_rows:
+            if spans and spans[-1][1] == row - 1:
+                spans[-1][1] = row
+            else:
+                spans.append([row, row])
+        
+        if len(spans) > self.MAX_REFRESH_RANGES:
+            spans = [[spans[0][0], spans[-1][1]]]
+        
+        return [tail] + [f"C{first}:D{last}" for first, last in spans]
+    
+    def _row(self, index: int) -> MirrorRow:
+        return (
+            index + FIRST_DATA_ROW, self.goal_text[index], self.goal_date[index],
+            self.final_percent[index], self.final_date[index]
+        )
+    
+    def apply_sync(self, ranges: List[str], results: List[List[List[str]]]) -> Tuple[int, List[MirrorRow]]:
+        """
+        Merge values read for the ranges returned by sync_ranges
+        
+        Args:
+            ranges: Ranges as returned by sync_ranges
+            results: Values of each range, same order
+        
+        Returns:
+            Tuple of (number of rows read after the last synced row, rows
+            whose values changed, as (row_number, goal_text, goal_date,
+            final_percent, final_date) in row order)
+        """
+        changed: Dict[int, MirrorRow] = {}
+        
+        with self._lock:
+            tail_start = int(ranges[0][1:ranges[0].index(":")])
+            tail = list(results[0]) if results else []
+            
+            # Trailing empty rows are not part of the table
+            while tail and not any(tail[-1]):
+                tail.pop()
+            
+            for offset, values in enumerate(tail):
+                values = list(values) + [""] * (4 - len(values))
+                index = self._grow(tail_start + offset)
+                before = self._row(index)
+                self.goal_text[index] = values[0]
+                self.goal_date[index] = values[1]
+                self.final_percent[index] = _parse_percent(values[2])
+                self.final_date[index] = values[3]
+                if self._row(index) != before:
+                    changed[index] = self._row(index)
+            
+            if tail:
+                self._synced_row = tail_start + len(tail) - 1
+            
+            for a1_range, values in zip(ranges[1:], results[1:]):
+                first_row = int(a1_range[1:a1_range.index(":")])
+                for offset, cells in enumerate(values):
+                    index = first_row + offset - FIRST_DATA_ROW
+                    if index >= len(self.goal_text):
+                        break
+                    cells = list(cells) + [""] * (2 - len(cells))
+                    before = self._row(index)
+                    self.final_percent[index] = _parse_percent(cells[0])
+                    self.final_date[index] = cells[1]
+                    if self._row(index) != before:
+                        changed[index] = self._row(index)
+            
+            self.synced_at = time.monotonic()
+        
+        if tail:
+            logger.info(f"✅ Mirror synced {len(tail)} rows (up to row {self._synced_row})")
+        return len(tail), [changed[index] for index in sorted(changed)]
+    
+    def is_stale(self, max_age: float) -> bool:
+        """True if the mirror was never synced or the last sync is older than max_age seconds"""
+        return self.synced_at is None or time.monotonic() - self.synced_at > max_age
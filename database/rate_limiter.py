@@ -0,0 +1,138 @@
+"""
+Client-side quota enforcement for Google Sheets requests
+"""
+import asyncio
+import time
+from enum import IntEnum
+from typing import Dict
+
+from config.settings import settings
+from utils.rate_limit import TokenBucket
+
+
+class RequestPriority(IntEnum):
+    """Order in which waiting requests get quota (lower goes first)"""
+    USER = 0        # Writes and reads a participant is waiting for
+    BACKGROUND = 1  # Analytics, restore and export reads
+
+
+class SheetsRateLimiter:
+    """
+    Shared token buckets for Sheets read and write quotas
+    
+    Requests take a token before they are sent. When the bucket is empty
+    the caller waits, and background requests yield to user requests.
+    """
+    
+    READ = "read"
+    WRITE = "write"
+    
+    def __init__(self, read_per_minute: int = None, write_per_minute: int = None, burst: int = None):
+        """
+        Args:
+            read_per_minute: Read requests allowed per minute
+            write_per_minute: Write requests allowed per minute
+            burst: Requests that may be sent back-to-back
+        """
+        read_per_minute = read_per_minute or settings.SHEETS_READ_QUOTA_PER_MINUTE
+        write_per_minute = write_per_minute or settings.SHEETS_WRITE_QUOTA_PER_MINUTE
+        burst = burst or settings.SHEETS_QUOTA_BURST
+        
+        self._buckets: Dict[str, TokenBucket] = {
+            self.READ: TokenBucket(read_per_minute / 60, burst),
+            self.WRITE: TokenBucket(write_per_minute / 60, burst),
+        }
+        
+        # kind -> priority -> number of waiting requests
+        self._waiting: Dict[str, Dict[RequestPriority, int]] = {
+            kind: {priority: 0 for priority in RequestPriority} for kind in self._buckets
+        }
+        
+        self.stats: Dict[str, int] = {
+            "requests": 0,
+            "throttled": 0,
+            "retried": 0,
+            "rate_limited": 0,
+        }
+    
+    def _higher_priority_waiting(self, kind: str, priority: RequestPriority) -> bool:
+        """Check if a more urgent request is waiting for the same bucket"""
+        return any(
+            count for waiting_priority, count in self._waiting[kind].items()
+            if waiting_priority < priority
+        )
+    
+    async def acquire(self, kind: str, priority: RequestPriority = RequestPriority.USER) -> None:
+        """
+        Wait until a request of the given kind may be sent
+        
+        Args:
+            kind: READ or WRITE
+            priority: Request priority
+        """
+        bucket = self._buckets[kind]
+        self._waiting[kind][priority] += 1
+        throttled = False
+        
+        try:
+            while True:
+                if self._higher_priority_waiting(kind, priority):
+                    wait_time = 1 / bucket.rate
+                else:
+                    wait_time = bucket.try_acquire()
+                    if wait_time == 0:
+                        self.stats["requests"] += 1
+                        return
+                
+                if not throttled:
+                    self.stats["throttled"] += 1
+                    throttled = True
+                
+                await asyncio.sleep(wait_time)
+        finally:
+            self._waiting[kind][priority] -= 1
+    
+    def acquire_blocking(self, kind: str) -> None:
+        """
+        Blocking variant of acquire for synchronous startup code
+        
+        Args:
+            kind: READ or WRITE
+        """
+        bucket = self._buckets[kind]
+        throttled = False
+        
+        while True:
+            wait_time = bucket.try_acquire()
+            if wait_time == 0:
+                self.stats["requests"] += 1
+                return
+            
+            if not throttled:
+                self.stats["throttled"] += 1
+                throttled = True
+            
+            time.sleep(wait_time)
+    
+    def record_retry(self, rate_limited: bool) -> None:
+        """
+        Count a retried request
+        
+        Args:
+            rate_limited: True if the server rejected it with a quota error
+        """
+        self.stats["retried"] += 1
+        if rate_limited:
+            self.stats["rate_limited"] += 1
+
+
+# Lazy initialization of rate limiter
+_limiter_instance = None
+
+
+def get_rate_limiter() -> SheetsRateLimiter:
+    """Get or create the shared rate limiter (lazy initialization)"""
+    global _limiter_instance
+    if _limiter_instance is None:
+        _limiter_instance = SheetsRateLimiter()
+    return _limiter_instance
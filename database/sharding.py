@@ -0,0 +1,189 @@
+"""
+Cohort sharding of participant data
+Maps each cohort to its own worksheets, in the main or a separate spreadsheet
+"""
+import json
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import settings
+
+
+DEFAULT_SHARD = "default"
+
+# Telegram deep-link payloads: up to 64 characters A-Z, a-z, 0-9, _ and -
+_PAYLOAD_RE = re.compile(r'[A-Za-z0-9_-]{1,64}')
+
+
+class UnknownShardError(Exception):
+    """Raised for a cohort shard that is not (or no longer) configured"""
+
+
+@dataclass(frozen=True)
+class CohortShard:
+    """Where one cohort's data lives and how participants are routed to it"""
+    name: str
+    spreadsheet_id: str
+    user_data_title: str = "UserData"
+    analytics_title: str = "Analytics"
+    payloads: Tuple[str, ...] = ()
+    start: Optional[date] = None
+    end: Optional[date] = None
+    
+    @property
+    def titles(self) -> Tuple[str, str]:
+        """Worksheet titles (UserData, Analytics)"""
+        return self.user_data_title, self.analytics_title
+    
+    def covers(self, day: date) -> bool:
+        """True if the cohort's date range includes the day"""
+        if self.start is None and self.end is None:
+            return False
+        return (self.start is None or self.start <= day) and (self.end is None or day <= self.end)
+
+
+def parse_shards(raw: str, spreadsheet_id: str) -> List[CohortShard]:
+    """
+    Parse the COHORT_SHARDS setting
+    
+    A JSON list of objects with "name" and optionally "spreadsheet_id",
+    "worksheet", "analytics_worksheet", "payload" (string or list) and
+    "from"/"to" (inclusive ISO dates). Shards in the main spreadsheet get
+    "UserData_<name>" and "Analytics_<name>" worksheets by default.
+    
+    Args:
+        raw: Setting value (empty for no extra shards)
+        spreadsheet_id: Main spreadsheet, used by the default shard
+    
+    Returns:
+        The default shard followed by the configured ones
+    
+    Raises:
+        ValueError: If the setting is malformed or two shards share a worksheet
+    """
+    shards = {DEFAULT_SHARD: CohortShard(DEFAULT_SHARD, spreadsheet_id)}
+    if not raw.strip():
+        return list(shards.values())
+    
+    try:
+        entries = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"COHORT_SHARDS is not valid JSON: {e}")
+    if not isinstance(entries, list):
+        raise ValueError("COHORT_SHARDS must be a JSON list of shard objects")
+    
+    for entry in entries:
+        if not isinstance(entry, dict) or not _PAYLOAD_RE.fullmatch(str(entry.get("name", ""))):
+            raise ValueError(f"Every cohort shard needs a name (A-Z, a-z, 0-9, _ and -): {entry}")
+        
+        name = entry["name"]
+        shard_spreadsheet = entry.get("spreadsheet_id") or spreadsheet_id
+        suffix = "" if shard_spreadsheet != spreadsheet_id or name == DEFAULT_SHARD else f"_{name}"
+        
+        payloads = entry.get("payload", [])
+        payloads = (payloads,) if isinstance(payloads, str) else tuple(payloads)
+        for payload in payloads:
+            if not _PAYLOAD_RE.fullmatch(payload):
+                raise ValueError(f"Invalid deep-link payload '{payload}' for cohort shard '{name}'")
+        
+        try:
+            start = date.fromisoformat(entry["from"]) if entry.get("from") else None
+            end = date.fromisoformat(entry["to"]) if entry.get("to") else None
+        except ValueError as e:
+            raise ValueError(f"Invalid date range for cohort shard '{name}': {e}")
+        
+        shards[name] = CohortShard(
+            name=name,
+            spreadsheet_id=shard_spreadsheet,
+            user_data_title=entry.get("worksheet") or f"UserData{suffix}",
+            analytics_title=entry.get("analytics_worksheet") or f"Analytics{suffix}",
+            payloads=payloads,
+            start=start,
+            end=end
+        )
+    
+    # Row numbers are per worksheet, two shards must never write to the same one
+    seen: Dict[Tuple[str, str], str] = {}
+    for shard in shards.values():
+        for title in shard.titles:
+            owner = seen.setdefault((shard.spreadsheet_id, title), shard.name)
+            if owner != shard.name:
+                raise ValueError(f"Cohort shards '{owner}' and '{shard.name}' share the worksheet '{title}'")
+    
+    return list(shards.values())
+
+
+class ShardRouter:
+    """
+    Picks the shard for a participant
+    
+    A /start deep-link payload (t.me/<bot>?start=<payload>) wins, then
+    the shard whose date range covers today, then the default shard.
+    """
+    
+    def __init__(self, shards: List[CohortShard]):
+        """
+        Args:
+            shards: All shards, including the default one
+        """
+        self.shards: Dict[str, CohortShard] = {shard.name: shard for shard in shards}
+        self._by_payload: Dict[str, CohortShard] = {
+            payload: shard for shard in shards for payload in shard.payloads
+        }
+    
+    def names(self) -> List[str]:
+        return list(self.shards)
+    
+    def is_configured(self, name: Optional[str]) -> bool:
+        """True if the shard exists (None means the default shard)"""
+        return (name or DEFAULT_SHARD) in self.shards
+    
+    def get(self, name: Optional[str]) -> CohortShard:
+        """
+        Shard by name (None means the default shard)
+        
+        Row numbers are per shard, so a shard removed from COHORT_SHARDS is
+        never mapped to another one.
+        
+        Raises:
+            UnknownShardError: If the shard is not configured
+        """
+        shard = self.shards.get(name or DEFAULT_SHARD)
+        if shard is None:
+            raise UnknownShardError(f"Cohort shard '{name}' is not configured")
+        return shard
+    
+    def resolve(self, payload: Optional[str] = None, day: Optional[date] = None) -> CohortShard:
+        """
+        Route a participant to a shard
+        
+        Args:
+            payload: /start deep-link payload, if any
+            day: Day to route by date range (default: today)
+        
+        Returns:
+            The participant's shard
+        """
+        if payload and payload in self._by_payload:
+            return self._by_payload[payload]
+        
+        day = day or date.today()
+        for shard in self.shards.values():
+            if shard.covers(day):
+                return shard
+        
+        return self.shards[DEFAULT_SHARD]
+
+
+# Lazy initialization of shard router
+_router_instance = None
+
+
+def get_router() -> ShardRouter:
+    """Get or create shard router instance (lazy initialization)"""
+    global _router_instance
+    if _router_instance is None:
+        _router_instance = ShardRouter(parse_shards(settings.COHORT_SHARDS, settings.SPREADSHEET_ID))
+    return _router_instance
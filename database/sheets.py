@@ -2,86 +2,441 @@
 Google Sheets database integration
 Handles all data storage and retrieval
 """
+import asyncio
+import json
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from functools import partial
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
 
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+# gspread and google-auth are imported on first connect, they are slow to
+# import and not needed before the bot starts accepting updates
 
 from config.settings import settings
+from database.analytics import AnalyticsAggregator
+from database.mirror import FIRST_DATA_ROW, UserDataMirror
+from database.rate_limiter import RequestPriority, SheetsRateLimiter, get_rate_limiter
+from database.sharding import DEFAULT_SHARD, CohortShard, get_router
+from utils.cache import ReadThroughCache
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
 from utils.logger import logger
+from utils.metrics import metrics
+from utils.rate_limit import backoff_with_jitter
 from utils.validators import escape_for_sheets
 from bot.states import UserState
 
 
+# Matches the row span of an A1 range such as "UserData!A5:D5" or "'User Data'!A5:D9"
+_UPDATED_RANGE_RE = re.compile(r'![A-Z]+(\d+)(?::[A-Z]+(\d+))?$')
+
+SHEETS_REQUEST_SECONDS = metrics.histogram(
+    "sheets_request_duration_seconds", "Google Sheets request latency per attempt", ("method", "outcome")
+)
+SHEETS_RETRIES = metrics.counter("sheets_retries_total", "Retried Google Sheets requests", ("method", "reason"))
+SHEETS_SHARD_REQUESTS = metrics.counter(
+    "sheets_shard_requests_total", "Google Sheets request attempts per cohort shard", ("shard", "kind")
+)
+
+
+def parse_updated_rows(response: Optional[Dict[str, Any]]) -> Optional[Tuple[int, int]]:
+    """
+    Extract the first and last row touched by a values.append call
+    
+    Args:
+        response: Raw API response returned by append_row / append_rows
+        
+    Returns:
+        Tuple of (first_row, last_row), or None if the response has no range
+    """
+    if not response:
+        return None
+    
+    updated_range = response.get('updates', {}).get('updatedRange', '')
+    match = _UPDATED_RANGE_RE.search(updated_range)
+    if not match:
+        return None
+    
+    first_row = int(match.group(1))
+    last_row = int(match.group(2) or first_row)
+    return first_row, last_row
+
+
+class PermanentWriteError(Exception):
+    """A write Sheets rejected for good (bad range, deleted worksheet), retrying it cannot help"""
+
+
 class SheetsDatabase:
-    """Manages Google Sheets as database"""
+    """
+    Manages Google Sheets as database
     
-    def __init__(self):
-        """Initialize connection to Google Sheets"""
-        scope = [
-            'https://spreadsheets.google.com/feeds',
-            'https://www.googleapis.com/auth/drive'
-        ]
+    Connection setup is synchronous. All data methods are coroutines that
+    run the blocking gspread calls on a bounded thread pool, so a slow
+    Sheets request never blocks the event loop. Every request takes a
+    token from the shared SheetsRateLimiter before it is sent.
+    """
+    
+    def __init__(self, load_mirror: bool = True, shard: Optional[CohortShard] = None):
+        """
+        Initialize connection to Google Sheets
+        
+        Args:
+            load_mirror: Load the UserData mirror (off for one-off tools like the export)
+            shard: Cohort shard whose worksheets to use (default: the main UserData/Analytics)
+        """
+        self.shard = shard or get_router().get(DEFAULT_SHARD)
+        
+        # Last known data row, kept in sync with every append response
+        self._last_row: int = 0
+        
+        # Local copy of UserData, point reads are served from here
+        self.mirror = UserDataMirror()
+        self._mirror_sync: Optional[asyncio.Future] = None
+        
+        # Running cohort statistics for the Analytics sheet
+        self.analytics = AnalyticsAggregator()
+        
+        # Point reads, kept up to date by our own writes
+        self.read_cache = ReadThroughCache(settings.READ_CACHE_MAX_SIZE, settings.READ_CACHE_TTL)
+        
+        # (goal_text, goal_date) of goals whose append failed without a reliable answer
+        # -> last row before that append; they are looked up before being appended again
+        self._unconfirmed_goals: Dict[Tuple[str, str], int] = {}
+        
+        # Shared client-side quota for all Sheets requests (one service account for all shards)
+        self._limiter = get_rate_limiter()
         
-        creds = ServiceAccountCredentials.from_json_keyfile_name(
-            settings.CREDENTIALS_PATH,
-            scope
+        # Fails calls fast while this shard's spreadsheet is down or too slow
+        self.breaker = CircuitBreaker(
+            "Google Sheets" if self.shard.name == DEFAULT_SHARD else f"Google Sheets ({self.shard.name})",
+            window=settings.SHEETS_BREAKER_WINDOW,
+            min_calls=settings.SHEETS_BREAKER_MIN_CALLS,
+            failure_rate=settings.SHEETS_BREAKER_FAILURE_RATE,
+            slow_call_seconds=settings.SHEETS_BREAKER_SLOW_CALL_SECONDS,
+            open_seconds=settings.SHEETS_BREAKER_OPEN_SECONDS
         )
         
-        client = gspread.authorize(creds)
-        self.spreadsheet = client.open_by_key(settings.SPREADSHEET_ID)
+        # Bounded pool for blocking gspread calls, per shard so a slow one cannot starve the others
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.SHEETS_MAX_WORKERS,
+            thread_name_prefix=f"sheets-{self.shard.name}"
+        )
+        
+        started = time.perf_counter()
+        self.spreadsheet = self._open_spreadsheet()
         
-        # Get or create worksheets
-        self.user_data_sheet = self._get_or_create_worksheet("UserData")
-        self.analytics_sheet = self._get_or_create_worksheet("Analytics")
+        # Get or create worksheets (layout cached on disk, else one metadata request)
+        worksheets, from_cache = self._load_worksheets()
         
-        # Initialize headers if sheets are new
-        if self.user_data_sheet.row_count == 0 or not self.user_data_sheet.get('A1'):
+        # Initialize headers if sheets are new (both probed in one request)
+        try:
+            has_headers = self._probe_headers(worksheets)
+        except Exception as e:
+            if not from_cache:
+                raise
+            logger.warning(f"⚠️ Cached worksheet layout is stale, reloading: {e}")
+            worksheets, _ = self._load_worksheets(use_cache=False)
+            has_headers = self._probe_headers(worksheets)
+        
+        self.user_data_sheet = worksheets[self.shard.user_data_title]
+        self.analytics_sheet = worksheets[self.shard.analytics_title]
+        
+        if not has_headers[self.shard.user_data_title]:
             self._initialize_user_data_headers()
         
-        if self.analytics_sheet.row_count == 0 or not self.analytics_sheet.get('A1'):
+        if not has_headers[self.shard.analytics_title]:
             self._initialize_analytics_sheet()
         
-        logger.info("✅ Successfully connected to Google Sheets")
+        # Load the mirror once, later syncs only read what may have changed
+        if load_mirror:
+            self._load_mirror()
+        
+        logger.info(
+            f"✅ Successfully connected to Google Sheets ({self.shard.name}: {self.shard.user_data_title}) "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+    
+    def _open_spreadsheet(self):
+        """Authorize and open the spreadsheet"""
+        if settings.SHEETS_BACKEND == "fake":
+            from database.fake_sheets import FakeClient, get_fake_backend
+            
+            client = FakeClient(get_fake_backend())
+            logger.warning("⚠️ Using the in-process fake Google Sheets backend")
+        else:
+            from database.sheets_transport import get_sheets_transport
+            
+            # Pooled keep-alive session with timeouts and background token refresh, shared by all shards
+            client = get_sheets_transport().client()
+        
+        return client.open_by_key(self.shard.spreadsheet_id)
+    
+    def _worksheet(self, properties: Dict[str, Any]):
+        """Worksheet handle from its metadata properties (no request)"""
+        if settings.SHEETS_BACKEND == "fake":
+            return self.spreadsheet.worksheet_from_properties(properties)
+        
+        import gspread
+        return gspread.Worksheet(self.spreadsheet, properties)
+    
+    def _load_worksheets(self, use_cache: bool = True) -> Tuple[Dict[str, Any], bool]:
+        """
+        Get or create the bot's worksheets
+        
+        Their properties are cached in SHEETS_METADATA_CACHE (one file per
+        shard), so a restart needs no metadata request. The fake backend
+        lives in memory and is never cached.
+        
+        Args:
+            use_cache: Use the cached layout if there is one
+        
+        Returns:
+            Tuple of (title -> worksheet, True if taken from the cache)
+        """
+        titles = self.shard.titles
+        cache_path = Path(settings.SHEETS_METADATA_CACHE)
+        if self.shard.name != DEFAULT_SHARD:
+            cache_path = cache_path.with_name(f"{cache_path.stem}.{self.shard.name}{cache_path.suffix}")
+        cacheable = settings.SHEETS_BACKEND != "fake"
+        
+        if use_cache and cacheable:
+            try:
+                cached = json.loads(cache_path.read_text(encoding='utf-8'))
+                if cached.get('spreadsheet_id') == self.shard.spreadsheet_id and all(
+                    title in cached['sheets'] for title in titles
+                ):
+                    return {
+                        title: self._worksheet(cached['sheets'][title]) for title in titles
+                    }, True
+            except (OSError, ValueError, KeyError):
+                pass
+        
+        metadata = self._call_blocking(SheetsRateLimiter.READ, self.spreadsheet.fetch_sheet_metadata)
+        properties = {sheet['properties']['title']: sheet['properties'] for sheet in metadata['sheets']}
+        
+        worksheets = {}
+        for title in titles:
+            if title in properties:
+                worksheets[title] = self._worksheet(properties[title])
+            else:
+                worksheets[title] = self._call_blocking(
+                    SheetsRateLimiter.WRITE,
+                    self.spreadsheet.add_worksheet,
+                    title=title, rows=1000, cols=20
+                )
+                # Cached on the next start, once the metadata includes it
+                cacheable = False
+        
+        if cacheable:
+            try:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                cache_path.write_text(json.dumps({
+                    'spreadsheet_id': self.shard.spreadsheet_id,
+                    'sheets': {title: properties[title] for title in titles},
+                }), encoding='utf-8')
+            except OSError as e:
+                logger.warning(f"⚠️ Could not cache worksheet layout: {e}")
+        
+        return worksheets, False
     
-    def _get_or_create_worksheet(self, title: str):
-        """Get existing worksheet or create new one"""
+    def _probe_headers(self, worksheets: Dict[str, Any]) -> Dict[str, bool]:
+        """
+        Check which worksheets have a header row, in one request
+        
+        Returns:
+            Mapping of title -> True if A1 is filled
+        """
+        ranges = [f"'{title}'!A1" for title in self.shard.titles]
+        response = self._call_blocking(SheetsRateLimiter.READ, self.spreadsheet.values_batch_get, ranges)
+        value_ranges = response.get('valueRanges', [])
+        return {
+            title: bool(index < len(value_ranges) and value_ranges[index].get('values'))
+            for index, title in enumerate(self.shard.titles)
+        }
+    
+    def _load_mirror(self) -> None:
+        """Initial mirror load (startup only)"""
         try:
-            return self.spreadsheet.worksheet(title)
-        except gspread.exceptions.WorksheetNotFound:
-            return self.spreadsheet.add_worksheet(title=title, rows=1000, cols=20)
+            ranges = self.mirror.sync_ranges()
+            self.mirror.apply_sync(
+                ranges,
+                self._call_blocking(SheetsRateLimiter.READ, self.user_data_sheet.batch_get, ranges)
+            )
+            self._last_row = self.mirror.last_row
+            self.analytics.rebuild(self.mirror.rows())
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load UserData mirror, will retry on first read: {e}")
     
     def _initialize_user_data_headers(self):
         """Initialize UserData sheet with column headers"""
         headers = [
             "goal_text", "goal_date", "final_percent", "final_date"
         ]
-        self.user_data_sheet.append_row(headers)
+        self._call_blocking(SheetsRateLimiter.WRITE, self.user_data_sheet.append_row, headers)
         logger.info("✅ Initialized UserData sheet headers")
     
     def _initialize_analytics_sheet(self):
-        """Initialize Analytics sheet with formulas"""
-        # TODO: Add analytics formulas in a later phase
-        self.analytics_sheet.append_row(["Статистика по интенсиву"])
+        """Initialize Analytics sheet (statistics are filled in by the analytics publisher)"""
+        self._call_blocking(
+            SheetsRateLimiter.WRITE, self.analytics_sheet.append_row, ["Статистика по интенсиву"]
+        )
         logger.info("✅ Initialized Analytics sheet")
     
-    def _retry_on_rate_limit(self, func, *args, **kwargs):
-        """Retry function on rate limit errors"""
-        max_retries = 3
+    async def _run_in_executor(self, func, *args, **kwargs):
+        """Run a blocking gspread call on the bounded thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+    
+    def _call_blocking(self, kind: str, func, *args, **kwargs):
+        """Run a gspread call synchronously within the shared quota (startup only)"""
+        self._limiter.acquire_blocking(kind)
+        return func(*args, **kwargs)
+    
+    @staticmethod
+    def _is_retryable(error: "gspread.exceptions.APIError") -> Tuple[bool, bool]:
+        """
+        Classify an API error
+        
+        Returns:
+            Tuple of (retryable, rate_limited)
+        """
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+        rate_limited = status == 429 or "RATE_LIMIT_EXCEEDED" in str(error)
+        return rate_limited or status in (500, 502, 503, 504), rate_limited
+    
+    @classmethod
+    def _is_permanent(cls, error: Exception) -> bool:
+        """
+        Check if a failed write must not be retried
+        
+        Client errors (a bad range, a deleted worksheet) fail the same way
+        every time. Auth errors are not permanent, they go away once the
+        credentials or sharing are fixed.
+        """
+        from gspread.exceptions import APIError, WorksheetNotFound
+        
+        if isinstance(error, WorksheetNotFound):
+            return True
+        if not isinstance(error, APIError):
+            return False
+        
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+        retryable, _ = cls._is_retryable(error)
+        return not retryable and status not in (401, 403)
+    
+    async def _retry_on_rate_limit(
+        self,
+        kind: str,
+        func,
+        *args,
+        priority: RequestPriority = RequestPriority.USER,
+        idempotent: bool = True,
+        **kwargs
+    ):
+        """
+        Send a request within the shared quota, retrying quota and transient errors
+        
+        Every attempt passes the circuit breaker first, so while Sheets is
+        down calls fail at once with CircuitOpenError instead of retrying.
+        
+        Args:
+            kind: SheetsRateLimiter.READ or SheetsRateLimiter.WRITE
+            func: gspread method to call
+            priority: Request priority for the rate limiter
+            idempotent: False for requests that must not be repeated after a server
+                or network error, which may come after the request was applied
+                (appends); they are only retried on quota errors and connect timeouts
+        """
+        from gspread.exceptions import APIError
+        from requests.exceptions import ConnectionError, ConnectTimeout, ReadTimeout
+        
+        max_retries = settings.SHEETS_MAX_RETRIES
+        method = getattr(func, '__name__', 'request')
         for attempt in range(max_retries):
+            generation = self.breaker.before_call()
+            await self._limiter.acquire(kind, priority)
+            SHEETS_SHARD_REQUESTS.inc(shard=self.shard.name, kind=kind)
+            started = time.perf_counter()
             try:
-                return func(*args, **kwargs)
-            except gspread.exceptions.APIError as e:
-                if attempt < max_retries - 1 and "RATE_LIMIT_EXCEEDED" in str(e):
-                    wait_time = 2 ** attempt  # Exponential backoff
-                    logger.warning(f"Rate limit hit, waiting {wait_time}s...")
-                    time.sleep(wait_time)
+                result = await self._run_in_executor(func, *args, **kwargs)
+                elapsed = time.perf_counter() - started
+                SHEETS_REQUEST_SECONDS.observe(elapsed, method=method, outcome="ok")
+                self.breaker.record(True, elapsed, generation)
+                return result
+            except APIError as e:
+                retryable, rate_limited = self._is_retryable(e)
+                outcome = "rate_limited" if rate_limited else "error"
+                elapsed = time.perf_counter() - started
+                SHEETS_REQUEST_SECONDS.observe(elapsed, method=method, outcome=outcome)
+                # Quota and client errors mean Google is up, server errors count against it
+                self.breaker.record(rate_limited or not retryable, elapsed, generation)
+                if attempt < max_retries - 1 and retryable and (rate_limited or idempotent):
+                    # Exponential backoff with jitter to avoid synchronized retries
+                    wait_time = backoff_with_jitter(
+                        attempt, settings.SHEETS_BACKOFF_BASE, settings.SHEETS_BACKOFF_MAX
+                    )
+                    self._limiter.record_retry(rate_limited)
+                    SHEETS_RETRIES.inc(method=method, reason="rate_limited" if rate_limited else "transient")
+                    logger.warning(f"Sheets request failed ({e}), retrying in {wait_time:.1f}s...")
+                    await asyncio.sleep(wait_time)
+                else:
+                    raise
+            except (ConnectionError, ReadTimeout) as e:
+                # A request that never connected was not sent. Anything else may
+                # have been applied, so only idempotent requests are repeated
+                retryable = isinstance(e, ConnectTimeout) or idempotent
+                elapsed = time.perf_counter() - started
+                SHEETS_REQUEST_SECONDS.observe(elapsed, method=method, outcome="network")
+                self.breaker.record(False, elapsed, generation)
+                if attempt < max_retries - 1 and retryable:
+                    wait_time = backoff_with_jitter(
+                        attempt, settings.SHEETS_BACKOFF_BASE, settings.SHEETS_BACKOFF_MAX
+                    )
+                    self._limiter.record_retry(False)
+                    SHEETS_RETRIES.inc(method=method, reason="network")
+                    logger.warning(f"Sheets request failed ({type(e).__name__}), retrying in {wait_time:.1f}s...")
+                    await asyncio.sleep(wait_time)
                 else:
                     raise
+            except Exception:
+                elapsed = time.perf_counter() - started
+                SHEETS_REQUEST_SECONDS.observe(elapsed, method=method, outcome="error")
+                self.breaker.record(False, elapsed, generation)
+                raise
+    
+    def shutdown(self) -> None:
+        """Release the worker threads"""
+        self._executor.shutdown(wait=True)
+    
+    def _allocate_rows(self, response: Optional[Dict[str, Any]], count: int) -> List[int]:
+        """
+        Resolve row numbers for freshly appended rows
+        
+        The append response is authoritative and reconciles the local counter.
+        The counter is only used if the response carries no updated range.
+        
+        Args:
+            response: Raw API response of the append call
+            count: Number of appended rows
+            
+        Returns:
+            Row numbers of the appended rows, in order
+        """
+        rows = parse_updated_rows(response)
+        
+        if rows:
+            first_row = rows[0]
+        else:
+            first_row = self._last_row + 1
+            logger.warning("Append response has no updated range, using local row counter")
+        
+        self._last_row = first_row + count - 1
+        return list(range(first_row, first_row + count))
     
-    def save_user_goal(self, goal_text: str) -> Optional[int]:
+    async def save_user_goal(self, goal_text: str) -> Optional[int]:
         """
         Save anonymous user goal with security escaping
         
@@ -91,54 +446,265 @@ class SheetsDatabase:
         Returns:
             Row number of the saved goal, or None if failed
             
+        Raises:
+            PermanentWriteError: If Sheets rejected the write for good
+            
+        Security:
+            - Applies escape_for_sheets to prevent CSV/Formula injection
+        """
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        row_numbers = await self.save_user_goals([(goal_text, now)])
+        return row_numbers[0] if row_numbers else None
+    
+    async def save_user_goals(self, goals: List[Tuple[str, str]]) -> Optional[List[int]]:
+        """
+        Save a batch of anonymous goals with a single append call
+        
+        An append that failed with a server or network error may still
+        have been applied. Goals of such an append are first looked up in
+        the sheet and only appended again if they are not there, so a
+        retried batch does not duplicate rows.
+        
+        Args:
+            goals: List of (goal_text, goal_date) tuples, in submission order
+            
+        Returns:
+            Row numbers of the saved goals (same order), or None if failed
+            
+        Raises:
+            PermanentWriteError: If Sheets rejected the write for good
+            
         Security:
             - Applies escape_for_sheets to prevent CSV/Formula injection
         """
+        if not goals:
+            return []
+        
         try:
-            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            rows = [
+                [escape_for_sheets(goal_text), goal_date, "", ""]
+                for goal_text, goal_date in goals
+            ]
+            keys = [(row[0], row[1]) for row in rows]
             
-            # Escape goal_text to prevent CSV/Formula injection
-            safe_goal_text = escape_for_sheets(goal_text)
+            # index in the batch -> row number
+            row_numbers = await self._find_unconfirmed_goals(keys)
+            pending = [index for index in range(len(rows)) if index not in row_numbers]
             
-            # Always insert new anonymous record
-            row_data = [safe_goal_text, now, "", ""]
-            self._retry_on_rate_limit(self.user_data_sheet.append_row, row_data)
+            if pending:
+                pending_rows = [rows[index] for index in pending]
+                last_row = self._last_row
+                try:
+                    response = await self._retry_on_rate_limit(
+                        SheetsRateLimiter.WRITE,
+                        self.user_data_sheet.append_rows,
+                        pending_rows,
+                        idempotent=False
+                    )
+                except CircuitOpenError:
+                    raise
+                except Exception as e:
+                    if self._is_permanent(e):
+                        raise
+                    # The append may have been applied, look the goals up before resending them
+                    for index in pending:
+                        self._unconfirmed_goals.setdefault(keys[index], last_row)
+                    raise
+                
+                appended = self._allocate_rows(response, len(pending_rows))
+                row_numbers.update(zip(pending, appended))
+                self.mirror.apply_goals(appended, pending_rows)
+                self._cache_goals(appended, pending_rows)
+                self.analytics.record_goals(zip(appended, (row[1] for row in pending_rows)))
             
-            # Get the row number of the newly added record
-            all_data = self._retry_on_rate_limit(self.user_data_sheet.get_all_values)
-            row_number = len(all_data)  # Last row
+            for key in keys:
+                self._unconfirmed_goals.pop(key, None)
             
-            logger.info(f"✅ Saved anonymous goal to row {row_number}")
-            return row_number
+            row_numbers = [row_numbers[index] for index in range(len(rows))]
+            logger.info(f"✅ Saved {len(rows)} anonymous goals to rows {row_numbers[0]}-{row_numbers[-1]}")
+            return row_numbers
             
         except Exception as e:
-            logger.error(f"❌ Error saving user goal: {e}")
+            logger.error(f"❌ Error saving user goals batch: {e}")
+            if self._is_permanent(e):
+                raise PermanentWriteError(str(e)) from e
             return None
     
-    def get_goal_by_row(self, row_number: int) -> Optional[str]:
+    def mark_goals_unconfirmed(self, goals: List[Tuple[str, str]], after_row: int = FIRST_DATA_ROW - 1) -> None:
+        """
+        Have goals looked up in the sheet before they are appended
+        
+        For goals that may have been written before (replayed from the
+        journal after a crash). Matching is by (goal_text, goal_date).
+        
+        Args:
+            goals: List of (goal_text, goal_date) tuples
+            after_row: Only rows after this one are searched
+        """
+        for goal_text, goal_date in goals:
+            self._unconfirmed_goals.setdefault((escape_for_sheets(goal_text), goal_date), after_row)
+    
+    async def _find_unconfirmed_goals(self, keys: List[Tuple[str, str]]) -> Dict[int, int]:
+        """
+        Find goals of an earlier failed append that reached the sheet anyway
+        
+        Syncs the mirror and matches rows written after the failed append
+        by (goal_text, goal_date).
+        
+        Args:
+            keys: (escaped goal_text, goal_date) of the goals about to be appended
+            
+        Returns:
+            Batch index -> row number of the goals already in the sheet
+        """
+        floors = {key: self._unconfirmed_goals[key] for key in keys if key in self._unconfirmed_goals}
+        if not floors:
+            return {}
+        
+        # Raises if Sheets is still unreachable, the batch is then retried later
+        await self.sync_mirror(priority=RequestPriority.USER)
+        
+        candidates: Dict[Tuple[str, str], List[int]] = {}
+        for row_number, goal_text, goal_date, _, _ in self.mirror.rows():
+            key = (goal_text, goal_date)
+            if key in floors and row_number > floors[key]:
+                candidates.setdefault(key, []).append(row_number)
+        
+        found = {}
+        for index, key in enumerate(keys):
+            if candidates.get(key):
+                found[index] = candidates[key].pop(0)
+                self._cache_goals([found[index]], [[key[0]]])
+        
+        if found:
+            logger.warning(f"⚠️ {len(found)} goals of a failed append were already written, not appending them again")
+        return found
+    
+    async def sync_mirror(self, priority: RequestPriority = RequestPriority.BACKGROUND) -> int:
+        """
+        Bring the UserData mirror up to date with one batch_get
+        
+        Reads the rows after the last synced row and the C:D cells of rows
+        that have no assessment yet.
+        
+        Args:
+            priority: Request priority for the rate limiter
+            
+        Returns:
+            Number of rows read after the last synced row
+        """
+        ranges = self.mirror.sync_ranges()
+        results = await self._retry_on_rate_limit(
+            SheetsRateLimiter.READ,
+            self.user_data_sheet.batch_get,
+            ranges,
+            priority=priority
+        )
+        count, changed = self.mirror.apply_sync(ranges, results)
+        self._last_row = max(self._last_row, self.mirror.last_row)
+        
+        # Rows written by others are only seen here; the bot's own writes
+        # are already counted, so only rows the sync changed are applied
+        if changed:
+            self.analytics.apply_rows(changed)
+        return count
+    
+    async def _sync_mirror_once(self) -> None:
+        """Sync the mirror, joining a sync that is already running"""
+        if self._mirror_sync is None or self._mirror_sync.done():
+            self._mirror_sync = asyncio.ensure_future(
+                self.sync_mirror(priority=RequestPriority.USER)
+            )
+        await asyncio.shield(self._mirror_sync)
+    
+    async def _load_row(self, row_number: int) -> Optional[Tuple[str, str, Optional[int], str]]:
+        """
+        Load a row from the mirror, syncing it first if the row is unknown
+        
+        An unknown row triggers at most one sync per MIRROR_SYNC_INTERVAL.
+        """
+        row = self.mirror.get_row(row_number)
+        if (row is None or not row[0]) and self.mirror.is_stale(settings.MIRROR_SYNC_INTERVAL):
+            await self._sync_mirror_once()
+            row = self.mirror.get_row(row_number)
+        return row
+    
+    def _cache_goals(self, row_numbers: List[int], rows: List[List[str]]) -> None:
+        """Write freshly saved goals through to the read cache"""
+        for row_number, values in zip(row_numbers, rows):
+            self.read_cache.put(('goal', row_number), values[0])
+            self.read_cache.invalidate(('row', row_number))
+    
+    @property
+    def cache_stats(self) -> Dict[str, int]:
+        """Read cache counters (hits, misses, coalesced, evictions, expired) and size"""
+        return {**self.read_cache.stats, 'size': len(self.read_cache)}
+    
+    async def read_user_data_range(self, a1_range: str) -> List[List[str]]:
+        """
+        Read a range of UserData as a background request (for exports)
+        
+        Args:
+            a1_range: A1 range such as "A2:D1001"
+            
+        Returns:
+            Cell values, trailing empty rows and cells omitted
+        """
+        return await self._retry_on_rate_limit(
+            SheetsRateLimiter.READ,
+            self.user_data_sheet.get_values,
+            a1_range,
+            priority=RequestPriority.BACKGROUND
+        )
+    
+    async def get_goal_by_row(self, row_number: int) -> Optional[str]:
         """
         Get goal text by row number
         
+        Served from the read cache, then the local mirror. Concurrent
+        misses for the same row share one load.
+        
         Args:
             row_number: Row number in the sheet
             
         Returns:
             Goal text or None if not found
         """
+        async def load() -> Optional[str]:
+            row = await self._load_row(row_number)
+            return row[0] or None if row else None
+        
         try:
-            cell_value = self._retry_on_rate_limit(
-                self.user_data_sheet.cell,
-                row_number,
-                1  # Column A - goal_text
-            )
-            return cell_value.value if cell_value else None
+            return await self.read_cache.get(('goal', row_number), load)
             
         except Exception as e:
             logger.error(f"❌ Error getting goal by row: {e}")
             return None
     
+    async def get_row(self, row_number: int) -> Optional[Dict[str, Any]]:
+        """
+        Get a whole UserData record by row number
+        
+        Args:
+            row_number: Row number in the sheet
+            
+        Returns:
+            Dict with goal_text, goal_date, final_percent, final_date, or None if not found
+        """
+        async def load() -> Optional[Dict[str, Any]]:
+            row = await self._load_row(row_number)
+            if not row or not row[0]:
+                return None
+            return dict(zip(('goal_text', 'goal_date', 'final_percent', 'final_date'), row))
+        
+        try:
+            return await self.read_cache.get(('row', row_number), load)
+            
+        except Exception as e:
+            logger.error(f"❌ Error getting row: {e}")
+            return None
     
-    def save_final_assessment(self, row_number: int, percent: int) -> bool:
+    async def save_final_assessment(self, row_number: int, percent: int) -> bool:
         """
         Save final self-assessment for anonymous record
         
@@ -153,12 +719,17 @@ class SheetsDatabase:
             now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
             # Update columns C and D (final_percent, final_date)
-            self._retry_on_rate_limit(
+            await self._retry_on_rate_limit(
+                SheetsRateLimiter.WRITE,
                 self.user_data_sheet.update,
                 f'C{row_number}:D{row_number}',
                 [[percent, now]]
             )
             
+            self.mirror.apply_assessments({row_number: (percent, now)})
+            self.analytics.record_assessments({row_number: (percent, now)})
+            self.read_cache.invalidate(('row', row_number))
+            
             logger.info(f"✅ Saved final assessment for row {row_number}: {percent}%")
             return True
             
@@ -166,19 +737,170 @@ class SheetsDatabase:
             logger.error(f"❌ Error saving final assessment: {e}")
             return False
 
+    
+    async def save_final_assessments(self, assessments: Dict[int, Tuple[int, str]]) -> bool:
+        """
+        Save a batch of final self-assessments with a single batch_update call
+        
+        Args:
+            assessments: Mapping of row_number -> (percent, final_date)
+            
+        Returns:
+            True if successful, False otherwise
+            
+        Raises:
+            PermanentWriteError: If Sheets rejected the write for good
+        """
+        if not assessments:
+            return True
+        
+        try:
+            data = [
+                {'range': f'C{row_number}:D{row_number}', 'values': [[percent, final_date]]}
+                for row_number, (percent, final_date) in assessments.items()
+            ]
+            await self._retry_on_rate_limit(
+                SheetsRateLimiter.WRITE,
+                self.user_data_sheet.batch_update,
+                data
+            )
+            
+            self.mirror.apply_assessments(assessments)
+            self.analytics.record_assessments(assessments)
+            for row_number in assessments:
+                self.read_cache.invalidate(('row', row_number))
+            
+            logger.info(f"✅ Saved {len(data)} final assessments")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Error saving final assessments batch: {e}")
+            if self._is_permanent(e):
+                raise PermanentWriteError(str(e)) from e
+            return False
+
+    
+    async def save_goal_revisions(self, revisions: Dict[int, str]) -> bool:
+        """
+        Overwrite the text of already written goals with a single batch_update call
+        
+        Args:
+            revisions: Mapping of row_number -> goal_text
+            
+        Returns:
+            True if successful, False otherwise
+            
+        Raises:
+            PermanentWriteError: If Sheets rejected the write for good
+            
+        Security:
+            - Applies escape_for_sheets to prevent CSV/Formula injection
+        """
+        if not revisions:
+            return True
+        
+        try:
+            texts = {row_number: escape_for_sheets(goal_text) for row_number, goal_text in revisions.items()}
+            data = [
+                {'range': f'A{row_number}', 'values': [[goal_text]]}
+                for row_number, goal_text in texts.items()
+            ]
+            await self._retry_on_rate_limit(
+                SheetsRateLimiter.WRITE,
+                self.user_data_sheet.batch_update,
+                data
+            )
+            
+            self.mirror.apply_goal_texts(texts)
+            for row_number, goal_text in texts.items():
+                self.read_cache.put(('goal', row_number), goal_text)
+                self.read_cache.invalidate(('row', row_number))
+            
+            logger.info(f"✅ Saved {len(data)} goal revisions")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Error saving goal revisions: {e}")
+            if self._is_permanent(e):
+                raise PermanentWriteError(str(e)) from e
+            return False
+    
+    async def write_analytics(self, rows: List[List[Any]]) -> bool:
+        """
+        Overwrite the Analytics sheet from A1 with a single update call
+        
+        Args:
+            rows: Sheet rows (see database.analytics.build_analytics_rows)
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            await self._retry_on_rate_limit(
+                SheetsRateLimiter.WRITE,
+                self.analytics_sheet.update,
+                'A1',
+                rows,
+                priority=RequestPriority.BACKGROUND
+            )
+            logger.info("✅ Published analytics")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Error publishing analytics: {e}")
+            return False
+
+
+# Lazy initialization of databases, one per cohort shard
+_db_instances: Dict[str, SheetsDatabase] = {}
+_db_locks: Dict[str, threading.Lock] = {}
+
+
+def get_db(shard: Optional[str] = None) -> SheetsDatabase:
+    """
+    Get or create the database of a cohort shard (lazy initialization)
+    
+    Args:
+        shard: Shard name (default: the default shard)
+    """
+    shard = get_router().get(shard)
+    db = _db_instances.get(shard.name)
+    if db is None:
+        # Shards connect independently, a slow spreadsheet does not hold up the others
+        with _db_locks.setdefault(shard.name, threading.Lock()):
+            db = _db_instances.get(shard.name)
+            if db is None:
+                db = _db_instances[shard.name] = SheetsDatabase(shard=shard)
+    return db
 
-# Lazy initialization of database
-_db_instance = None
 
+def get_db_if_ready(shard: Optional[str] = None) -> Optional[SheetsDatabase]:
+    """Get the database of a shard if it has been created, without connecting"""
+    return _db_instances.get(get_router().get(shard).name)
 
-def get_db() -> SheetsDatabase:
-    """Get or create database instance (lazy initialization)"""
-    global _db_instance
-    if _db_instance is None:
-        _db_instance = SheetsDatabase()
-    return _db_instance
+
+def get_ready_dbs() -> Dict[str, SheetsDatabase]:
+    """Databases created so far, by shard name"""
+    return dict(_db_instances)
+
+
+async def get_db_async(shard: Optional[str] = None) -> SheetsDatabase:
+    """Get or create the database of a shard without blocking the event loop"""
+    db = get_db_if_ready(shard)
+    if db is None:
+        return await asyncio.to_thread(get_db, shard)
+    return db
+
+
+def shutdown_dbs() -> None:
+    """Release the worker threads of every shard and the shared HTTP transport"""
+    for db in get_ready_dbs().values():
+        db.shutdown()
+    
+    if settings.SHEETS_BACKEND != "fake":
+        from database.sheets_transport import close_sheets_transport
+        close_sheets_transport()
 
 
 # For backward compatibility
 db = None  # Will be initialized on first use
-
@@ -0,0 +1,216 @@
+"""
+HTTP transport for Google Sheets requests
+
+One keep-alive session shared by the Sheets worker threads of every
+cohort shard: a connection pool sized for them, connect/read timeouts on
+every request, gzip responses, and an access token refreshed in the
+background before it expires, so no user request waits for a token
+round trip.
+"""
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+from config.settings import settings
+from utils.logger import logger
+from utils.metrics import metrics
+
+# google-auth, requests and gspread are imported when the transport is built,
+# like the rest of the Sheets client they are not needed before the first connect
+
+SCOPES = [
+    'https://spreadsheets.google.com/feeds',
+    'https://www.googleapis.com/auth/drive'
+]
+
+# Google only compresses responses for clients whose User-Agent contains "gzip"
+USER_AGENT = "goalbuddy21 (gzip)"
+
+TOKEN_REFRESHES = metrics.counter(
+    "sheets_token_refreshes_total", "Google access token refreshes ahead of expiry", ("outcome",)
+)
+
+
+def load_credentials():
+    """
+    Service account credentials from GOOGLE_CREDENTIALS or the key file
+    
+    Returns:
+        google.oauth2.service_account.Credentials with the Sheets scopes
+    """
+    from google.oauth2.service_account import Credentials
+    
+    # GOOGLE_CREDENTIALS (Railway) is used as is, without a key file
+    credentials_info = settings.google_credentials_info()
+    if credentials_info:
+        return Credentials.from_service_account_info(credentials_info, scopes=SCOPES)
+    return Credentials.from_service_account_file(settings.CREDENTIALS_PATH, scopes=SCOPES)
+
+
+class TokenRefresher:
+    """
+    Keeps an access token valid from a background thread
+    
+    The token is refreshed `margin` seconds before it expires. If a
+    refresh fails it is retried shortly after, and the session still
+    refreshes on demand as a fallback.
+    """
+    
+    RETRY_INTERVAL = 10.0
+    
+    def __init__(self, credentials, auth_request, margin: float):
+        """
+        Args:
+            credentials: google-auth credentials to keep fresh
+            auth_request: google.auth.transport Request used for refreshes
+            margin: Seconds before expiry to refresh
+        """
+        self.credentials = credentials
+        self.auth_request = auth_request
+        self.margin = margin
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def expires_in(self) -> float:
+        """Seconds until the current token expires (0 if there is none)"""
+        if not self.credentials.token or self.credentials.expiry is None:
+            return 0.0
+        # google-auth keeps expiry as naive UTC
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return (self.credentials.expiry - now).total_seconds()
+    
+    def refresh(self) -> bool:
+        """
+        Fetch a new access token
+        
+        Returns:
+            True if refreshed, False if the refresh failed
+        """
+        try:
+            self.credentials.refresh(self.auth_request)
+        except Exception as e:
+            TOKEN_REFRESHES.inc(outcome="error")
+            logger.warning(f"⚠️ Could not refresh Google access token: {e}")
+            return False
+        
+        TOKEN_REFRESHES.inc(outcome="ok")
+        logger.debug(f"Google access token refreshed, valid for {self.expires_in():.0f}s")
+        return True
+    
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="sheets-token", daemon=True)
+            self._thread.start()
+    
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+    
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            wait = self.expires_in() - self.margin
+            if wait <= 0:
+                self.refresh()
+                # Retry soon after a failure, never spin if tokens live shorter than the margin
+                wait = max(self.RETRY_INTERVAL, self.expires_in() - self.margin)
+            self._stop.wait(wait)
+
+
+class SheetsTransport:
+    """Pooled, authorized session and the gspread client built on it"""
+    
+    def __init__(self, credentials=None):
+        """
+        Args:
+            credentials: google-auth credentials (default: load_credentials())
+        """
+        import requests
+        from google.auth.transport.requests import AuthorizedSession, Request
+        from requests.adapters import HTTPAdapter
+        
+        self.credentials = credentials or load_credentials()
+        self._timeout = (settings.SHEETS_CONNECT_TIMEOUT, settings.SHEETS_READ_TIMEOUT)
+        
+        # Token requests get their own small session, so they never wait for a Sheets connection
+        auth_session = requests.Session()
+        auth_session.headers["User-Agent"] = USER_AGENT
+        self.auth_request = Request(auth_session)
+        
+        self.session = AuthorizedSession(
+            self.credentials,
+            refresh_timeout=settings.SHEETS_READ_TIMEOUT,
+            auth_request=self.auth_request
+        )
+        # No urllib3 retries: SheetsDatabase retries within the shared quota
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.SHEETS_POOL_SIZE,
+            max_retries=0
+        )
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip", "User-Agent": USER_AGENT})
+        
+        self.refresher = TokenRefresher(self.credentials, self.auth_request, settings.SHEETS_TOKEN_REFRESH_MARGIN)
+        metrics.callback(
+            "sheets_token_expires_in_seconds", "Seconds until the Google access token expires",
+            "gauge", self.refresher.expires_in
+        )
+        self._client = None
+        self._client_lock = threading.Lock()
+    
+    def client(self):
+        """
+        gspread client that sends every request through the pooled session
+        
+        Created once. The first token is fetched here, later ones by the
+        background refresher.
+        
+        Returns:
+            gspread.Client with connect/read timeouts set
+        """
+        import gspread
+        
+        # Shards connect in parallel, the first one sets the client up
+        with self._client_lock:
+            if self._client is None:
+                self.refresher.refresh()
+                self.refresher.start()
+                
+                self._client = gspread.Client(auth=self.credentials, session=self.session)
+                self._client.set_timeout(self._timeout)
+                logger.info(
+                    f"✅ Sheets transport ready (pool {settings.SHEETS_POOL_SIZE}, "
+                    f"timeouts {self._timeout[0]}s/{self._timeout[1]}s)"
+                )
+            return self._client
+    
+    def close(self) -> None:
+        """Stop refreshing and close pooled connections"""
+        self.refresher.stop()
+        self.session.close()
+        self.auth_request.session.close()
+
+
+# Lazy initialization of transport
+_transport_instance = None
+_transport_lock = threading.Lock()
+
+
+def get_sheets_transport() -> SheetsTransport:
+    """Get or create the shared Sheets transport (lazy initialization)"""
+    global _transport_instance
+    if _transport_instance is None:
+        with _transport_lock:
+            if _transport_instance is None:
+                _transport_instance = SheetsTransport()
+    return _transport_instance
+
+
+def close_sheets_transport() -> None:
+    """Close the shared transport if it was created"""
+    global _transport_instance
+    if _transport_instance is not None:
+        _transport_instance.close()
+        _transport_instance = None
@@ -0,0 +1,233 @@
+"""
+Conversation state storage
+Keeps each user's FSM state across bot restarts
+"""
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from config.settings import settings
+from utils.logger import logger
+from bot.states import UserState
+
+
+class StateStore(ABC):
+    """
+    Base class for user state stores
+    
+    A state is a dict with 'state' (UserState) and optionally
+    'goal_seq' (int, journal sequence of the goal), 'row_number' (int)
+    and 'goal_text' (str). Other keys are kept in memory only.
+    """
+    
+    @abstractmethod
+    def get(self, user_id: int) -> Optional[dict]:
+        """
+        Get user's state
+        
+        Args:
+            user_id: User's Telegram ID
+        
+        Returns:
+            State dict or None if the user has no state
+        """
+    
+    @abstractmethod
+    def set(self, user_id: int, data: dict) -> None:
+        """
+        Replace user's state
+        
+        Args:
+            user_id: User's Telegram ID
+            data: State dict
+        """
+    
+    @abstractmethod
+    def delete(self, user_id: int) -> None:
+        """
+        Remove user's state
+        
+        Args:
+            user_id: User's Telegram ID
+        """
+    
+    @abstractmethod
+    def count_by_state(self) -> Dict[str, int]:
+        """
+        Count users per state (for metrics)
+        
+        Returns:
+            Mapping of UserState value -> number of users
+        """
+    
+    def close(self) -> None:
+        """Release storage resources"""
+
+
+class MemoryStateStore(StateStore):
+    """In-memory state store (lost on restart, useful for local testing)"""
+    
+    def __init__(self):
+        self._states: Dict[int, dict] = {}
+    
+    def get(self, user_id: int) -> Optional[dict]:
+        return self._states.get(user_id)
+    
+    def set(self, user_id: int, data: dict) -> None:
+        self._states[user_id] = data
+    
+    def delete(self, user_id: int) -> None:
+        self._states.pop(user_id, None)
+    
+    def count_by_state(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for data in list(self._states.values()):
+            state = data['state'].value
+            counts[state] = counts.get(state, 0) + 1
+        return counts
+
+
+class SQLiteStateStore(StateStore):
+    """
+    State store backed by local SQLite in WAL mode
+    
+    Reads are served from an in-memory cache and fall back to a primary
+    key lookup, writes go straight to SQLite. No Sheets reads are needed
+    to restore state after a restart.
+    """
+    
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path: SQLite database file
+        """
+        path = path or settings.STATE_DB_PATH
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._cache: Dict[int, Optional[dict]] = {}
+        
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS user_states (
+                user_id INTEGER PRIMARY KEY,
+                state TEXT NOT NULL,
+                row_number INTEGER,
+                goal_text TEXT,
+                updated_at TEXT NOT NULL,
+                goal_seq INTEGER,
+                goal_time REAL,
+                shard TEXT,
+                previous_goal_text TEXT
+            )
+            """
+        )
+        
+        # Databases created before goals were journaled lack goal_seq
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(user_states)")}
+        if 'goal_seq' not in columns:
+            self._conn.execute("ALTER TABLE user_states ADD COLUMN goal_seq INTEGER")
+        # ... and those created before goal debouncing lack goal_time
+        if 'goal_time' not in columns:
+            self._conn.execute("ALTER TABLE user_states ADD COLUMN goal_time REAL")
+        # ... and those created before cohort sharding lack shard
+        if 'shard' not in columns:
+            self._conn.execute("ALTER TABLE user_states ADD COLUMN shard TEXT")
+        # ... and those created before only repeated goals were debounced lack previous_goal_text
+        if 'previous_goal_text' not in columns:
+            self._conn.execute("ALTER TABLE user_states ADD COLUMN previous_goal_text TEXT")
+        
+        logger.info(f"✅ State store opened: {path}")
+    
+    def get(self, user_id: int) -> Optional[dict]:
+        with self._lock:
+            if user_id in self._cache:
+                return self._cache[user_id]
+            
+            row = self._conn.execute(
+                "SELECT state, goal_seq, row_number, goal_text, goal_time, shard, previous_goal_text "
+                "FROM user_states WHERE user_id = ?",
+                (user_id,)
+            ).fetchone()
+            
+            data = None
+            if row:
+                state, goal_seq, row_number, goal_text, goal_time, shard, previous_goal_text = row
+                data = {'state': UserState(state)}
+                if goal_seq is not None:
+                    data['goal_seq'] = goal_seq
+                if row_number is not None:
+                    data['row_number'] = row_number
+                if goal_text is not None:
+                    data['goal_text'] = goal_text
+                if goal_time is not None:
+                    data['goal_time'] = goal_time
+                if shard is not None:
+                    data['shard'] = shard
+                if previous_goal_text is not None:
+                    data['previous_goal_text'] = previous_goal_text
+            
+            self._cache[user_id] = data
+            return data
+    
+    def set(self, user_id: int, data: dict) -> None:
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        with self._lock:
+            self._cache[user_id] = data
+            self._conn.execute(
+                """
+                INSERT INTO user_states (
+                    user_id, state, goal_seq, row_number, goal_text, goal_time, shard, previous_goal_text, updated_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    state = excluded.state,
+                    goal_seq = excluded.goal_seq,
+                    row_number = excluded.row_number,
+                    goal_text = excluded.goal_text,
+                    goal_time = excluded.goal_time,
+                    shard = excluded.shard,
+                    previous_goal_text = excluded.previous_goal_text,
+                    updated_at = excluded.updated_at
+                """,
+                (
+                    user_id, data['state'].value, data.get('goal_seq'),
+                    data.get('row_number'), data.get('goal_text'), data.get('goal_time'),
+                    data.get('shard'), data.get('previous_goal_text'), now
+                )
+            )
+    
+    def delete(self, user_id: int) -> None:
+        with self._lock:
+            self._cache[user_id] = None
+            self._conn.execute("DELETE FROM user_states WHERE user_id = ?", (user_id,))
+    
+    def count_by_state(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT state, COUNT(*) FROM user_states GROUP BY state"))
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# Lazy initialization of state store
+_store_instance = None
+
+
+def get_state_store() -> StateStore:
+    """Get or create the configured state store (lazy initialization)"""
+    global _store_instance
+    if _store_instance is None:
+        if settings.STATE_STORE == "memory":
+            _store_instance = MemoryStateStore()
+        else:
+            _store_instance = SQLiteStateStore()
+    return _store_instance
@@ -0,0 +1,417 @@
+"""
+Write-behind queue in front of the Google Sheets database
+Coalesces goal appends and assessment updates into batched writes
+"""
+import asyncio
+from datetime import datetime
+from typing import Any, List, Dict, Hashable, Tuple, Optional
+
+from config.settings import settings
+from database.dead_letters import DeadLetteredError, get_dead_letters
+from database.sharding import DEFAULT_SHARD
+from database.sheets import PermanentWriteError, get_db_async, get_db_if_ready
+from utils.logger import logger
+
+
+class WriteBehindQueue:
+    """
+    Buffers storage writes and flushes them in batches
+    
+    Pending goals become one append_rows call and pending C:D updates
+    become one batch_update call per flush (goal text revisions, which
+    are rare, one more). A flush happens when
+    max_batch_size writes are pending or flush_interval seconds after
+    the first pending write, whichever comes first.
+    
+    A write Sheets rejects for good, or one that failed
+    WRITE_QUEUE_MAX_ATTEMPTS flushes while the circuit was closed, is
+    moved to the dead-letter store and its future fails with
+    DeadLetteredError, so it cannot hold up the rest of the shard.
+    """
+    
+    def __init__(self, max_batch_size: int = None, flush_interval: float = None, shard: str = DEFAULT_SHARD):
+        """
+        Args:
+            max_batch_size: Pending writes that trigger an immediate flush
+            flush_interval: Max seconds a write waits before being flushed
+            shard: Cohort shard the writes go to
+        """
+        self.shard = shard
+        self.max_batch_size = max_batch_size or settings.WRITE_QUEUE_MAX_BATCH
+        self.flush_interval = flush_interval or settings.WRITE_QUEUE_FLUSH_INTERVAL
+        
+        # (goal_text, goal_date, future resolved with the row number)
+        self._pending_goals: List[Tuple[str, str, asyncio.Future]] = []
+        # row_number -> (percent, final_date, futures resolved with success flag)
+        self._pending_assessments: Dict[int, Tuple[int, str, List[asyncio.Future]]] = {}
+        # row_number -> (goal_text, futures resolved with success flag)
+        self._pending_revisions: Dict[int, Tuple[str, List[asyncio.Future]]] = {}
+        # Goal future / (kind, row_number) -> failed flushes so far
+        self._attempts: Dict[Hashable, int] = {}
+        
+        self._has_pending: Optional[asyncio.Event] = None
+        self._batch_full: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+    
+    @property
+    def pending_count(self) -> int:
+        """Number of writes waiting for the next flush"""
+        return len(self._pending_goals) + len(self._pending_assessments) + len(self._pending_revisions)
+    
+    def _ensure_started(self) -> None:
+        """Start the background flusher on the running event loop"""
+        if self._task is not None:
+            return
+        
+        self._has_pending = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(
+            f"✅ Write-behind queue started for {self.shard} "
+            f"(batch {self.max_batch_size}, interval {self.flush_interval}s)"
+        )
+    
+    def _notify(self) -> None:
+        """Wake the flusher, immediately if the batch is full"""
+        self._has_pending.set()
+        if self.pending_count >= self.max_batch_size:
+            self._batch_full.set()
+    
+    def submit_goal(self, goal_text: str, goal_date: str = None) -> asyncio.Future:
+        """
+        Queue a new anonymous goal
+        
+        Args:
+            goal_text: User's goal text
+            goal_date: When the goal was set (default: now)
+        
+        Returns:
+            Future resolved with the row number once the goal is written
+        """
+        if self._closed:
+            raise RuntimeError("Write-behind queue is closed")
+        
+        self._ensure_started()
+        
+        goal_date = goal_date or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        future = asyncio.get_running_loop().create_future()
+        self._pending_goals.append((goal_text, goal_date, future))
+        self._notify()
+        return future
+    
+    def submit_assessment(self, row_number: int, percent: int, final_date: str = None) -> asyncio.Future:
+        """
+        Queue a final self-assessment
+        
+        A newer assessment for the same row replaces a pending one.
+        
+        Args:
+            row_number: Row number in the sheet
+            percent: Self-assessment percentage (0-100)
+            final_date: When the assessment was made (default: now)
+        
+        Returns:
+            Future resolved with True once the assessment is written
+        """
+        if self._closed:
+            raise RuntimeError("Write-behind queue is closed")
+        
+        self._ensure_started()
+        
+        final_date = final_date or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        future = asyncio.get_running_loop().create_future()
+        
+        _, _, futures = self._pending_assessments.get(row_number, (None, None, []))
+        futures.append(future)
+        self._pending_assessments[row_number] = (percent, final_date, futures)
+        self._notify()
+        return future
+    
+    def submit_goal_revision(self, row_number: int, goal_text: str) -> asyncio.Future:
+        """
+        Queue a new text for an already written goal
+        
+        A newer revision for the same row replaces a pending one.
+        
+        Args:
+            row_number: Row number in the sheet
+            goal_text: New goal text
+        
+        Returns:
+            Future resolved with True once the text is written
+        """
+        if self._closed:
+            raise RuntimeError("Write-behind queue is closed")
+        
+        self._ensure_started()
+        
+        future = asyncio.get_running_loop().create_future()
+        _, futures = self._pending_revisions.get(row_number, (None, []))
+        futures.append(future)
+        self._pending_revisions[row_number] = (goal_text, futures)
+        self._notify()
+        return future
+    
+    async def _run(self) -> None:
+        """Background flusher loop"""
+        while not self._closed:
+            await self._has_pending.wait()
+            
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            
+            # While the Sheets circuit is open, writes wait here (and in the journal)
+            # instead of failing every flush; the first flush after it is the probe
+            db = get_db_if_ready(self.shard)
+            if db is not None and db.breaker.retry_after:
+                await asyncio.sleep(db.breaker.retry_after)
+                continue
+            
+            try:
+                ok = await self.flush()
+            except Exception as e:
+                # The flusher must outlive any error, or every pending future hangs
+                logger.error(f"❌ Write-behind flush for {self.shard} raised: {e}")
+                ok = False
+            
+            if not ok:
+                # Back off before retrying the same batch
+                await asyncio.sleep(self.flush_interval)
+    
+    async def flush(self) -> bool:
+        """
+        Write all pending goals and assessments
+        
+        Failed writes are put back at the front of the queue and retried
+        on the next flush, writes rejected for good are dead-lettered. If
+        Sheets cannot be connected, nothing is taken from the queue.
+        
+        Returns:
+            True if everything pending was written, False otherwise
+        """
+        if self._flush_lock is None:
+            return True
+        
+        async with self._flush_lock:
+            # Connect before taking the batch, so a failed connect loses nothing
+            try:
+                db = await get_db_async(self.shard)
+            except Exception as e:
+                logger.warning(f"⚠️ Write-behind flush for {self.shard} could not connect to Sheets: {e}")
+                return False
+            
+            goals = self._pending_goals
+            assessments = self._pending_assessments
+            revisions = self._pending_revisions
+            self._pending_goals = []
+            self._pending_assessments = {}
+            self._pending_revisions = {}
+            self._has_pending.clear()
+            self._batch_full.clear()
+            
+            ok = True
+            
+            if goals:
+                try:
+                    row_numbers = await self._write(db.save_user_goals, [(text, date) for text, date, _ in goals])
+                except PermanentWriteError as e:
+                    # An append is rejected as a whole (its worksheet or range), with every goal in it
+                    for text, date, future in goals:
+                        self._dead_letter("goal", future, {"goal_text": text, "goal_date": date}, [future], e)
+                else:
+                    if row_numbers is None:
+                        retry = [
+                            (text, date, future) for text, date, future in goals
+                            if self._count_failure(db, "goal", future, {"goal_text": text, "goal_date": date}, [future])
+                        ]
+                        self._pending_goals = retry + self._pending_goals
+                        ok = False
+                    else:
+                        for (_, _, future), row_number in zip(goals, row_numbers):
+                            self._attempts.pop(future, None)
+                            if not future.done():
+                                future.set_result(row_number)
+            
+            if assessments:
+                failed, rejected = await self._write_rows(
+                    db.save_final_assessments,
+                    {row: (percent, date) for row, (percent, date, _) in assessments.items()}
+                )
+                for row_number, (percent, date, futures) in assessments.items():
+                    key = ("assessment", row_number)
+                    payload = {"row_number": row_number, "percent": percent, "final_date": date}
+                    if row_number in rejected:
+                        self._dead_letter("assessment", key, payload, futures, rejected[row_number])
+                    elif row_number in failed:
+                        ok = False
+                        if not self._count_failure(db, "assessment", key, payload, futures):
+                            continue
+                        # Newer pending assessments for the same rows take precedence
+                        if row_number in self._pending_assessments:
+                            self._pending_assessments[row_number][2].extend(futures)
+                        else:
+                            self._pending_assessments[row_number] = (percent, date, futures)
+                    else:
+                        self._attempts.pop(key, None)
+                        for future in futures:
+                            if not future.done():
+                                future.set_result(True)
+            
+            if revisions:
+                failed, rejected = await self._write_rows(
+                    db.save_goal_revisions,
+                    {row: text for row, (text, _) in revisions.items()}
+                )
+                for row_number, (text, futures) in revisions.items():
+                    key = ("goal_revision", row_number)
+                    payload = {"row_number": row_number, "goal_text": text}
+                    if row_number in rejected:
+                        self._dead_letter("goal_revision", key, payload, futures, rejected[row_number])
+                    elif row_number in failed:
+                        ok = False
+                        if not self._count_failure(db, "goal_revision", key, payload, futures):
+                            continue
+                        if row_number in self._pending_revisions:
+                            self._pending_revisions[row_number][1].extend(futures)
+                        else:
+                            self._pending_revisions[row_number] = (text, futures)
+                    else:
+                        self._attempts.pop(key, None)
+                        for future in futures:
+                            if not future.done():
+                                future.set_result(True)
+            
+            if self.pending_count:
+                self._notify()
+            
+            if not ok:
+                logger.warning(f"⚠️ Write-behind flush failed, {self.pending_count} writes re-queued")
+            
+            return ok
+    
+    async def _write(self, method, *args):
+        """
+        Run one batched write, an unexpected error counts as a failed write
+        
+        The batch is already taken from the queue, so an exception must not
+        escape flush() before it is put back.
+        
+        Returns:
+            The write's result, or None if it raised
+        
+        Raises:
+            PermanentWriteError: If Sheets rejected the write for good
+        """
+        try:
+            return await method(*args)
+        except PermanentWriteError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Write-behind {method.__name__} for {self.shard} raised: {e}")
+            return None
+    
+    async def _write_rows(self, method, batch: Dict[int, Any]) -> Tuple[List[int], Dict[int, Exception]]:
+        """
+        Write a batch of per-row updates
+        
+        If Sheets rejects the batch for good, its rows are written one at a
+        time, so one bad row does not take the others down with it.
+        
+        Args:
+            method: Database method taking a row_number -> value mapping
+            batch: Mapping of row_number -> value
+        
+        Returns:
+            Tuple of (rows that failed and may be retried, rows rejected for good -> error)
+        """
+        try:
+            success = await self._write(method, batch)
+        except PermanentWriteError as e:
+            if len(batch) == 1:
+                return [], {row_number: e for row_number in batch}
+            
+            failed, rejected = [], {}
+            for row_number, value in batch.items():
+                row_failed, row_rejected = await self._write_rows(method, {row_number: value})
+                failed.extend(row_failed)
+                rejected.update(row_rejected)
+            return failed, rejected
+        
+        return ([] if success else list(batch)), {}
+    
+    def _count_failure(self, db, kind: str, key: Hashable, payload: Dict[str, Any], futures: List[asyncio.Future]) -> bool:
+        """
+        Count a failed flush of one write, giving it up after WRITE_QUEUE_MAX_ATTEMPTS
+        
+        Failures while the circuit is open do not count, an outage says
+        nothing about the write itself.
+        
+        Returns:
+            True if the write should be retried, False if it was dead-lettered
+        """
+        if db.breaker.retry_after:
+            return True
+        
+        attempts = self._attempts.get(key, 0) + 1
+        if attempts < settings.WRITE_QUEUE_MAX_ATTEMPTS:
+            self._attempts[key] = attempts
+            return True
+        
+        self._dead_letter(kind, key, payload, futures, f"still failing after {attempts} attempts")
+        return False
+    
+    def _dead_letter(
+        self,
+        kind: str,
+        key: Hashable,
+        payload: Dict[str, Any],
+        futures: List[asyncio.Future],
+        error: Any
+    ) -> None:
+        """Move a write to the dead-letter store and fail its futures"""
+        attempts = self._attempts.pop(key, 0) + 1
+        get_dead_letters().add(self.shard, kind, payload, str(error), attempts)
+        
+        for future in futures:
+            if not future.done():
+                future.set_exception(DeadLetteredError(f"{kind} for {self.shard} was dead-lettered: {error}"))
+    
+    async def close(self) -> None:
+        """Stop the background flusher and flush everything still pending"""
+        self._closed = True
+        
+        if self._task is None:
+            return
+        
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        
+        if self.pending_count and not await self.flush():
+            logger.error(f"❌ {self.pending_count} writes could not be flushed on shutdown")
+        
+        logger.info(f"✅ Write-behind queue closed for {self.shard}")
+
+
+# Lazy initialization of write queues, one per cohort shard
+_queue_instances: Dict[str, WriteBehindQueue] = {}
+
+
+def get_write_queue(shard: Optional[str] = None) -> WriteBehindQueue:
+    """Get or create the write-behind queue of a shard (lazy initialization)"""
+    shard = shard or DEFAULT_SHARD
+    if shard not in _queue_instances:
+        _queue_instances[shard] = WriteBehindQueue(shard=shard)
+    return _queue_instances[shard]
+
+
+def get_write_queues() -> List[WriteBehindQueue]:
+    """Write-behind queues created so far"""
+    return list(_queue_instances.values())
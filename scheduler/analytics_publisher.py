@@ -0,0 +1,111 @@
+"""
+Periodic publishing of cohort statistics to the Analytics worksheet of every shard
+"""
+import asyncio
+from typing import Dict, Optional
+
+from config.settings import settings
+from utils.logger import logger
+from database.analytics import build_analytics_rows
+from database.sharding import get_router
+from database.sheets import get_db_async
+
+
+class AnalyticsPublisher:
+    """
+    Writes the aggregator's statistics to the Analytics worksheet
+    
+    One batched write per shard and interval, skipped when nothing has
+    changed in that shard.
+    """
+    
+    def __init__(self, interval: float = None):
+        """
+        Args:
+            interval: Seconds between publishes
+        """
+        self.interval = interval or settings.ANALYTICS_PUBLISH_INTERVAL
+        # Shard name -> aggregator version last written
+        self._published_versions: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        """Start publishing on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop publishing"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def publish(self) -> bool:
+        """
+        Write current statistics of every shard that changed since the last publish
+        
+        Returns:
+            True if any sheet was updated
+        """
+        updated = False
+        for shard in get_router().names():
+            try:
+                updated = await self.publish_shard(shard) or updated
+            except Exception as e:
+                # One unreachable spreadsheet must not hold back the other cohorts
+                logger.error(f"❌ Failed to publish analytics of shard '{shard}': {e}")
+        return updated
+    
+    async def publish_shard(self, shard: Optional[str] = None) -> bool:
+        """
+        Write one shard's statistics if they changed since its last publish
+        
+        Args:
+            shard: Shard name (default: the default shard)
+        
+        Returns:
+            True if the sheet was updated
+        """
+        db = await get_db_async(shard)
+        version = db.analytics.version
+        if version == self._published_versions.get(db.shard.name):
+            return False
+        
+        # Sheets is down, publish on a later round
+        if db.breaker.retry_after:
+            return False
+        
+        # NumPy is imported on the first publish, not at startup
+        from database.cohort_stats import compute_cohort_stats, load_columns
+        
+        cohort = await asyncio.to_thread(lambda: compute_cohort_stats(load_columns(db.mirror)))
+        rows = build_analytics_rows(db.analytics.snapshot(), cohort)
+        if await db.write_analytics(rows):
+            self._published_versions[db.shard.name] = version
+            return True
+        return False
+    
+    async def _run(self) -> None:
+        """Publisher loop"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.publish()
+            except Exception as e:
+                logger.error(f"❌ Failed to publish analytics: {e}")
+
+
+# Lazy initialization of analytics publisher
+_publisher_instance = None
+
+
+def get_analytics_publisher() -> AnalyticsPublisher:
+    """Get or create analytics publisher instance (lazy initialization)"""
+    global _publisher_instance
+    if _publisher_instance is None:
+        _publisher_instance = AnalyticsPublisher()
+    return _publisher_instance
@@ -0,0 +1,179 @@
+"""
+Rate-limited broadcast of reminder messages
+Keeps bulk sends within Telegram's global and per-chat limits
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
+
+from config.settings import settings
+from utils.logger import logger
+from utils.rate_limit import TokenBucket, backoff_with_jitter
+
+
+@dataclass
+class Reminder:
+    """A pending reminder as stored in the ReminderStore"""
+    user_id: int
+    row_number: Optional[int]
+    due_at: float
+    attempts: int = 0
+
+
+class ReminderBroadcaster:
+    """
+    Sends reminders through a shared rate limiter
+    
+    - Global token bucket (Telegram allows ~30 messages/s per bot)
+    - Minimum interval between two messages to the same chat
+    - RetryAfter pauses all workers for the time Telegram asks for
+    - Transient errors are retried with backoff, up to max_attempts
+    """
+    
+    def __init__(
+        self,
+        send: Callable[[Reminder], Awaitable[bool]],
+        on_done: Callable[[Reminder, bool], None],
+        rate_per_second: float = None,
+        workers: int = None,
+        max_attempts: int = None
+    ):
+        """
+        Args:
+            send: Coroutine that sends one reminder, returns False if there
+                was nothing to send (raises TelegramError on failure)
+            on_done: Called once per reminder with (reminder, delivered)
+            rate_per_second: Global message rate
+            workers: Number of concurrent senders
+            max_attempts: Attempts per reminder before it is counted as failed
+        """
+        self._send = send
+        self._on_done = on_done
+        self.rate_per_second = rate_per_second or settings.BROADCAST_RATE_PER_SECOND
+        self.workers = workers or settings.BROADCAST_WORKERS
+        self.max_attempts = max_attempts or settings.BROADCAST_MAX_ATTEMPTS
+        
+        self._bucket = TokenBucket(self.rate_per_second, self.rate_per_second)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        
+        # Reminders queued, in flight or waiting for a retry
+        self._in_progress: Set[int] = set()
+        self._last_sent: Dict[int, float] = {}
+        self._paused_until = 0.0
+        
+        self.stats: Dict[str, int] = {"sent": 0, "failed": 0, "retried": 0}
+    
+    @property
+    def pending(self) -> int:
+        """Reminders accepted but not yet delivered or failed"""
+        return len(self._in_progress)
+    
+    def start(self) -> None:
+        """Start sender workers on the running event loop"""
+        if self._tasks:
+            return
+        
+        self._queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+    
+    async def stop(self) -> None:
+        """Stop sender workers (undelivered reminders stay in the store)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    def submit(self, reminder: Reminder) -> bool:
+        """
+        Queue a reminder unless it is already being processed
+        
+        Returns:
+            True if queued
+        """
+        if reminder.user_id in self._in_progress:
+            return False
+        
+        self.start()
+        self._in_progress.add(reminder.user_id)
+        self._queue.put_nowait(reminder)
+        return True
+    
+    async def _wait_for_turn(self, chat_id: int) -> None:
+        """Wait for flood-control pause, per-chat pacing and a global token"""
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+        
+        now = time.monotonic()
+        if len(self._last_sent) > 4096:
+            # Pacing only matters within the interval, forget older sends
+            self._last_sent = {
+                chat: sent_at for chat, sent_at in self._last_sent.items()
+                if now - sent_at < settings.BROADCAST_CHAT_INTERVAL
+            }
+        
+        chat_wait = self._last_sent.get(chat_id, 0) + settings.BROADCAST_CHAT_INTERVAL - now
+        if chat_wait > 0:
+            await asyncio.sleep(chat_wait)
+        
+        while True:
+            wait_time = self._bucket.try_acquire()
+            if wait_time == 0:
+                return
+            await asyncio.sleep(wait_time)
+    
+    def _retry_later(self, reminder: Reminder, delay: float) -> None:
+        """Put a reminder back on the queue after a delay"""
+        self.stats["retried"] += 1
+        asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, reminder)
+    
+    def _finish(self, reminder: Reminder, delivered: bool) -> None:
+        """Record the final outcome of a reminder"""
+        self._in_progress.discard(reminder.user_id)
+        self.stats["sent" if delivered else "failed"] += 1
+        self._on_done(reminder, delivered)
+    
+    async def _worker(self) -> None:
+        """Send queued reminders one at a time"""
+        while True:
+            reminder = await self._queue.get()
+            try:
+                await self._wait_for_turn(reminder.user_id)
+                reminder.attempts += 1
+                delivered = await self._send(reminder)
+                self._last_sent[reminder.user_id] = time.monotonic()
+                self._finish(reminder, delivered)
+            
+            except RetryAfter as e:
+                # Flood control applies to the whole bot, so pause every worker
+                retry_after = e.retry_after
+                if hasattr(retry_after, 'total_seconds'):
+                    retry_after = retry_after.total_seconds()
+                self._paused_until = time.monotonic() + retry_after
+                logger.warning(f"⚠️ Telegram flood control, pausing broadcast for {retry_after}s")
+                reminder.attempts -= 1
+                self._retry_later(reminder, retry_after)
+            
+            except (Forbidden, BadRequest) as e:
+                # User blocked the bot or chat is gone, retrying will not help
+                logger.warning(f"⚠️ Reminder not deliverable: {e}")
+                self._finish(reminder, False)
+            
+            except TelegramError as e:
+                if reminder.attempts < self.max_attempts:
+                    self._retry_later(reminder, backoff_with_jitter(reminder.attempts, 1.0, 60.0))
+                else:
+                    logger.error(f"❌ Failed to send reminder after {reminder.attempts} attempts: {e}")
+                    self._finish(reminder, False)
+            
+            except Exception as e:
+                logger.error(f"❌ Unexpected error sending reminder: {e}")
+                self._finish(reminder, False)
+            
+            finally:
+                self._queue.task_done()
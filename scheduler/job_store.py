@@ -0,0 +1,130 @@
+"""
+Durable storage for pending reminders
+One compact row per user: user_id, row_number, due time
+"""
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from config.settings import settings
+from utils.logger import logger
+
+
+class ReminderStore:
+    """
+    Pending reminders in a local SQLite file (WAL mode)
+    
+    Reminders survive restarts and stay here until they are delivered.
+    Due reminders are picked up with an indexed range query, so nothing
+    has to be rebuilt at startup.
+    """
+    
+    def __init__(self, path: str = None):
+        """
+        Args:
+            path: SQLite database file
+        """
+        path = path or settings.REMINDER_DB_PATH
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS reminders (
+                user_id INTEGER PRIMARY KEY,
+                row_number INTEGER,
+                due_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS reminders_due_at ON reminders (due_at)")
+        
+        logger.info(f"✅ Reminder store opened: {path}")
+    
+    def upsert(self, user_id: int, due_at: float, row_number: Optional[int] = None) -> None:
+        """
+        Add or replace a user's pending reminder
+        
+        Args:
+            user_id: User's Telegram ID
+            due_at: Unix timestamp when the reminder is due
+            row_number: Sheet row of the user's goal, if already known
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO reminders (user_id, row_number, due_at) VALUES (?, ?, ?)",
+                (user_id, row_number, due_at)
+            )
+    
+    def get(self, user_id: int) -> Optional[Tuple[int, Optional[int], float]]:
+        """
+        Get a user's pending reminder
+        
+        Returns:
+            Tuple of (user_id, row_number, due_at) or None
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT user_id, row_number, due_at FROM reminders WHERE user_id = ?",
+                (user_id,)
+            ).fetchone()
+    
+    def delete(self, user_id: int, due_at: float = None) -> None:
+        """
+        Remove a user's pending reminder
+        
+        Args:
+            user_id: User's Telegram ID
+            due_at: Only remove the reminder if it is still due at this time
+        """
+        with self._lock:
+            if due_at is None:
+                self._conn.execute("DELETE FROM reminders WHERE user_id = ?", (user_id,))
+            else:
+                self._conn.execute(
+                    "DELETE FROM reminders WHERE user_id = ? AND due_at = ?",
+                    (user_id, due_at)
+                )
+    
+    def due(self, now: float, limit: int) -> List[Tuple[int, Optional[int], float]]:
+        """
+        Get reminders that are due
+        
+        Args:
+            now: Current unix timestamp
+            limit: Maximum number of reminders to return
+            
+        Returns:
+            List of (user_id, row_number, due_at), earliest first
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT user_id, row_number, due_at FROM reminders WHERE due_at <= ? ORDER BY due_at LIMIT ?",
+                (now, limit)
+            ).fetchall()
+    
+    def count(self) -> int:
+        """Number of pending reminders"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM reminders").fetchone()[0]
+    
+    def close(self) -> None:
+        """Close the database"""
+        with self._lock:
+            self._conn.close()
+
+
+# Lazy initialization of reminder store
+_store_instance = None
+
+
+def get_reminder_store() -> ReminderStore:
+    """Get or create reminder store instance (lazy initialization)"""
+    global _store_instance
+    if _store_instance is None:
+        _store_instance = ReminderStore()
+    return _store_instance
@@ -1,179 +1,223 @@
 """
 Scheduler for automated tasks (reminders, etc.)
-Uses APScheduler for background job execution
-"""
-from datetime import datetime, timedelta
-from typing import Optional
+Uses APScheduler's AsyncIOScheduler on the bot's own event loop
 
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.date import DateTrigger
+Pending reminders live in the ReminderStore. A single periodic job picks
+up everything that is due in the current time bucket and hands it to the
+ReminderBroadcaster, which sends within Telegram's rate limits.
+"""
+import asyncio
+import time
+from datetime import datetime
+from functools import partial
+from typing import Dict, Optional
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
 from telegram import Bot
-from telegram.error import TelegramError
 
 from config.settings import settings
 from utils.logger import logger
-from bot.states import UserState
 from bot.messages import REMINDER_MESSAGE
 from bot.keyboards import get_progress_keyboard
+from database.sheets import get_db_async
+from database.sharding import get_router
+from database.state_store import get_state_store
+from scheduler.broadcast import Reminder, ReminderBroadcaster
+from scheduler.job_store import get_reminder_store
 
 
 # Global scheduler instance
-scheduler: Optional[BackgroundScheduler] = None
+scheduler: Optional[AsyncIOScheduler] = None
 
+# Global broadcaster instance (created with the scheduler)
+broadcaster: Optional[ReminderBroadcaster] = None
 
-def initialize_scheduler() -> BackgroundScheduler:
+
+def initialize_scheduler(bot: Bot) -> AsyncIOScheduler:
     """
-    Initialize and start the scheduler
+    Initialize and start the scheduler on the running event loop
+    
+    Must be called from within the application's event loop (e.g. post_init),
+    so jobs run on the same loop and reuse the bot's HTTP connection pool.
+    
+    Args:
+        bot: Telegram Bot instance used for sending reminders
     
     Returns:
-        BackgroundScheduler instance
+        AsyncIOScheduler instance
     """
-    global scheduler
+    global scheduler, broadcaster
     
     if scheduler is None:
-        scheduler = BackgroundScheduler(timezone=settings.SCHEDULER_TIMEZONE)
+        broadcaster = ReminderBroadcaster(
+            send=partial(send_day2_reminder, bot),
+            on_done=_reminder_done
+        )
+        
+        scheduler = AsyncIOScheduler(
+            timezone=settings.SCHEDULER_TIMEZONE,
+            event_loop=asyncio.get_running_loop()
+        )
+        
+        # First run right away to pick up reminders that came due while offline
+        scheduler.add_job(
+            dispatch_due_reminders,
+            trigger=IntervalTrigger(seconds=settings.REMINDER_BUCKET_SECONDS),
+            id="dispatch_due_reminders",
+            name="Dispatch due reminders",
+            next_run_time=datetime.now().astimezone(),
+            max_instances=1,
+            coalesce=True
+        )
+        
         scheduler.start()
-        logger.info("✅ Scheduler started")
+        logger.info(f"✅ Scheduler started (reminder buckets of {settings.REMINDER_BUCKET_SECONDS}s)")
     
     return scheduler
 
 
-async def send_day2_reminder(bot: Bot, user_id: int, username: str, goal_text: str):
+async def _resolve_goal_text(user_id: int, row_number: Optional[int]) -> Optional[str]:
+    """
+    Find the goal to remind about
+    
+    Uses the user's current goal from the state store and falls back to
+    the goal's sheet row.
+    """
+    user_data = get_state_store().get(user_id)
+    if user_data and user_data.get('goal_text'):
+        return user_data['goal_text']
+    
+    # Row numbers are per cohort shard, a removed shard's rows are not read elsewhere
+    shard = user_data.get('shard') if user_data else None
+    if row_number and get_router().is_configured(shard):
+        db = await get_db_async(shard)
+        return await db.get_goal_by_row(row_number)
+    
+    return None
+
+
+async def send_day2_reminder(bot: Bot, reminder: Reminder) -> bool:
     """
     Send Day 2 reminder to user
     
+    Telegram errors are raised to the broadcaster, which retries or
+    gives up depending on the error.
+    
     Args:
         bot: Telegram Bot instance
-        user_id: User's Telegram ID
-        username: User's username
-        goal_text: User's goal text
+        reminder: Pending reminder
+    
+    Returns:
+        True if sent, False if there was nothing to remind about
+    """
+    goal_text = await _resolve_goal_text(reminder.user_id, reminder.row_number)
+    if not goal_text:
+        logger.warning("⚠️ No goal found for pending reminder, skipping")
+        return False
+    
+    message = REMINDER_MESSAGE.format(goal=goal_text)
+    keyboard = get_progress_keyboard()
+    
+    await bot.send_message(
+        chat_id=reminder.user_id,
+        text=message,
+        reply_markup=keyboard,
+        parse_mode='Markdown'
+    )
+    return True
+
+
+def _reminder_done(reminder: Reminder, delivered: bool) -> None:
+    """Drop a finished reminder from the store"""
+    # Keep the row if the user has set a new goal (and reminder) since
+    get_reminder_store().delete(reminder.user_id, due_at=reminder.due_at)
+
+
+async def dispatch_due_reminders():
+    """
+    Hand all reminders due in the current time bucket to the broadcaster
     """
     try:
-        message = REMINDER_MESSAGE.format(username=username, goal=goal_text)
-        keyboard = get_progress_keyboard()
+        due = get_reminder_store().due(time.time(), settings.REMINDER_DISPATCH_LIMIT)
         
-        await bot.send_message(
-            chat_id=user_id,
-            text=message,
-            reply_markup=keyboard,
-            parse_mode='Markdown'
+        queued = sum(
+            broadcaster.submit(Reminder(user_id, row_number, due_at))
+            for user_id, row_number, due_at in due
         )
         
-        logger.info(f"✅ Sent Day 2 reminder to user {user_id}")
-        
-    except TelegramError as e:
-        logger.error(f"❌ Failed to send reminder to user {user_id}: {e}")
+        if queued or broadcaster.pending:
+            stats = get_broadcast_stats()
+            logger.info(
+                f"📬 Reminders: {queued} queued, {stats['sent']} sent, "
+                f"{stats['failed']} failed, {stats['pending']} pending"
+            )
+    
     except Exception as e:
-        logger.error(f"❌ Unexpected error sending reminder to user {user_id}: {e}")
+        logger.error(f"❌ Error dispatching due reminders: {e}")
 
 
-def schedule_day2_reminder(bot: Bot, user_id: int, username: str, goal_text: str):
+def get_broadcast_stats() -> Dict[str, int]:
     """
-    Schedule a Day 2 reminder for a user
+    Reminder delivery counters
     
-    Args:
-        bot: Telegram Bot instance
-        user_id: User's Telegram ID
-        username: User's username
-        goal_text: User's goal text
+    Returns:
+        Dict with sent, failed, retried and pending counts
     """
-    global scheduler
+    if broadcaster is None:
+        return {"sent": 0, "failed": 0, "retried": 0, "pending": 0}
     
-    if scheduler is None:
-        scheduler = initialize_scheduler()
-    
-    # Calculate reminder time (24 hours from now, or 1 minute in testing mode)
-    reminder_time = datetime.now() + timedelta(seconds=settings.REMINDER_DELAY_SECONDS)
-    
-    # Schedule the job
-    job_id = f"reminder_{user_id}"
-    
-    # Remove existing job if any
-    existing_job = scheduler.get_job(job_id)
-    if existing_job:
-        existing_job.remove()
-    
-    # Add new job
-    scheduler.add_job(
-        func=lambda: _sync_send_reminder(bot, user_id, username, goal_text),
-        trigger=DateTrigger(run_date=reminder_time),
-        id=job_id,
-        replace_existing=True,
-        name=f"Day 2 reminder for user {user_id}"
-    )
-    
-    delay_minutes = settings.REMINDER_DELAY_SECONDS // 60
-    logger.info(f"✅ Scheduled Day 2 reminder for user {user_id} in {delay_minutes} minutes")
+    return {**broadcaster.stats, "pending": broadcaster.pending}
 
 
-def _sync_send_reminder(bot: Bot, user_id: int, username: str, goal_text: str):
+def schedule_day2_reminder(user_id: int, row_number: Optional[int] = None):
     """
-    Synchronous wrapper for sending reminder (for APScheduler)
+    Schedule a Day 2 reminder for a user
+    
+    The reminder is only persisted here, it is sent by the periodic
+    dispatcher once due. A new goal replaces the pending reminder.
+    
+    Args:
+        user_id: User's Telegram ID
+        row_number: Sheet row of the user's goal, if already known
     """
-    import asyncio
+    # Calculate reminder time (24 hours from now, or 1 minute in testing mode)
+    due_at = time.time() + settings.REMINDER_DELAY_SECONDS
+    get_reminder_store().upsert(user_id, due_at, row_number)
     
-    try:
-        # Create new event loop for this thread
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(send_day2_reminder(bot, user_id, username, goal_text))
-        loop.close()
-    except Exception as e:
-        logger.error(f"❌ Error in sync reminder wrapper: {e}")
+    delay_minutes = settings.REMINDER_DELAY_SECONDS // 60
+    logger.info(f"✅ Scheduled Day 2 reminder in {delay_minutes} minutes")
 
 
-def restore_pending_reminders(bot: Bot, db):
+def restore_pending_reminders(bot: Bot):
     """
     Restore pending reminders on bot startup
-    Checks for users in GOAL_SET state and reschedules reminders if needed
+    
+    Nothing has to be rebuilt: reminders stay in the store until sent and
+    the dispatcher picks them up once due, so restore time does not grow
+    with the number of participants. The UserData sheet is anonymous (no
+    Telegram IDs), so it cannot be used to restore reminders.
     
     Args:
         bot: Telegram Bot instance
-        db: Database instance
     """
     try:
-        users_with_goals = db.get_users_by_state(UserState.GOAL_SET)
-        
-        if not users_with_goals:
-            logger.info("No pending reminders to restore")
-            return
-        
-        for user in users_with_goals:
-            # Parse goal date and check if reminder should be sent
-            goal_date_str = user.get('goal_date', '')
-            if not goal_date_str:
-                continue
-            
-            try:
-                goal_date = datetime.strptime(goal_date_str, "%Y-%m-%d %H:%M:%S")
-                reminder_time = goal_date + timedelta(seconds=settings.REMINDER_DELAY_SECONDS)
-                
-                # If reminder time is in the future, reschedule it
-                if reminder_time > datetime.now():
-                    schedule_day2_reminder(
-                        bot,
-                        user['user_id'],
-                        user['username'],
-                        user['goal_text']
-                    )
-                    logger.info(f"✅ Restored reminder for user {user['user_id']}")
-                    
-            except ValueError as e:
-                logger.error(f"❌ Error parsing date for user {user['user_id']}: {e}")
-                continue
-        
-        logger.info(f"✅ Restored {len(users_with_goals)} pending reminders")
-        
+        initialize_scheduler(bot)
+        pending = get_reminder_store().count()
+        logger.info(f"✅ {pending} pending reminders restored from the reminder store")
+    
     except Exception as e:
         logger.error(f"❌ Error restoring pending reminders: {e}")
 
 
-def shutdown_scheduler():
+async def shutdown_scheduler():
     """Gracefully shutdown the scheduler"""
-    global scheduler
+    global scheduler, broadcaster
     
     if scheduler:
-        scheduler.shutdown()
+        scheduler.shutdown(wait=False)
+        await broadcaster.stop()
+        scheduler = None
+        broadcaster = None
+        get_reminder_store().close()
         logger.info("✅ Scheduler shut down")
-
-
@@ -0,0 +1,124 @@
+"""
+Shared fixtures
+Every test runs offline against the in-process fake Google Sheets backend
+"""
+import os
+import tempfile
+import uuid
+
+# Settings are read at import time, so the environment is set before any project import
+_TMP = tempfile.mkdtemp(prefix="goalbuddy-tests-")
+os.environ.update({
+    "BOT_TOKEN": "test-token",
+    "SPREADSHEET_ID": "test-spreadsheet",
+    "SHEETS_BACKEND": "fake",
+    "FAKE_SHEETS_LATENCY": "0",
+    "FAKE_SHEETS_RATE_LIMIT_PROBABILITY": "0",
+    "FAKE_SHEETS_QUOTA_PER_MINUTE": "0",
+    "SHEETS_READ_QUOTA_PER_MINUTE": "60000",
+    "SHEETS_WRITE_QUOTA_PER_MINUTE": "60000",
+    "SHEETS_QUOTA_BURST": "1000",
+    "SHEETS_BACKOFF_BASE": "0.01",
+    "SHEETS_BACKOFF_MAX": "0.05",
+    "SHEETS_METADATA_CACHE": os.path.join(_TMP, "sheets_metadata.json"),
+    "WRITE_QUEUE_FLUSH_INTERVAL": "0.02",
+    "DEAD_LETTER_DB_PATH": os.path.join(_TMP, "dead_letters.db"),
+    "JOURNAL_DIR": os.path.join(_TMP, "journal"),
+    "JOURNAL_COMMIT_INTERVAL": "0",
+    "STATE_STORE": "memory",
+    "COHORT_SHARDS": "",
+    "REMINDERS_ENABLED": "False",
+    "METRICS_PORT": "0",
+    "LOG_LEVEL": "WARNING",
+    "LOG_FILE": os.path.join(_TMP, "bot.log"),
+})
+
+import pytest
+import pytest_asyncio
+
+from database import journal as journal_module
+from database.dead_letters import DeadLetterStore
+from database import write_queue as write_queue_module
+from database.sharding import DEFAULT_SHARD, CohortShard
+from database.sheets import SheetsDatabase
+from database.write_queue import WriteBehindQueue
+
+
+def make_db(name: str = DEFAULT_SHARD) -> SheetsDatabase:
+    """Database on a fresh fake spreadsheet, isolated from other tests"""
+    return SheetsDatabase(shard=CohortShard(name, f"spreadsheet-{uuid.uuid4().hex}"))
+
+
+def data_rows(db: SheetsDatabase) -> list:
+    """UserData rows below the header, straight from the fake sheet"""
+    return db.user_data_sheet.get_all_values()[1:]
+
+
+class Shards:
+    """Per-test databases and write-behind queues, created on first use"""
+    
+    def __init__(self):
+        self.dbs = {}
+        self.queues = {}
+        # Shards taken out of COHORT_SHARDS, every other name is configured
+        self.removed = set()
+    
+    def is_configured(self, shard: str = None) -> bool:
+        return (shard or DEFAULT_SHARD) not in self.removed
+    
+    def db(self, shard: str = None) -> SheetsDatabase:
+        shard = shard or DEFAULT_SHARD
+        if shard not in self.dbs:
+            self.dbs[shard] = make_db(shard)
+        return self.dbs[shard]
+    
+    def queue(self, shard: str = None) -> WriteBehindQueue:
+        shard = shard or DEFAULT_SHARD
+        if shard not in self.queues:
+            self.queues[shard] = WriteBehindQueue(shard=shard)
+        return self.queues[shard]
+
+
+@pytest.fixture
+def sheets_db():
+    db = make_db()
+    yield db
+    db.shutdown()
+
+
+@pytest_asyncio.fixture
+async def shards(monkeypatch):
+    """
+    Route the write-behind queues and the journal drainer to per-test shards
+    
+    The process-wide get_db_async / get_write_queue singletons would keep
+    state (and asyncio objects) from one test to the next.
+    """
+    shards = Shards()
+    
+    async def get_db_async(shard=None):
+        return shards.db(shard)
+    
+    monkeypatch.setattr(write_queue_module, "get_db_async", get_db_async)
+    monkeypatch.setattr(write_queue_module, "get_db_if_ready", lambda shard=None: shards.dbs.get(shard or DEFAULT_SHARD))
+    monkeypatch.setattr(journal_module, "get_db_async", get_db_async)
+    monkeypatch.setattr(journal_module, "get_write_queue", shards.queue)
+    # Stands in for the shard router, the drainer only asks which shards exist
+    monkeypatch.setattr(journal_module, "get_router", lambda: shards)
+    
+    yield shards
+    
+    for queue in shards.queues.values():
+        await queue.close()
+    for db in shards.dbs.values():
+        db.shutdown()
+
+
+@pytest.fixture
+def dead_letters(tmp_path, monkeypatch):
+    """Fresh dead-letter store for the write-behind queues and the journal drainer"""
+    store = DeadLetterStore(str(tmp_path / "dead_letters.db"))
+    monkeypatch.setattr(write_queue_module, "get_dead_letters", lambda: store)
+    monkeypatch.setattr(journal_module, "get_dead_letters", lambda: store)
+    yield store
+    store.close()
@@ -0,0 +1,108 @@
+"""
+Incrementally maintained Analytics statistics
+"""
+import random
+
+import pytest
+
+from database.analytics import AnalyticsAggregator, build_analytics_rows
+
+
+def goal_date(hour: int) -> str:
+    return f"2025-03-01 {hour:02d}:00:00"
+
+
+def test_snapshot_of_recorded_goals_and_assessments():
+    analytics = AnalyticsAggregator()
+    analytics.record_goals([(2, goal_date(9)), (3, goal_date(9)), (4, goal_date(10)), (5, goal_date(10))])
+    analytics.record_assessments({2: (40, goal_date(11)), 3: (100, goal_date(13)), 4: (70, goal_date(12))})
+    
+    stats = analytics.snapshot()
+    
+    assert stats['participants'] == 4
+    assert stats['completed'] == 3
+    assert stats['completion_rate'] == 0.75
+    assert stats['mean'] == 70
+    assert stats['median'] == 70
+    assert stats['histogram'][4] == 1 and stats['histogram'][7] == 1 and stats['histogram'][9] == 1
+    assert stats['hours_median'] == 2
+    assert stats['hours_p90'] == 4
+
+
+def test_reassessment_replaces_the_previous_score():
+    analytics = AnalyticsAggregator()
+    analytics.record_goals([(2, goal_date(9))])
+    analytics.record_assessments({2: (20, goal_date(10))})
+    version = analytics.version
+    
+    analytics.record_assessments({2: (90, goal_date(12))})
+    
+    stats = analytics.snapshot()
+    assert stats['completed'] == 1
+    assert stats['mean'] == 90
+    assert stats['hours_mean'] == 3
+    assert analytics.version > version
+
+
+def test_applied_rows_match_a_full_rebuild():
+    rng = random.Random(14)
+    rows = {}
+    incremental = AnalyticsAggregator()
+    
+    for _ in range(500):
+        row_number = rng.randint(2, 60)
+        if rng.random() < 0.1:
+            row = (row_number, "", "", None, "")
+        else:
+            percent = rng.choice([None, rng.randint(0, 100)])
+            row = (row_number, f"goal {row_number}", goal_date(rng.randint(0, 11)),
+                   percent, goal_date(rng.randint(12, 23)) if percent is not None else "")
+        rows[row_number] = row
+        incremental.apply_rows([row])
+    
+    rebuilt = AnalyticsAggregator()
+    rebuilt.rebuild(rows[row_number] for row_number in sorted(rows))
+    
+    assert incremental.snapshot() == rebuilt.snapshot()
+
+
+@pytest.mark.asyncio
+async def test_sync_applies_only_changed_rows(sheets_db, monkeypatch):
+    await sheets_db.save_user_goals([("goal 1", goal_date(9)), ("goal 2", goal_date(9))])
+    sheets_db.user_data_sheet.append_row(["foreign goal", goal_date(10), "", ""])
+    sheets_db.user_data_sheet.update("C2:D2", [["60", goal_date(12)]])
+    
+    def no_rebuild(rows):
+        raise AssertionError("a sync must not recount every row")
+    
+    applied = []
+    apply_rows = sheets_db.analytics.apply_rows
+    monkeypatch.setattr(sheets_db.analytics, "rebuild", no_rebuild)
+    monkeypatch.setattr(sheets_db.analytics, "apply_rows", lambda rows: applied.append(rows) or apply_rows(rows))
+    
+    await sheets_db.sync_mirror()
+    
+    assert [row[0] for row in applied[0]] == [2, 4]
+    stats = sheets_db.analytics.snapshot()
+    assert stats['participants'] == 3
+    assert stats['completed'] == 1
+    assert stats['mean'] == 60
+    
+    # Nothing changed since, so nothing is applied
+    await sheets_db.sync_mirror()
+    assert len(applied) == 1
+
+
+def test_analytics_rows_layout():
+    analytics = AnalyticsAggregator()
+    analytics.record_goals([(2, goal_date(9))])
+    analytics.record_assessments({2: (100, goal_date(10))})
+    cohort = {'days': [{'date': "2025-03-01", 'goals': 1, 'completed': 1, 'completion_rate': 1.0, 'median': 100}]}
+    
+    rows = build_analytics_rows(analytics.snapshot(), cohort)
+    
+    assert rows[2] == ["Участников", 1]
+    assert rows[5] == ["Средний результат, %", 100]
+    # 100% falls into the last bin
+    assert rows[15 + 9] == ["90–100%", 1]
+    assert rows[-1] == ["2025-03-01", 1, 1, 100, 100]
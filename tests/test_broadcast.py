@@ -0,0 +1,162 @@
+"""
+Rate-limited reminder broadcast
+"""
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+from telegram.error import Forbidden, NetworkError, RetryAfter
+
+from config.settings import settings
+from scheduler import broadcast as broadcast_module
+from scheduler.broadcast import Reminder, ReminderBroadcaster
+
+
+class Outcomes:
+    """Collects on_done calls"""
+    
+    def __init__(self):
+        self.done = {}
+    
+    def __call__(self, reminder: Reminder, delivered: bool) -> None:
+        self.done[reminder.user_id] = delivered
+
+
+async def wait_for(condition, timeout: float = 5.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+@pytest.fixture(autouse=True)
+def no_chat_interval(monkeypatch):
+    monkeypatch.setattr(settings, "BROADCAST_CHAT_INTERVAL", 0)
+    monkeypatch.setattr(broadcast_module, "backoff_with_jitter", lambda attempt, base, cap: 0.01)
+
+
+@pytest.mark.asyncio
+async def test_global_rate_is_respected():
+    sent_at = []
+    
+    async def send(reminder):
+        sent_at.append(time.monotonic())
+        return True
+    
+    outcomes = Outcomes()
+    broadcaster = ReminderBroadcaster(send, outcomes, rate_per_second=100, workers=8)
+    
+    for user_id in range(150):
+        broadcaster.submit(Reminder(user_id, None, 0.0))
+    await wait_for(lambda: len(outcomes.done) == 150)
+    await broadcaster.stop()
+    
+    # A burst of 100, the other 50 at 100/s
+    assert sent_at[-1] - sent_at[0] >= 0.4
+    assert broadcaster.stats == {"sent": 150, "failed": 0, "retried": 0}
+    assert broadcaster.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_chat_interval_spaces_messages_to_one_chat(monkeypatch):
+    monkeypatch.setattr(settings, "BROADCAST_CHAT_INTERVAL", 0.2)
+    sent_at = []
+    
+    async def send(reminder):
+        sent_at.append(time.monotonic())
+        return True
+    
+    outcomes = Outcomes()
+    broadcaster = ReminderBroadcaster(send, outcomes, rate_per_second=100, workers=1)
+    
+    broadcaster.submit(Reminder(1, None, 0.0))
+    await wait_for(lambda: len(sent_at) == 1)
+    outcomes.done.clear()
+    broadcaster.submit(Reminder(1, None, 1.0))
+    await wait_for(lambda: len(sent_at) == 2)
+    await broadcaster.stop()
+    
+    assert sent_at[1] - sent_at[0] >= 0.15
+
+
+@pytest.mark.asyncio
+async def test_reminder_already_in_progress_is_not_queued_twice():
+    release = asyncio.Event()
+    
+    async def send(reminder):
+        await release.wait()
+        return True
+    
+    outcomes = Outcomes()
+    broadcaster = ReminderBroadcaster(send, outcomes, rate_per_second=100, workers=2)
+    
+    assert broadcaster.submit(Reminder(1, None, 0.0)) is True
+    assert broadcaster.submit(Reminder(1, None, 0.0)) is False
+    release.set()
+    await wait_for(lambda: outcomes.done)
+    await broadcaster.stop()
+    
+    assert broadcaster.stats["sent"] == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_and_then_delivers():
+    calls = []
+    
+    async def send(reminder):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise RetryAfter(timedelta(seconds=0.2))
+        return True
+    
+    outcomes = Outcomes()
+    broadcaster = ReminderBroadcaster(send, outcomes, rate_per_second=100, workers=2, max_attempts=1)
+    
+    broadcaster.submit(Reminder(1, None, 0.0))
+    await wait_for(lambda: outcomes.done)
+    await broadcaster.stop()
+    
+    # Flood control does not use up an attempt
+    assert outcomes.done == {1: True}
+    assert calls[1] - calls[0] >= 0.15
+    assert broadcaster.stats == {"sent": 1, "failed": 0, "retried": 1}
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried_up_to_max_attempts():
+    attempts = []
+    
+    async def send(reminder):
+        attempts.append(reminder.attempts)
+        raise NetworkError("connection reset")
+    
+    outcomes = Outcomes()
+    broadcaster = ReminderBroadcaster(send, outcomes, rate_per_second=100, workers=1, max_attempts=3)
+    
+    broadcaster.submit(Reminder(1, None, 0.0))
+    await wait_for(lambda: outcomes.done)
+    await broadcaster.stop()
+    
+    assert attempts == [1, 2, 3]
+    assert outcomes.done == {1: False}
+    assert broadcaster.stats == {"sent": 0, "failed": 1, "retried": 2}
+
+
+@pytest.mark.asyncio
+async def test_blocked_user_is_not_retried():
+    attempts = []
+    
+    async def send(reminder):
+        attempts.append(reminder.attempts)
+        raise Forbidden("bot was blocked by the user")
+    
+    outcomes = Outcomes()
+    broadcaster = ReminderBroadcaster(send, outcomes, rate_per_second=100, workers=1, max_attempts=5)
+    
+    broadcaster.submit(Reminder(1, None, 0.0))
+    await wait_for(lambda: outcomes.done)
+    await broadcaster.stop()
+    
+    assert attempts == [1]
+    assert outcomes.done == {1: False}
+    assert broadcaster.stats["retried"] == 0
@@ -0,0 +1,104 @@
+"""
+Read-through cache: TTL, LRU eviction, single-flight loads and invalidation
+"""
+import asyncio
+
+import pytest
+
+from utils.cache import ReadThroughCache
+
+
+def loader_returning(value, calls: list, delay: float = 0):
+    async def load():
+        calls.append(value)
+        if delay:
+            await asyncio.sleep(delay)
+        return value
+    return load
+
+
+@pytest.mark.asyncio
+async def test_hit_after_miss():
+    cache = ReadThroughCache(max_size=10, ttl=60)
+    calls = []
+    
+    assert await cache.get("a", loader_returning(1, calls)) == 1
+    assert await cache.get("a", loader_returning(2, calls)) == 1
+    
+    assert calls == [1]
+    assert cache.stats["misses"] == 1 and cache.stats["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_after_ttl():
+    cache = ReadThroughCache(max_size=10, ttl=0.05)
+    cache.put("a", 1)
+    assert cache.peek("a") == 1
+    
+    await asyncio.sleep(0.06)
+    
+    assert cache.peek("a") is None
+    assert await cache.get("a", loader_returning(2, [])) == 2
+    assert cache.stats["expired"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ReadThroughCache(max_size=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.peek("a")
+    cache.put("c", 3)
+    
+    assert len(cache) == 2
+    assert cache.peek("b") is None
+    assert cache.peek("a") == 1 and cache.peek("c") == 3
+    assert cache.stats["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    cache = ReadThroughCache(max_size=10, ttl=60)
+    calls = []
+    
+    values = await asyncio.gather(*[cache.get("a", loader_returning(1, calls, delay=0.02)) for _ in range(5)])
+    
+    assert values == [1] * 5
+    assert calls == [1]
+    assert cache.stats["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_failed_load_reaches_every_waiter_and_is_not_cached():
+    cache = ReadThroughCache(max_size=10, ttl=60)
+    
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("Sheets down")
+    
+    results = await asyncio.gather(*[cache.get("a", failing) for _ in range(3)], return_exceptions=True)
+    
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.peek("a") is None
+    assert await cache.get("a", loader_returning(1, [])) == 1
+
+
+@pytest.mark.asyncio
+async def test_none_is_not_cached():
+    cache = ReadThroughCache(max_size=10, ttl=60)
+    calls = []
+    
+    assert await cache.get("a", loader_returning(None, calls)) is None
+    assert await cache.get("a", loader_returning(None, calls)) is None
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidate_during_load_keeps_the_stale_value_out():
+    cache = ReadThroughCache(max_size=10, ttl=60)
+    load = asyncio.create_task(cache.get("a", loader_returning("old", [], delay=0.02)))
+    await asyncio.sleep(0)
+    
+    cache.invalidate("a")
+    
+    assert await load == "old"
+    assert cache.peek("a") is None
@@ -0,0 +1,114 @@
+"""
+Circuit breaker state transitions
+"""
+import time
+
+import pytest
+
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def make_breaker(**kwargs) -> CircuitBreaker:
+    options = dict(window=4, min_calls=4, failure_rate=0.5, slow_call_seconds=1.0, open_seconds=0.05)
+    options.update(kwargs)
+    return CircuitBreaker("Test", **options)
+
+
+def fail(breaker: CircuitBreaker, times: int) -> None:
+    for _ in range(times):
+        breaker.record(False, 0.0, breaker.before_call())
+
+
+def open_breaker() -> CircuitBreaker:
+    breaker = make_breaker()
+    fail(breaker, 4)
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+
+def test_stays_closed_below_min_calls():
+    breaker = make_breaker()
+    fail(breaker, 3)
+    
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_stays_closed_below_failure_rate():
+    breaker = make_breaker()
+    for ok in (True, True, True, False):
+        breaker.record(ok, 0.0, breaker.before_call())
+    
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_opens_and_rejects_calls():
+    breaker = open_breaker()
+    
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert 0 < error.value.retry_after <= 0.05
+    assert breaker.retry_after > 0
+    assert breaker.stats == {"opened": 1, "rejected": 1}
+
+
+def test_slow_calls_count_as_failures():
+    breaker = make_breaker()
+    for _ in range(4):
+        breaker.record(True, 2.0, breaker.before_call())
+    
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_admits_a_single_probe():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    probe = breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    
+    breaker.record(True, 0.0, probe)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_failed_probe_opens_again():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    
+    breaker.record(False, 0.0, breaker.before_call())
+    
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_late_outcome_of_an_earlier_call_is_ignored():
+    breaker = make_breaker()
+    straggler = breaker.before_call()
+    fail(breaker, 4)
+    time.sleep(0.06)
+    probe = breaker.before_call()
+    
+    # Admitted before the circuit opened, it must not close it
+    breaker.record(True, 0.0, straggler)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    
+    breaker.record(True, 0.0, probe)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_probe_that_never_reports_is_replaced():
+    breaker = open_breaker()
+    time.sleep(0.06)
+    lost_probe = breaker.before_call()
+    time.sleep(0.06)
+    
+    probe = breaker.before_call()
+    breaker.record(True, 0.0, lost_probe)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    
+    breaker.record(True, 0.0, probe)
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,77 @@
+"""
+Vectorised cohort statistics
+"""
+import random
+import statistics
+
+import numpy as np
+
+from database.cohort_stats import compute_cohort_stats, load_columns
+from database.mirror import UserDataMirror
+
+
+def mirror_of(rows) -> UserDataMirror:
+    """Mirror holding rows of (goal_text, goal_date, final_percent, final_date)"""
+    mirror = UserDataMirror()
+    mirror.apply_sync(["A2:D"], [[list(row) for row in rows]])
+    return mirror
+
+
+def test_rows_without_a_goal_and_malformed_dates():
+    columns = load_columns(mirror_of([
+        ["goal 1", "2025-03-01 10:00:00", "50", "2025-03-02 10:00:00"],
+        ["", "", "", ""],
+        ["goal 2", "not a date", "", ""],
+    ]))
+    
+    assert len(columns) == 2
+    assert np.isnat(columns.goal_at[1])
+    assert np.isnan(columns.final_percent[1])
+
+
+def test_small_cohort():
+    stats = compute_cohort_stats(load_columns(mirror_of([
+        ["a", "2025-03-01 09:00:00", "40", "2025-03-01 21:00:00"],
+        ["b", "2025-03-01 10:00:00", "80", "2025-03-03 10:00:00"],
+        ["c", "2025-03-02 11:00:00", "", ""],
+        ["d", "2025-03-02 12:00:00", "100", "2025-03-06 12:00:00"],
+    ])))
+    
+    assert stats['participants'] == 4
+    assert stats['completed'] == 3
+    assert stats['completion_rate'] == 0.75
+    assert stats['score_quantiles'][50] == 80
+    # 12 h, 48 h, 96 h
+    assert stats['hours_histogram'] == [1, 0, 1, 1]
+    assert stats['days'] == [
+        {'date': "2025-03-01", 'goals': 2, 'completed': 2, 'completion_rate': 1.0, 'median': 60.0},
+        {'date': "2025-03-02", 'goals': 2, 'completed': 1, 'completion_rate': 0.5, 'median': 100.0},
+    ]
+
+
+def test_per_day_medians_match_a_plain_python_computation():
+    rng = random.Random(16)
+    rows = []
+    for i in range(2000):
+        day = rng.randint(1, 9)
+        percent = rng.choice(["", str(rng.randint(0, 100))])
+        final_date = f"2025-03-{day + 1:02d} 12:00:00" if percent else ""
+        rows.append([f"goal {i}", f"2025-03-{day:02d} 10:00:00", percent, final_date])
+    
+    stats = compute_cohort_stats(load_columns(mirror_of(rows)))
+    
+    for day in stats['days']:
+        scores = [int(row[2]) for row in rows if row[1].startswith(day['date']) and row[2]]
+        goals = sum(row[1].startswith(day['date']) for row in rows)
+        assert day['goals'] == goals
+        assert day['completed'] == len(scores)
+        assert day['median'] == round(statistics.median(scores), 1)
+
+
+def test_empty_mirror():
+    stats = compute_cohort_stats(load_columns(UserDataMirror()))
+    
+    assert stats['participants'] == 0
+    assert stats['completion_rate'] == 0.0
+    assert stats['score_quantiles'][50] is None
+    assert stats['days'] == []
@@ -0,0 +1,96 @@
+"""
+Streaming, resumable UserData export
+"""
+import csv
+import json
+
+import pytest
+
+from database.export import export_user_data, iter_user_data
+from database.fake_sheets import get_fake_backend
+
+
+def fill(db, count: int, first: int = 0) -> None:
+    db.user_data_sheet.append_rows([
+        [f"goal {i}", f"2025-03-01 10:{i % 60:02d}:00", str(i % 101) if i % 3 == 0 else "", ""]
+        for i in range(first, first + count)
+    ])
+
+
+@pytest.mark.asyncio
+async def test_pages_are_read_one_range_at_a_time(sheets_db):
+    fill(sheets_db, 25)
+    backend = get_fake_backend()
+    before = backend.stats["calls"].get("get", 0) + backend.stats["calls"].get("get_values", 0)
+    
+    pages = [page async for page in iter_user_data(sheets_db, page_size=10)]
+    
+    after = backend.stats["calls"].get("get", 0) + backend.stats["calls"].get("get_values", 0)
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert after - before == 3
+    assert pages[0][0] == {
+        "row_number": 2, "goal_text": "goal 0", "goal_date": "2025-03-01 10:00:00",
+        "final_percent": 0, "final_date": "",
+    }
+    assert pages[0][1]["final_percent"] is None
+
+
+@pytest.mark.asyncio
+async def test_csv_export_and_resume(sheets_db, tmp_path):
+    output = str(tmp_path / "userdata.csv")
+    fill(sheets_db, 12)
+    
+    last_row = await export_user_data(output, "csv", page_size=5, db=sheets_db)
+    assert last_row == 13
+    
+    # More rows arrive, the export continues where it stopped
+    fill(sheets_db, 4, first=12)
+    last_row = await export_user_data(output, "csv", start_row=last_row + 1, page_size=5, db=sheets_db)
+    assert last_row == 17
+    
+    with open(output, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["goal_text"] for row in rows] == [f"goal {i}" for i in range(16)]
+    assert [int(row["row_number"]) for row in rows] == list(range(2, 18))
+
+
+@pytest.mark.asyncio
+async def test_jsonl_export(sheets_db, tmp_path):
+    output = str(tmp_path / "userdata.jsonl")
+    fill(sheets_db, 3)
+    
+    await export_user_data(output, "jsonl", db=sheets_db)
+    
+    with open(output, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert [row["goal_text"] for row in rows] == ["goal 0", "goal 1", "goal 2"]
+    assert rows[0]["final_percent"] == 0
+
+
+@pytest.mark.asyncio
+async def test_empty_sheet_exports_nothing(sheets_db, tmp_path):
+    output = str(tmp_path / "userdata.csv")
+    
+    assert await export_user_data(output, "csv", db=sheets_db) == 1
+    
+    with open(output, encoding="utf-8") as f:
+        assert f.read().strip() == "row_number,goal_text,goal_date,final_percent,final_date"
+
+
+@pytest.mark.asyncio
+async def test_parquet_export(sheets_db, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    output = str(tmp_path / "userdata.parquet")
+    fill(sheets_db, 7)
+    
+    await export_user_data(output, "parquet", page_size=3, db=sheets_db)
+    
+    table = pq.read_table(output)
+    assert table.num_rows == 7
+    assert table.column("goal_text").to_pylist()[-1] == "goal 6"
+
+
+@pytest.mark.asyncio
+async def test_unknown_format(sheets_db, tmp_path):
+    with pytest.raises(ValueError):
+        await export_user_data(str(tmp_path / "out.xml"), "xml", db=sheets_db)
@@ -0,0 +1,84 @@
+"""
+Fake Google Sheets backend: API surface, quota emulation and fault injection
+"""
+import time
+
+import gspread
+import pytest
+
+from database.fake_sheets import FakeBackend, FakeClient
+
+
+def worksheet(backend: FakeBackend):
+    spreadsheet = FakeClient(backend).open_by_key("spreadsheet")
+    return spreadsheet, spreadsheet.add_worksheet("UserData", rows=10, cols=4)
+
+
+def test_append_reports_the_updated_range():
+    _, sheet = worksheet(FakeBackend(latency=0, rate_limit_probability=0, quota_per_minute=0))
+    sheet.append_rows([["Заголовок"]])
+    
+    response = sheet.append_rows([["Цель 1", "2026-01-01"], ["Цель 2", "2026-01-02"]])
+    
+    assert response["updates"]["updatedRange"] == "UserData!A2:B3"
+    assert sheet.get("A2:B3") == [["Цель 1", "2026-01-01"], ["Цель 2", "2026-01-02"]]
+
+
+def test_reads_trim_empty_cells_like_the_api():
+    _, sheet = worksheet(FakeBackend(latency=0, rate_limit_probability=0, quota_per_minute=0))
+    sheet.append_rows([["a", "b", "", ""], ["c", "", "", ""]])
+    sheet.update("C2:D2", [[50, "2026-01-03"]])
+    
+    assert sheet.get_all_values() == [["a", "b"], ["c", "", "50", "2026-01-03"]]
+    assert sheet.get("A5:D9") == []
+
+
+def test_values_batch_get_reads_ranges_of_several_worksheets():
+    spreadsheet, sheet = worksheet(FakeBackend(latency=0, rate_limit_probability=0, quota_per_minute=0))
+    sheet.append_rows([["a"], ["b"]])
+    
+    response = spreadsheet.values_batch_get(["UserData!A1:A1", "UserData!A5:A6"])
+    
+    assert response["valueRanges"][0]["values"] == [["a"]]
+    assert "values" not in response["valueRanges"][1]
+    with pytest.raises(gspread.exceptions.APIError):
+        spreadsheet.values_batch_get(["Missing!A1"])
+
+
+def test_quota_is_enforced_per_kind():
+    backend = FakeBackend(latency=0, rate_limit_probability=0, quota_per_minute=3)
+    _, sheet = worksheet(backend)
+    sheet.get_all_values()
+    sheet.get_all_values()
+    
+    # open_by_key and the two reads use up the read quota
+    with pytest.raises(gspread.exceptions.APIError) as error:
+        sheet.get_all_values()
+    assert error.value.response.status_code == 429
+    assert "RATE_LIMIT_EXCEEDED" in str(error.value)
+    
+    # Writes have their own quota
+    sheet.append_rows([["a"]])
+    assert backend.stats["errors"] == {"quota": 1}
+
+
+def test_injected_rate_limit_errors():
+    backend = FakeBackend(latency=0, rate_limit_probability=1, quota_per_minute=0)
+    
+    with pytest.raises(gspread.exceptions.APIError):
+        FakeClient(backend).open_by_key("spreadsheet")
+    assert backend.stats["errors"] == {"injected": 1}
+
+
+def test_latency_and_call_counts():
+    backend = FakeBackend(latency=0.02, rate_limit_probability=0, quota_per_minute=0)
+    _, sheet = worksheet(backend)
+    backend.reset_stats()
+    started = time.monotonic()
+    
+    sheet.append_rows([["a"]])
+    sheet.get_all_values()
+    
+    assert time.monotonic() - started >= 0.04
+    assert backend.stats["calls"] == {"append_rows": 1, "get_all_values": 1}
+    assert backend.stats["total_calls"] == 2
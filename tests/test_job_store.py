@@ -0,0 +1,85 @@
+"""
+Durable reminder store and restore on startup
+"""
+import asyncio
+import time
+
+import pytest
+
+from scheduler import tasks
+from scheduler.job_store import ReminderStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ReminderStore(str(tmp_path / "reminders.db"))
+    yield store
+    store.close()
+
+
+def test_upsert_replaces_the_users_reminder(store):
+    store.upsert(1, 100.0, row_number=2)
+    store.upsert(1, 200.0, row_number=3)
+    
+    assert store.get(1) == (1, 3, 200.0)
+    assert store.count() == 1
+
+
+def test_due_returns_earliest_first_up_to_the_limit(store):
+    store.upsert(1, 30.0)
+    store.upsert(2, 10.0, row_number=5)
+    store.upsert(3, 20.0)
+    store.upsert(4, 99.0)
+    
+    assert store.due(50.0, limit=10) == [(2, 5, 10.0), (3, None, 20.0), (1, None, 30.0)]
+    assert store.due(50.0, limit=1) == [(2, 5, 10.0)]
+    assert store.due(5.0, limit=10) == []
+
+
+def test_delete_keeps_a_newer_reminder(store):
+    store.upsert(1, 100.0)
+    # The user set a new goal while the old reminder was being sent
+    store.upsert(1, 500.0)
+    
+    store.delete(1, due_at=100.0)
+    assert store.get(1) == (1, None, 500.0)
+    
+    store.delete(1)
+    assert store.get(1) is None
+
+
+def test_reminders_survive_a_restart(tmp_path):
+    path = str(tmp_path / "reminders.db")
+    store = ReminderStore(path)
+    store.upsert(1, 100.0, row_number=2)
+    store.upsert(2, 200.0)
+    store.close()
+    
+    reopened = ReminderStore(path)
+    
+    assert reopened.count() == 2
+    assert reopened.due(150.0, limit=10) == [(1, 2, 100.0)]
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_restore_does_not_read_sheets(store, monkeypatch):
+    later = time.time() + 3600
+    store.upsert(1, later, row_number=2)
+    store.upsert(2, later + 60)
+    
+    async def no_sheets(shard=None):
+        raise AssertionError("restore must not touch Google Sheets")
+    
+    monkeypatch.setattr(tasks, "get_reminder_store", lambda: store)
+    monkeypatch.setattr(tasks, "get_db_async", no_sheets)
+    
+    try:
+        tasks.restore_pending_reminders(bot=None)
+        # Let the first dispatch run: nothing is due yet
+        await asyncio.sleep(0.05)
+        
+        assert tasks.scheduler is not None
+        assert store.count() == 2
+    finally:
+        await tasks.shutdown_scheduler()
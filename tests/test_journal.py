@@ -0,0 +1,168 @@
+"""
+Write-ahead journal and its drainer: recovery, replay after a crash, shard isolation
+"""
+import asyncio
+import json
+
+import pytest
+
+from config.settings import settings
+from database.journal import JournalDrainer, WriteAheadJournal
+from tests.conftest import data_rows
+
+
+async def drain(journal: WriteAheadJournal, timeout: float = 5) -> JournalDrainer:
+    """Run a drainer until everything journaled is in Sheets"""
+    drainer = JournalDrainer(journal)
+    drainer.start()
+    try:
+        async with asyncio.timeout(timeout):
+            while drainer.backlog_bytes:
+                await asyncio.sleep(0.01)
+    finally:
+        await drainer.stop(timeout=1)
+    return drainer
+
+
+def journaled(journal: WriteAheadJournal) -> list:
+    with open(journal.path, "rb") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.asyncio
+async def test_append_assigns_increasing_sequence_numbers(tmp_path):
+    journal = WriteAheadJournal(str(tmp_path))
+    seqs = await asyncio.gather(*[journal.append_goal(f"Цель {i}") for i in range(10)])
+    await journal.close()
+    
+    assert sorted(seqs) == list(range(1, 11))
+    assert len(journaled(journal)) == 10
+
+
+@pytest.mark.asyncio
+async def test_torn_last_record_is_dropped_on_recovery(tmp_path):
+    journal = WriteAheadJournal(str(tmp_path))
+    await journal.append_goal("Цель")
+    await journal.close()
+    
+    with open(journal.path, "ab") as f:
+        f.write(b'{"seq": 2, "type": "go')
+    
+    recovered = WriteAheadJournal(str(tmp_path))
+    
+    assert recovered.recovered_seq == 1
+    assert recovered.read(0, 10)[0] == journaled(journal)
+    assert await recovered.append_goal("Следующая цель") == 2
+    await recovered.close()
+
+
+@pytest.mark.asyncio
+async def test_drain_writes_goals_and_assessments(tmp_path, shards):
+    journal = WriteAheadJournal(str(tmp_path))
+    goal_seq = await journal.append_goal("Пробежать 5 км")
+    await journal.append_goal("Читать каждый день")
+    await journal.append_assessment(goal_seq, None, 80)
+    
+    drainer = await drain(journal)
+    await journal.close()
+    
+    rows = data_rows(shards.db())
+    assert [row[0] for row in rows] == ["Пробежать 5 км", "Читать каждый день"]
+    assert rows[0][2] == "80"
+    assert drainer.last_seq == 3
+
+
+@pytest.mark.asyncio
+async def test_replay_after_crash_resumes_from_the_checkpoint(tmp_path, shards):
+    journal = WriteAheadJournal(str(tmp_path))
+    await journal.append_goal("Цель до сбоя")
+    await drain(journal)
+    
+    # Acknowledged but never drained when the process died
+    goal_seq = await journal.append_goal("Цель после сбоя")
+    await journal.append_assessment(goal_seq, None, 50)
+    await journal.close()
+    
+    restarted = WriteAheadJournal(str(tmp_path))
+    await drain(restarted)
+    await restarted.close()
+    
+    rows = data_rows(shards.db())
+    assert [row[0] for row in rows] == ["Цель до сбоя", "Цель после сбоя"]
+    assert rows[1][2] == "50"
+
+
+@pytest.mark.asyncio
+async def test_replay_does_not_duplicate_goals_written_before_the_crash(tmp_path, shards):
+    journal = WriteAheadJournal(str(tmp_path))
+    await journal.append_goal("Уже в таблице")
+    await journal.append_goal("Ещё не в таблице")
+    await journal.close()
+    
+    # The first goal reached Sheets, the checkpoint did not
+    first = journaled(journal)[0]
+    db = shards.db()
+    assert await db.save_user_goals([(first["goal_text"], first["goal_date"])]) == [2]
+    
+    restarted = WriteAheadJournal(str(tmp_path))
+    await drain(restarted)
+    await restarted.close()
+    
+    assert [row[0] for row in data_rows(db)] == ["Уже в таблице", "Ещё не в таблице"]
+
+
+@pytest.mark.asyncio
+async def test_shard_that_is_down_does_not_block_the_others(tmp_path, shards, monkeypatch):
+    monkeypatch.setattr(settings, "JOURNAL_REPLAY_TIMEOUT", 0.1)
+    
+    down = shards.db("b")
+    
+    def unavailable(*args, **kwargs):
+        raise ConnectionError("spreadsheet b is down")
+    
+    down.user_data_sheet.append_rows = unavailable
+    
+    journal = WriteAheadJournal(str(tmp_path))
+    await journal.append_goal("Цель в b", shard="b")
+    for i in range(3):
+        await journal.append_goal(f"Цель {i}")
+    
+    drainer = JournalDrainer(journal)
+    drainer.start()
+    async with asyncio.timeout(5):
+        while len(data_rows(shards.db())) < 3:
+            await asyncio.sleep(0.01)
+    await drainer.stop(timeout=0.5)
+    await journal.close()
+    
+    assert data_rows(down) == []
+    # The checkpoint stays before the record shard b has not written
+    reopened = WriteAheadJournal(str(tmp_path))
+    assert JournalDrainer(reopened).offset == 0
+    await reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_records_of_a_removed_shard_are_dead_lettered(tmp_path, shards, dead_letters):
+    default = shards.db()
+    assert await default.save_user_goals([("Цель в default", "2026-10-01 10:00:00")]) == [2]
+    
+    journal = WriteAheadJournal(str(tmp_path))
+    goal_seq = await journal.append_goal("Цель в spring", shard="spring")
+    await journal.append_assessment(goal_seq, 2, 90, shard="spring")
+    await journal.append_goal("Новая цель")
+    
+    # spring is taken out of COHORT_SHARDS before its records are drained
+    shards.removed.add("spring")
+    drainer = await drain(journal)
+    await journal.close()
+    
+    # Row 2 of spring is not row 2 of the default sheet
+    assert data_rows(default) == [
+        ["Цель в default", "2026-10-01 10:00:00"],
+        ["Новая цель", journaled(journal)[2]["goal_date"]],
+    ]
+    assert "spring" not in shards.dbs
+    assert [(d["shard"], d["kind"]) for d in dead_letters.list()] == [("spring", "goal"), ("spring", "assessment")]
+    assert dead_letters.list()[1]["payload"]["row_number"] == 2
+    assert drainer.backlog_bytes == 0
@@ -0,0 +1,36 @@
+"""
+Load test harness: a small run end to end
+"""
+import json
+import os
+import subprocess
+import sys
+
+
+def test_small_classroom_run_reports_every_step(tmp_path):
+    output = tmp_path / "results.json"
+    # A fresh interpreter, the harness sets up its own environment before importing the bot
+    subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.load_test",
+            "--users", "20", "--ramp", "0.1", "--think", "0.02",
+            "--bot-latency", "0", "--sheets-latency", "0", "--sheets-quota", "0",
+            "--output", str(output),
+        ],
+        env={**os.environ, "JOURNAL_DIR": str(tmp_path / "journal")},
+        capture_output=True, text=True, check=True, timeout=60
+    )
+    
+    report = json.loads(output.read_text(encoding="utf-8"))
+    
+    assert report["updates"] == 80
+    assert report["errors"] == {}
+    assert report["replies"] == {"send_message": 80}
+    assert set(report["latency_ms"]) == {"start", "goal", "assess", "score"}
+    for latency in report["latency_ms"].values():
+        assert latency["p50"] <= latency["p95"] <= latency["p99"] <= latency["max"]
+    
+    # Every goal reached the sheet, in batches rather than one call per user
+    assert report["sheets"]["rows"] == 20
+    assert report["sheets"]["calls_per_user"] < 1
+    assert report["memory"]["max_rss_mb"] > 0
@@ -0,0 +1,95 @@
+"""
+Queued, structured and rate-limited logging
+"""
+import gzip
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+
+from utils.logger import DroppingQueueHandler, JsonFormatter, RateLimitFilter, _file_handler, logger
+
+
+def make_record(message: str, level: int = logging.INFO, lineno: int = 10, exc_info=None) -> logging.LogRecord:
+    return logging.LogRecord("goalbuddy21", level, "handlers.py", lineno, message, None, exc_info)
+
+
+def test_json_formatter_writes_one_object_per_line():
+    try:
+        raise ValueError("bad value")
+    except ValueError:
+        record = make_record("✅ Цель сохранена\nвторая строка", exc_info=sys.exc_info())
+    
+    line = JsonFormatter().format(record)
+    
+    assert "\n" not in line
+    entry = json.loads(line)
+    assert entry['level'] == "INFO"
+    assert entry['logger'] == "goalbuddy21"
+    assert entry['message'] == "✅ Цель сохранена\nвторая строка"
+    assert "ValueError: bad value" in entry['exception']
+
+
+def test_rate_limit_is_per_call_site():
+    limiter = RateLimitFilter(rate=0.001, burst=3)
+    
+    passed = [limiter.filter(make_record(f"goal {i}", lineno=10)) for i in range(10)]
+    other_site = limiter.filter(make_record("other", lineno=20))
+    
+    assert passed == [True] * 3 + [False] * 7
+    assert other_site is True
+
+
+def test_errors_are_never_rate_limited():
+    limiter = RateLimitFilter(rate=0.001, burst=1)
+    
+    assert all(limiter.filter(make_record("boom", level=logging.ERROR)) for _ in range(5))
+
+
+def test_next_record_reports_suppressed_count():
+    limiter = RateLimitFilter(rate=0.001, burst=1)
+    limiter.filter(make_record("first"))
+    for _ in range(4):
+        limiter.filter(make_record("dropped"))
+    
+    # Refill the call site's bucket
+    limiter._buckets[("handlers.py", 10)]._tokens = 1
+    record = make_record("after the burst")
+    
+    assert limiter.filter(record)
+    assert record.getMessage() == "after the burst (+4 similar messages suppressed)"
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    
+    for i in range(5):
+        handler.handle(make_record(f"record {i}"))
+    
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_rotated_files_are_gzipped(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOG_MAX_BYTES", "200")
+    monkeypatch.setenv("LOG_BACKUP_COUNT", "2")
+    monkeypatch.delenv("LOG_ROTATE_WHEN", raising=False)
+    log_file = tmp_path / "bot.log"
+    handler = _file_handler(str(log_file))
+    
+    for i in range(20):
+        handler.handle(make_record(f"line {i} " + "x" * 40))
+    handler.close()
+    
+    rotated = sorted(path.name for path in tmp_path.iterdir())
+    assert rotated == ["bot.log", "bot.log.1.gz", "bot.log.2.gz"]
+    with gzip.open(tmp_path / "bot.log.1.gz", "rt", encoding="utf-8") as f:
+        assert "line" in f.read()
+
+
+def test_logger_only_enqueues():
+    handlers = logger.handlers
+    
+    assert len(handlers) == 1
+    assert isinstance(handlers[0], logging.handlers.QueueHandler)
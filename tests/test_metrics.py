@@ -0,0 +1,137 @@
+"""
+Metrics registry, endpoint and runtime metrics
+"""
+import asyncio
+
+import pytest
+
+from bot import monitoring
+from config.settings import settings
+from utils.metrics import MetricsRegistry, MetricsServer, instrument_handler, metrics
+
+
+def test_counter_gauge_and_histogram_render():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ("kind",))
+    depth = registry.gauge("depth", "Depth")
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    
+    requests.inc(kind="read")
+    requests.inc(2, kind="read")
+    depth.set(7)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+    
+    text = registry.render()
+    assert "# TYPE goalbuddy_requests_total counter" in text
+    assert 'goalbuddy_requests_total{kind="read"} 3' in text
+    assert "goalbuddy_depth 7" in text
+    assert 'goalbuddy_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'goalbuddy_latency_seconds_bucket{le="1"} 2' in text
+    assert 'goalbuddy_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "goalbuddy_latency_seconds_count 3" in text
+    assert "goalbuddy_latency_seconds_sum 5.55" in text
+
+
+def test_declaring_a_metric_twice_returns_the_same_one():
+    registry = MetricsRegistry()
+    
+    assert registry.counter("x_total", "X") is registry.counter("x_total", "X")
+
+
+def test_wrong_labels_are_rejected():
+    counter = MetricsRegistry().counter("x_total", "X", ("shard",))
+    
+    with pytest.raises(ValueError):
+        counter.inc(kind="read")
+
+
+def test_broken_callback_does_not_hide_other_metrics():
+    registry = MetricsRegistry()
+    registry.counter("ok_total", "Fine").inc()
+    registry.callback("broken", "Broken", "gauge", lambda: 1 / 0)
+    registry.callback("per_shard", "Per shard", "gauge", lambda: {"spring": 2}, ("shard",))
+    
+    text = registry.render()
+    
+    assert "goalbuddy_ok_total 1" in text
+    assert 'goalbuddy_per_shard{shard="spring"} 2' in text
+    assert "broken" not in text
+
+
+@pytest.mark.asyncio
+async def test_instrumented_handler_records_latency_and_outcome():
+    @instrument_handler
+    async def flaky_handler(fail):
+        if fail:
+            raise RuntimeError("boom")
+    
+    await flaky_handler(False)
+    with pytest.raises(RuntimeError):
+        await flaky_handler(True)
+    
+    text = metrics.render()
+    assert 'goalbuddy_handler_duration_seconds_count{handler="flaky_handler",outcome="ok"} 1' in text
+    assert 'goalbuddy_handler_duration_seconds_count{handler="flaky_handler",outcome="error"} 1' in text
+
+
+@pytest.mark.asyncio
+async def test_server_answers_metrics_and_404():
+    registry = MetricsRegistry()
+    registry.gauge("up", "Up").set(1)
+    server = MetricsServer("127.0.0.1", 0, registry)
+    await server.start()
+    port = server._server.sockets[0].getsockname()[1]
+    
+    async def get(path):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        response = await reader.read()
+        writer.close()
+        return response.decode()
+    
+    try:
+        ok = await get("/metrics")
+        missing = await get("/other")
+    finally:
+        await server.stop()
+    
+    assert ok.startswith("HTTP/1.1 200 OK")
+    assert "goalbuddy_up 1" in ok
+    assert missing.startswith("HTTP/1.1 404")
+
+
+@pytest.mark.asyncio
+async def test_runtime_metrics_are_served_before_sheets_connects(monkeypatch, sheets_db):
+    connected = {}
+    monkeypatch.setattr(monitoring, "get_ready_dbs", lambda: dict(connected))
+    started = []
+    
+    async def start(server):
+        started.append(server)
+    
+    monkeypatch.setattr(monitoring.MetricsServer, "start", start)
+    monkeypatch.setattr(monitoring.LoopLagMonitor, "start", lambda self: None)
+    monkeypatch.setattr(settings, "METRICS_PORT", 9108)
+    
+    try:
+        await monitoring.start_monitoring()
+        text = metrics.render()
+        
+        # No shard is connected yet
+        assert "goalbuddy_journal_backlog_bytes " in text
+        assert "# TYPE goalbuddy_user_states gauge" in text
+        assert "goalbuddy_write_queue_pending" in text
+        assert 'goalbuddy_mirror_rows{shard=' not in text
+        
+        # A shard's gauges appear once it connects
+        connected["spring"] = sheets_db
+        text = metrics.render()
+        assert 'goalbuddy_mirror_rows{shard="spring"} 0' in text
+        assert 'goalbuddy_sheets_circuit_state{shard="spring",state="closed"} 1' in text
+        assert 'goalbuddy_read_cache_size{shard="spring"} 0' in text
+    finally:
+        await monitoring.stop_monitoring()
+    
+    assert started
@@ -0,0 +1,104 @@
+"""
+Incremental UserData mirror
+"""
+import pytest
+
+from database.fake_sheets import get_fake_backend
+from database.mirror import UserDataMirror
+from tests.conftest import data_rows
+
+
+def test_sync_ranges_cover_the_tail_and_open_rows():
+    mirror = UserDataMirror()
+    assert mirror.sync_ranges() == ["A2:D"]
+    
+    mirror.apply_sync(["A2:D"], [[
+        ["goal 1", "d1", "50", "f1"],
+        ["goal 2", "d2"],
+        ["goal 3", "d3"],
+        ["goal 4", "d4", "70", "f4"],
+        ["goal 5", "d5"],
+    ]])
+    
+    # Assessed rows never change again, so only C:D of open rows is re-read
+    assert mirror.sync_ranges() == ["A7:D", "C3:D4", "C6:D6"]
+
+
+def test_many_open_spans_collapse_into_one():
+    mirror = UserDataMirror()
+    rows = [["goal", "d", "" if i % 2 else "10", ""] for i in range(2 * (mirror.MAX_REFRESH_RANGES + 1))]
+    mirror.apply_sync(["A2:D"], [rows])
+    
+    ranges = mirror.sync_ranges()
+    
+    assert len(ranges) == 2
+    assert ranges[1] == f"C3:D{len(rows) + 1}"
+
+
+def test_apply_sync_merges_tail_and_assessments():
+    mirror = UserDataMirror()
+    mirror.apply_sync(["A2:D"], [[["goal 1", "d1"], ["goal 2", "d2"]]])
+    
+    count, changed = mirror.apply_sync(
+        ["A4:D", "C2:D3"],
+        [[["goal 3", "d3"], [], []], [["80", "f1"], []]]
+    )
+    
+    # Trailing empty rows are not part of the table
+    assert count == 1
+    # Row 3 was read again but did not change
+    assert changed == [(2, "goal 1", "d1", 80, "f1"), (4, "goal 3", "d3", None, "")]
+    assert list(mirror.rows()) == [
+        (2, "goal 1", "d1", 80, "f1"),
+        (3, "goal 2", "d2", None, ""),
+        (4, "goal 3", "d3", None, ""),
+    ]
+    assert mirror.sync_ranges()[0] == "A5:D"
+
+
+def test_own_writes_are_applied_without_a_read():
+    mirror = UserDataMirror()
+    
+    mirror.apply_goals([2, 3], [["goal 1", "d1"], ["goal 2", "d2"]])
+    mirror.apply_assessments({3: (90, "f2")})
+    mirror.apply_goal_texts({2: "goal 1 (edited)"})
+    
+    assert mirror.get_row(2) == ("goal 1 (edited)", "d1", None, "")
+    assert mirror.get_row(3) == ("goal 2", "d2", 90, "f2")
+    assert mirror.get_goal(9) is None
+    # Rows the bot appended are re-read in case someone appended in between
+    assert mirror.sync_ranges()[0] == "A2:D"
+
+
+def test_staleness():
+    mirror = UserDataMirror()
+    assert mirror.is_stale(60)
+    
+    mirror.apply_sync(["A2:D"], [[]])
+    
+    assert not mirror.is_stale(60)
+    assert mirror.is_stale(-1)
+
+
+@pytest.mark.asyncio
+async def test_sync_picks_up_rows_written_by_others(sheets_db):
+    await sheets_db.save_user_goals([("own goal", "2025-01-01 09:00:00")])
+    sheets_db.user_data_sheet.append_row(["foreign goal", "2025-01-01 10:00:00", "", ""])
+    row_count = len(data_rows(sheets_db))
+    sheets_db.user_data_sheet.update("C2:D2", [["60", "2025-01-02 10:00:00"]])
+    
+    synced = await sheets_db.sync_mirror()
+    
+    assert synced == row_count
+    assert sheets_db.mirror.get_goal(row_count + 1) == "foreign goal"
+    assert sheets_db.mirror.get_row(2)[2] == 60
+
+
+@pytest.mark.asyncio
+async def test_point_reads_are_served_from_the_mirror(sheets_db):
+    row_numbers = await sheets_db.save_user_goals([("goal 1", "d1"), ("goal 2", "d2")])
+    before = get_fake_backend().stats["total_calls"]
+    
+    assert await sheets_db.get_goal_by_row(row_numbers[1]) == "goal 2"
+    
+    assert get_fake_backend().stats["total_calls"] == before
@@ -0,0 +1,66 @@
+"""
+Shared Sheets quota: token buckets and request priorities
+"""
+import asyncio
+import time
+
+import pytest
+
+from database.rate_limiter import RequestPriority, SheetsRateLimiter
+
+
+@pytest.mark.asyncio
+async def test_burst_passes_without_waiting():
+    limiter = SheetsRateLimiter(read_per_minute=60, write_per_minute=60, burst=5)
+    started = time.monotonic()
+    
+    for _ in range(5):
+        await limiter.acquire(SheetsRateLimiter.READ)
+    
+    assert time.monotonic() - started < 0.1
+    assert limiter.stats["requests"] == 5
+    assert limiter.stats["throttled"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reads_and_writes_have_separate_buckets():
+    limiter = SheetsRateLimiter(read_per_minute=60, write_per_minute=60, burst=1)
+    
+    await limiter.acquire(SheetsRateLimiter.READ)
+    await asyncio.wait_for(limiter.acquire(SheetsRateLimiter.WRITE), timeout=0.1)
+
+
+@pytest.mark.asyncio
+async def test_requests_beyond_the_burst_wait_for_tokens():
+    limiter = SheetsRateLimiter(read_per_minute=1200, write_per_minute=1200, burst=1)
+    started = time.monotonic()
+    
+    for _ in range(3):
+        await limiter.acquire(SheetsRateLimiter.WRITE)
+    
+    # 20 tokens per second: the 2nd and 3rd request wait 0.05s each
+    assert time.monotonic() - started >= 0.09
+    assert limiter.stats["throttled"] == 2
+
+
+@pytest.mark.asyncio
+async def test_user_requests_go_before_waiting_background_requests():
+    limiter = SheetsRateLimiter(read_per_minute=1200, write_per_minute=1200, burst=1)
+    await limiter.acquire(SheetsRateLimiter.READ)
+    order = []
+    
+    async def request(name: str, priority: RequestPriority) -> None:
+        await limiter.acquire(SheetsRateLimiter.READ, priority)
+        order.append(name)
+    
+    # Background requests queue up first, the user requests arrive while they wait
+    background = [
+        asyncio.create_task(request(f"background {i}", RequestPriority.BACKGROUND)) for i in range(3)
+    ]
+    await asyncio.sleep(0.01)
+    users = [asyncio.create_task(request(f"user {i}", RequestPriority.USER)) for i in range(2)]
+    
+    await asyncio.wait_for(asyncio.gather(*background, *users), timeout=5)
+    
+    assert set(order[:2]) == {"user 0", "user 1"}
+    assert len(order) == 5
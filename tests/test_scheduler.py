@@ -0,0 +1,105 @@
+"""
+Reminder scheduler on the bot's event loop
+"""
+import asyncio
+import threading
+
+import pytest
+import pytest_asyncio
+
+from config.settings import settings
+from database.state_store import MemoryStateStore
+from scheduler import tasks
+from scheduler.job_store import ReminderStore
+
+
+class FakeBot:
+    """Records sent messages and the loop/thread they were sent from"""
+    
+    def __init__(self):
+        self.sent = []
+        self.loops = set()
+        self.threads = set()
+    
+    async def send_message(self, chat_id, text, **kwargs):
+        self.loops.add(asyncio.get_running_loop())
+        self.threads.add(threading.get_ident())
+        self.sent.append((chat_id, text))
+
+
+async def wait_for(condition, timeout: float = 5.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+@pytest_asyncio.fixture
+async def reminders(tmp_path, monkeypatch):
+    """Scheduler with a fresh reminder store and state store, shut down afterwards"""
+    store = ReminderStore(str(tmp_path / "reminders.db"))
+    states = MemoryStateStore()
+    monkeypatch.setattr(tasks, "get_reminder_store", lambda: store)
+    monkeypatch.setattr(tasks, "get_state_store", lambda: states)
+    monkeypatch.setattr(settings, "REMINDER_DELAY_SECONDS", 0)
+    monkeypatch.setattr(settings, "BROADCAST_CHAT_INTERVAL", 0)
+    
+    yield store, states
+    
+    await tasks.shutdown_scheduler()
+
+
+@pytest.mark.asyncio
+async def test_scheduler_runs_on_the_running_loop(reminders):
+    scheduler = tasks.initialize_scheduler(FakeBot())
+    
+    assert scheduler._eventloop is asyncio.get_running_loop()
+    assert scheduler.get_job("dispatch_due_reminders") is not None
+    # A second call reuses the running scheduler
+    assert tasks.initialize_scheduler(FakeBot()) is scheduler
+
+
+@pytest.mark.asyncio
+async def test_due_reminder_is_sent_from_the_bot_loop(reminders):
+    store, states = reminders
+    states.set(42, {'goal_text': "Пробежать 5 км"})
+    tasks.schedule_day2_reminder(42, row_number=2)
+    bot = FakeBot()
+    
+    tasks.initialize_scheduler(bot)
+    await wait_for(lambda: bot.sent and store.count() == 0)
+    
+    assert bot.sent[0][0] == 42
+    assert "Пробежать 5 км" in bot.sent[0][1]
+    # No new event loop and no worker thread per job
+    assert bot.loops == {asyncio.get_running_loop()}
+    assert bot.threads == {threading.get_ident()}
+    assert tasks.get_broadcast_stats()["sent"] == 1
+
+
+@pytest.mark.asyncio
+async def test_reminder_without_goal_is_dropped(reminders):
+    store, _ = reminders
+    tasks.schedule_day2_reminder(7)
+    bot = FakeBot()
+    
+    tasks.initialize_scheduler(bot)
+    await wait_for(lambda: store.count() == 0)
+    
+    assert bot.sent == []
+    assert tasks.get_broadcast_stats()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_reminder_not_yet_due_is_kept(reminders, monkeypatch):
+    store, states = reminders
+    monkeypatch.setattr(settings, "REMINDER_DELAY_SECONDS", 3600)
+    states.set(42, {'goal_text': "Цель"})
+    tasks.schedule_day2_reminder(42)
+    bot = FakeBot()
+    
+    tasks.initialize_scheduler(bot)
+    await tasks.dispatch_due_reminders()
+    await asyncio.sleep(0.05)
+    
+    assert bot.sent == []
+    assert store.count() == 1
@@ -0,0 +1,31 @@
+"""
+Settings checks that run at startup
+"""
+import os
+
+from config.settings import Settings, settings
+
+
+def test_local_data_paths_follow_the_enabled_features(monkeypatch):
+    monkeypatch.setattr(Settings, "STATE_STORE", "memory")
+    monkeypatch.setattr(Settings, "REMINDERS_ENABLED", False)
+    assert settings.local_data_paths() == [settings.JOURNAL_DIR, settings.DEAD_LETTER_DB_PATH]
+    
+    monkeypatch.setattr(Settings, "STATE_STORE", "sqlite")
+    monkeypatch.setattr(Settings, "REMINDERS_ENABLED", True)
+    assert settings.local_data_paths()[2:] == [settings.STATE_DB_PATH, settings.REMINDER_DB_PATH]
+
+
+def test_data_outside_a_volume_is_reported_in_a_container(tmp_path, monkeypatch):
+    volume = tmp_path / "volume"
+    monkeypatch.setenv("RAILWAY_ENVIRONMENT", "production")
+    monkeypatch.setattr(Settings, "STATE_STORE", "sqlite")
+    monkeypatch.setattr(Settings, "JOURNAL_DIR", str(volume / "journal"))
+    monkeypatch.setattr(Settings, "DEAD_LETTER_DB_PATH", str(volume / "dead_letters.db"))
+    monkeypatch.setattr(Settings, "STATE_DB_PATH", str(tmp_path / "state.db"))
+    
+    monkeypatch.setattr(os.path, "ismount", lambda path: False)
+    assert settings.ephemeral_data_paths() == settings.local_data_paths()
+    
+    monkeypatch.setattr(os.path, "ismount", lambda path: str(path) == str(volume))
+    assert settings.ephemeral_data_paths() == [str(tmp_path / "state.db")]
@@ -0,0 +1,75 @@
+"""
+Cohort shards: COHORT_SHARDS parsing and participant routing
+"""
+import json
+from datetime import date
+
+import pytest
+
+from database.sharding import DEFAULT_SHARD, ShardRouter, UnknownShardError, parse_shards
+
+
+def shards_from(entries) -> list:
+    return parse_shards(json.dumps(entries), "main")
+
+
+def test_empty_setting_gives_only_the_default_shard():
+    shards = parse_shards("", "main")
+    
+    assert [shard.name for shard in shards] == [DEFAULT_SHARD]
+    assert shards[0].titles == ("UserData", "Analytics")
+    assert shards[0].spreadsheet_id == "main"
+
+
+def test_worksheet_names():
+    shards = {shard.name: shard for shard in shards_from([
+        {"name": "spring"},
+        {"name": "autumn", "spreadsheet_id": "other"},
+        {"name": "custom", "worksheet": "Custom", "analytics_worksheet": "CustomStats"},
+    ])}
+    
+    assert shards["spring"].titles == ("UserData_spring", "Analytics_spring")
+    assert shards["spring"].spreadsheet_id == "main"
+    assert shards["autumn"].titles == ("UserData", "Analytics")
+    assert shards["autumn"].spreadsheet_id == "other"
+    assert shards["custom"].titles == ("Custom", "CustomStats")
+
+
+@pytest.mark.parametrize("raw", [
+    "not json",
+    json.dumps({"name": "spring"}),
+    json.dumps([{"name": "spring cohort"}]),
+    json.dumps([{"name": "spring", "payload": "bad payload"}]),
+    json.dumps([{"name": "spring", "from": "2026-13-01"}]),
+    json.dumps([{"name": "spring", "worksheet": "UserData"}]),
+])
+def test_invalid_settings_are_rejected(raw):
+    with pytest.raises(ValueError):
+        parse_shards(raw, "main")
+
+
+def test_routing_order():
+    router = ShardRouter(shards_from([
+        {"name": "spring", "payload": ["spring26", "s26"]},
+        {"name": "autumn", "from": "2026-09-01", "to": "2026-11-30"},
+    ]))
+    
+    # Deep-link payload first, then the date range, then the default shard
+    assert router.resolve("s26", date(2026, 10, 1)).name == "spring"
+    assert router.resolve(None, date(2026, 10, 1)).name == "autumn"
+    assert router.resolve("unknown", date(2026, 12, 1)).name == DEFAULT_SHARD
+    assert router.resolve(None, date(2026, 11, 30)).name == "autumn"
+
+
+def test_unknown_shard_is_not_mapped_to_the_default():
+    router = ShardRouter(shards_from([{"name": "spring"}]))
+    
+    assert router.get("spring").name == "spring"
+    assert router.get(None).name == DEFAULT_SHARD
+    assert router.names() == [DEFAULT_SHARD, "spring"]
+    assert router.is_configured(None)
+    assert not router.is_configured("removed")
+    
+    # Row numbers are per shard, a removed shard's rows mean nothing elsewhere
+    with pytest.raises(UnknownShardError):
+        router.get("removed")
@@ -0,0 +1,112 @@
+"""
+SheetsDatabase write path against the fake backend
+"""
+import asyncio
+
+import pytest
+from requests.exceptions import ReadTimeout
+
+from database.sheets import parse_updated_rows
+from tests.conftest import data_rows
+
+
+def test_parse_updated_rows():
+    assert parse_updated_rows({"updates": {"updatedRange": "UserData!A5:D5"}}) == (5, 5)
+    assert parse_updated_rows({"updates": {"updatedRange": "'User Data'!A5:D9"}}) == (5, 9)
+    assert parse_updated_rows({"updates": {"updatedRange": "UserData!A7"}}) == (7, 7)
+    assert parse_updated_rows({}) is None
+    assert parse_updated_rows(None) is None
+
+
+@pytest.mark.asyncio
+async def test_batch_append_returns_rows_in_order(sheets_db):
+    first = await sheets_db.save_user_goals([("Цель 1", "2026-01-01 10:00:00"), ("Цель 2", "2026-01-01 10:00:01")])
+    second = await sheets_db.save_user_goals([("Цель 3", "2026-01-01 10:00:02")])
+    
+    assert first == [2, 3]
+    assert second == [4]
+    assert await sheets_db.get_goal_by_row(3) == "Цель 2"
+
+
+@pytest.mark.asyncio
+async def test_goals_are_escaped(sheets_db):
+    await sheets_db.save_user_goals([("=HYPERLINK(\"x\")", "2026-01-01 10:00:00")])
+    
+    assert not data_rows(sheets_db)[0][0].startswith("=")
+
+
+@pytest.mark.asyncio
+async def test_single_goal_row_comes_from_the_append_response(sheets_db):
+    sheets_db.user_data_sheet.get_all_values = None  # must not be re-read to learn the row
+    
+    assert await sheets_db.save_user_goal("Пробежать 5 км") == 2
+    assert await sheets_db.save_user_goal("Читать") == 3
+
+
+@pytest.mark.asyncio
+async def test_slow_sheets_calls_do_not_block_the_event_loop(sheets_db):
+    backend = sheets_db.spreadsheet._backend
+    backend.latency = 0.1
+    ticks = 0
+    
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+    
+    task = asyncio.create_task(ticker())
+    try:
+        rows = await asyncio.gather(*[sheets_db.save_user_goal(f"Цель {i}") for i in range(3)])
+    finally:
+        task.cancel()
+        backend.latency = 0
+    
+    assert sorted(rows) == [2, 3, 4]
+    # The loop kept running while the appends were on the worker threads
+    assert ticks >= 5
+
+
+@pytest.mark.asyncio
+async def test_timed_out_append_that_was_applied_is_not_repeated(sheets_db):
+    append_rows = sheets_db.user_data_sheet.append_rows
+    calls = []
+    
+    def applied_then_timed_out(*args, **kwargs):
+        calls.append(args)
+        response = append_rows(*args, **kwargs)
+        if len(calls) == 1:
+            raise ReadTimeout("response lost")
+        return response
+    
+    sheets_db.user_data_sheet.append_rows = applied_then_timed_out
+    goals = [("Пробежать 5 км", "2026-01-01 10:00:00"), ("Читать", "2026-01-01 10:00:01")]
+    
+    # The append is not retried blindly, the caller gets a failure
+    assert await sheets_db.save_user_goals(goals) is None
+    assert len(calls) == 1
+    
+    # Retrying the batch finds the rows instead of appending them again
+    assert await sheets_db.save_user_goals(goals) == [2, 3]
+    assert len(calls) == 1
+    assert len(data_rows(sheets_db)) == 2
+
+
+@pytest.mark.asyncio
+async def test_timed_out_append_that_was_lost_is_sent_again(sheets_db):
+    append_rows = sheets_db.user_data_sheet.append_rows
+    calls = []
+    
+    def timed_out_before_applied(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise ReadTimeout("request lost")
+        return append_rows(*args, **kwargs)
+    
+    sheets_db.user_data_sheet.append_rows = timed_out_before_applied
+    goals = [("Выучить 10 слов", "2026-01-01 10:00:00")]
+    
+    assert await sheets_db.save_user_goals(goals) is None
+    assert await sheets_db.save_user_goals(goals) == [2]
+    assert len(calls) == 2
+    assert len(data_rows(sheets_db)) == 1
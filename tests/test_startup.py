@@ -0,0 +1,94 @@
+"""
+Cold start: lazy imports, cached worksheet layout and background warm-up
+"""
+import subprocess
+import sys
+
+import pytest
+
+from bot import main as main_module
+from config.settings import settings
+from database.fake_sheets import get_fake_backend
+from database.sharding import CohortShard
+from database.sheets import SheetsDatabase
+
+
+def test_importing_the_bot_does_not_import_sheets_or_numpy():
+    # A fresh interpreter, the test session has imported them already
+    loaded = subprocess.run(
+        [sys.executable, "-c", (
+            "import sys, bot.main; "
+            "print(' '.join(m for m in ('gspread', 'oauth2client', 'google.auth', 'numpy') if m in sys.modules))"
+        )],
+        capture_output=True, text=True, check=True
+    ).stdout.strip()
+    
+    assert loaded == ""
+
+
+def test_restart_connects_with_few_requests(sheets_db):
+    backend = get_fake_backend()
+    before = backend.stats["total_calls"]
+    
+    restarted = SheetsDatabase(shard=sheets_db.shard)
+    
+    # open_by_key, metadata, one header probe for both sheets, mirror load
+    assert backend.stats["total_calls"] - before == 4
+    restarted.shutdown()
+
+
+def test_worksheet_layout_is_cached(sheets_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SHEETS_METADATA_CACHE", str(tmp_path / "metadata.json"))
+    # The layout of the fake backend is not cached by default, it lives in memory
+    monkeypatch.setattr(settings, "SHEETS_BACKEND", "google")
+    monkeypatch.setattr(sheets_db, "_worksheet", sheets_db.spreadsheet.worksheet_from_properties)
+    backend = get_fake_backend()
+    
+    def metadata_calls():
+        return backend.stats["calls"].get("fetch_sheet_metadata", 0)
+    
+    before = metadata_calls()
+    worksheets, from_cache = sheets_db._load_worksheets()
+    assert not from_cache
+    assert metadata_calls() == before + 1
+    
+    worksheets, from_cache = sheets_db._load_worksheets()
+    assert from_cache
+    assert metadata_calls() == before + 1
+    assert sorted(ws.title for ws in worksheets.values()) == sorted(sheets_db.shard.titles)
+    
+    # Another spreadsheet does not use this layout
+    sheets_db.shard = CohortShard(sheets_db.shard.name, "another-spreadsheet")
+    _, from_cache = sheets_db._load_worksheets()
+    assert not from_cache
+    assert metadata_calls() == before + 2
+
+
+@pytest.mark.asyncio
+async def test_warm_up_connects_every_shard_despite_failures(monkeypatch):
+    connected = []
+    
+    class Router:
+        def names(self):
+            return ["default", "broken", "spring"]
+    
+    async def get_db_async(shard):
+        if shard == "broken":
+            raise ConnectionError("spreadsheet unreachable")
+        connected.append(shard)
+        return object()
+    
+    class Bot:
+        async def set_my_commands(self, commands):
+            raise RuntimeError("Telegram is down")
+    
+    class App:
+        bot = Bot()
+    
+    monkeypatch.setattr(main_module, "get_router", lambda: Router())
+    monkeypatch.setattr(main_module, "get_db_async", get_db_async)
+    monkeypatch.setattr(main_module, "get_ready_dbs", lambda: {})
+    
+    await main_module.warm_up(App())
+    
+    assert sorted(connected) == ["default", "spring"]
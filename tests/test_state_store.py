@@ -0,0 +1,101 @@
+"""
+Conversation state stores
+"""
+import sqlite3
+
+import pytest
+
+from bot.states import UserState
+from database.state_store import MemoryStateStore, SQLiteStateStore, StateStore
+
+
+def full_state() -> dict:
+    return {
+        'state': UserState.AWAITING_ASSESSMENT,
+        'goal_seq': 7,
+        'row_number': 12,
+        'goal_text': "Пробежать 5 км",
+        'goal_time': 1760000000.5,
+        'shard': "spring",
+    }
+
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        StateStore()
+
+
+@pytest.mark.parametrize("make_store", [MemoryStateStore, lambda: SQLiteStateStore(":memory:")])
+def test_set_get_delete(make_store):
+    store = make_store()
+    
+    assert store.get(1) is None
+    store.set(1, full_state())
+    store.set(2, {'state': UserState.AWAITING_GOAL})
+    
+    assert store.get(1) == full_state()
+    assert store.count_by_state() == {UserState.AWAITING_ASSESSMENT.value: 1, UserState.AWAITING_GOAL.value: 1}
+    
+    store.delete(1)
+    assert store.get(1) is None
+    store.close()
+
+
+def test_sqlite_state_survives_a_restart(tmp_path):
+    path = str(tmp_path / "state.db")
+    store = SQLiteStateStore(path)
+    store.set(1, full_state())
+    store.set(2, {'state': UserState.COMPLETED})
+    store.delete(2)
+    store.close()
+    
+    reopened = SQLiteStateStore(path)
+    
+    assert reopened.get(1) == full_state()
+    assert reopened.get(2) is None
+    assert reopened.count_by_state() == {UserState.AWAITING_ASSESSMENT.value: 1}
+    reopened.close()
+
+
+def test_sqlite_migrates_databases_of_older_versions(tmp_path):
+    path = str(tmp_path / "state.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE user_states (user_id INTEGER PRIMARY KEY, state TEXT NOT NULL, "
+        "row_number INTEGER, goal_text TEXT, updated_at TEXT NOT NULL)"
+    )
+    conn.execute(
+        "INSERT INTO user_states VALUES (1, ?, 5, 'Читать', '2026-01-01 10:00:00')",
+        (UserState.AWAITING_ASSESSMENT.value,)
+    )
+    conn.commit()
+    conn.close()
+    
+    store = SQLiteStateStore(path)
+    
+    assert store.get(1) == {'state': UserState.AWAITING_ASSESSMENT, 'row_number': 5, 'goal_text': "Читать"}
+    store.set(1, full_state())
+    store.close()
+    
+    reopened = SQLiteStateStore(path)
+    assert reopened.get(1) == full_state()
+    reopened.close()
+
+
+def test_sqlite_keeps_the_previous_goal_after_start(tmp_path):
+    path = str(tmp_path / "state.db")
+    awaiting_goal = {
+        'state': UserState.AWAITING_GOAL,
+        'goal_seq': 7,
+        'goal_time': 1760000000.5,
+        'shard': "spring",
+        'previous_goal_text': "Пробежать 5 км",
+    }
+    store = SQLiteStateStore(path)
+    store.set(1, awaiting_goal)
+    store.close()
+    
+    reopened = SQLiteStateStore(path)
+    
+    assert reopened.get(1) == awaiting_goal
+    reopened.close()
@@ -0,0 +1,148 @@
+"""
+Anti-flood throttle: per-user buckets, the global budget and goal debouncing
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from bot import handlers
+from bot.throttling import UpdateThrottler, is_goal_resubmission
+from config.settings import settings
+from database.state_store import MemoryStateStore
+
+
+def make_throttler(**kwargs) -> UpdateThrottler:
+    options = dict(user_rate=0.001, user_burst=4, global_rate=0, global_burst=0, notice_interval=60)
+    options.update(kwargs)
+    return UpdateThrottler(**options)
+
+
+def test_user_is_throttled_after_the_burst():
+    throttler = make_throttler()
+    
+    assert [throttler.check(1) for _ in range(5)] == [None, None, None, None, "user"]
+    assert throttler.check(2) is None
+
+
+def test_global_budget_cuts_only_heavy_users():
+    throttler = make_throttler(global_rate=0.001, global_burst=3)
+    
+    # Three light users use up the global budget
+    for user_id in (1, 2, 3):
+        assert throttler.check(user_id) is None
+    
+    # A user still holding most of their own burst gets through
+    assert throttler.check(4) is None
+    
+    # One who has used up half of it is cut first
+    assert throttler.check(5) is None
+    assert throttler.check(5) is None
+    assert throttler.check(5) == "global"
+
+
+def test_notice_is_sent_once_per_interval():
+    throttler = make_throttler()
+    
+    assert throttler.should_notify(1) is True
+    assert throttler.should_notify(1) is False
+    assert throttler.should_notify(2) is True
+
+
+def test_least_recently_active_users_are_forgotten():
+    throttler = make_throttler(user_burst=1)
+    throttler.MAX_TRACKED_USERS = 2
+    
+    assert throttler.check(1) is None
+    assert throttler.check(1) == "user"
+    throttler.check(2)
+    throttler.check(3)
+    
+    # User 1 was dropped and starts with a fresh bucket
+    assert throttler.check(1) is None
+
+
+class Journal:
+    """Records journaled goals instead of writing them"""
+    
+    def __init__(self):
+        self.goals = []
+        self.revisions = []
+    
+    async def append_goal(self, goal_text, shard=None):
+        self.goals.append(goal_text)
+        return len(self.goals)
+    
+    async def append_goal_revision(self, goal_seq, row_number, goal_text, shard=None):
+        self.revisions.append((goal_seq, goal_text))
+
+
+class Message:
+    def __init__(self, text=""):
+        self.text = text
+        self.replies = []
+    
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+
+def make_update(text=""):
+    return SimpleNamespace(effective_user=SimpleNamespace(id=1), message=Message(text))
+
+
+@pytest.fixture
+def conversation(monkeypatch):
+    """Send /start and goals through the real handlers, journal and states in memory"""
+    journal = Journal()
+    store = MemoryStateStore()
+    monkeypatch.setattr(handlers, "get_journal", lambda: journal)
+    monkeypatch.setattr(handlers, "get_state_store", lambda: store)
+    monkeypatch.setattr(settings, "REMINDERS_ENABLED", False)
+    
+    async def send_goal(text):
+        await handlers.start_command(make_update("/start"), SimpleNamespace(args=[]))
+        await handlers.handle_text_message(make_update(text), SimpleNamespace(args=[]))
+    
+    return journal, store, send_goal
+
+
+@pytest.mark.asyncio
+async def test_same_goal_sent_again_replaces_the_previous_one(conversation):
+    journal, store, send_goal = conversation
+    
+    await send_goal("Разобраться с Docker и CI")
+    await send_goal("разобраться с docker и CI.")
+    await send_goal("Разобраться с Dockr и CI")
+    
+    assert journal.goals == ["Разобраться с Docker и CI"]
+    assert journal.revisions == [(1, "разобраться с docker и CI."), (1, "Разобраться с Dockr и CI")]
+    assert store.get(1)['goal_text'] == "Разобраться с Dockr и CI"
+
+
+@pytest.mark.asyncio
+async def test_different_goal_is_saved_as_a_new_one(conversation):
+    journal, store, send_goal = conversation
+    
+    await send_goal("Разобраться с Docker и CI")
+    await send_goal("Научиться писать тесты на pytest")
+    
+    assert journal.goals == ["Разобраться с Docker и CI", "Научиться писать тесты на pytest"]
+    assert journal.revisions == []
+    assert store.get(1)['goal_seq'] == 2
+
+
+@pytest.mark.asyncio
+async def test_same_goal_after_the_window_is_a_new_one(conversation, monkeypatch):
+    journal, store, send_goal = conversation
+    monkeypatch.setattr(settings, "GOAL_DEBOUNCE_SECONDS", 0)
+    
+    await send_goal("Разобраться с Docker и CI")
+    await send_goal("Разобраться с Docker и CI")
+    
+    assert len(journal.goals) == 2
+    assert journal.revisions == []
+
+
+def test_resubmission_detection():
+    assert is_goal_resubmission("Выучить SQL", "  выучить   sql! ")
+    assert not is_goal_resubmission("Выучить SQL", "Выучить Python")
+    assert not is_goal_resubmission(None, "Выучить SQL")
@@ -0,0 +1,106 @@
+"""
+Pooled Sheets transport and background token refresh
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from google.auth import credentials as google_credentials
+
+from config.settings import settings
+from database.sheets_transport import USER_AGENT, SheetsTransport, TokenRefresher
+
+
+class FakeCredentials(google_credentials.Credentials):
+    """Tokens that live `lifetime` seconds, refreshes counted"""
+    
+    def __init__(self, lifetime: float = 3600, fail: int = 0):
+        super().__init__()
+        self.lifetime = lifetime
+        self.fail = fail
+        self.refreshes = 0
+        self._lock = threading.Lock()
+    
+    def refresh(self, request):
+        with self._lock:
+            self.refreshes += 1
+            if self.refreshes <= self.fail:
+                raise ConnectionError("token endpoint unreachable")
+            self.token = f"token-{self.refreshes}"
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            self.expiry = now + timedelta(seconds=self.lifetime)
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_expires_in():
+    credentials = FakeCredentials(lifetime=600)
+    refresher = TokenRefresher(credentials, auth_request=None, margin=60)
+    
+    assert refresher.expires_in() == 0
+    
+    assert refresher.refresh()
+    assert 590 < refresher.expires_in() <= 600
+
+
+def test_token_is_refreshed_before_it_expires():
+    # Tokens live 1.2s and are refreshed 1s ahead, so every ~0.2s
+    credentials = FakeCredentials(lifetime=1.2)
+    refresher = TokenRefresher(credentials, auth_request=None, margin=1.0)
+    refresher.RETRY_INTERVAL = 0.05
+    
+    refresher.start()
+    try:
+        wait_until(lambda: credentials.refreshes >= 3)
+    finally:
+        refresher.stop()
+    
+    # The token in use never ran out
+    assert refresher.expires_in() > 0.5
+
+
+def test_failed_refresh_is_retried():
+    credentials = FakeCredentials(lifetime=3600, fail=2)
+    refresher = TokenRefresher(credentials, auth_request=None, margin=60)
+    refresher.RETRY_INTERVAL = 0.05
+    
+    assert not refresher.refresh()
+    
+    refresher.start()
+    try:
+        wait_until(lambda: credentials.token is not None)
+    finally:
+        refresher.stop()
+    
+    assert credentials.refreshes == 3
+
+
+def test_session_is_pooled_with_timeouts():
+    credentials = FakeCredentials()
+    transport = SheetsTransport(credentials)
+    
+    try:
+        adapter = transport.session.get_adapter("https://sheets.googleapis.com/v4/spreadsheets")
+        assert adapter._pool_maxsize == settings.SHEETS_POOL_SIZE
+        assert adapter.max_retries.total == 0
+        assert transport.session.headers["User-Agent"] == USER_AGENT
+        assert "gzip" in transport.session.headers["Accept-Encoding"]
+        
+        # Shards connect in parallel, they share one client and one first token
+        clients = []
+        threads = [threading.Thread(target=lambda: clients.append(transport.client())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len({id(client) for client in clients}) == 1
+        assert credentials.refreshes == 1
+        assert clients[0].timeout == (settings.SHEETS_CONNECT_TIMEOUT, settings.SHEETS_READ_TIMEOUT)
+    finally:
+        transport.close()
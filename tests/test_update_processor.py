@@ -0,0 +1,79 @@
+"""
+Per-user update processor: in-order per user, parallel across users
+"""
+import asyncio
+from datetime import datetime
+
+import pytest
+from telegram import Chat, Message, Update, User
+
+from bot.update_processor import PerUserUpdateProcessor
+
+
+def update_from(user_id: int, update_id: int) -> Update:
+    message = Message(
+        message_id=update_id,
+        date=datetime.now(),
+        chat=Chat(user_id, Chat.PRIVATE),
+        from_user=User(user_id, "Участник", False),
+        text="цель"
+    )
+    return Update(update_id, message=message)
+
+
+@pytest.mark.asyncio
+async def test_updates_of_one_user_run_in_arrival_order():
+    processor = PerUserUpdateProcessor(8)
+    order = []
+    
+    async def handler(name: str, delay: float) -> None:
+        await asyncio.sleep(delay)
+        order.append(name)
+    
+    await asyncio.gather(
+        processor.process_update(update_from(1, 1), handler("first", 0.03)),
+        processor.process_update(update_from(1, 2), handler("second", 0.0)),
+        processor.process_update(update_from(1, 3), handler("third", 0.01)),
+    )
+    
+    assert order == ["first", "second", "third"]
+    assert processor._user_locks == {}
+
+
+@pytest.mark.asyncio
+async def test_flooding_user_does_not_hold_the_global_slots():
+    processor = PerUserUpdateProcessor(2)
+    flood_done = []
+    
+    async def slow(index: int) -> None:
+        await asyncio.sleep(0.02)
+        flood_done.append(index)
+    
+    async def other_user() -> int:
+        return len(flood_done)
+    
+    flood = [
+        asyncio.create_task(processor.process_update(update_from(1, i), slow(i))) for i in range(10)
+    ]
+    await asyncio.sleep(0)
+    
+    done_before = asyncio.create_task(other_user())
+    await asyncio.wait_for(processor.process_update(update_from(2, 100), done_before), timeout=1)
+    
+    # Served while the flooding user's updates were still queued behind each other
+    assert done_before.result() < 2
+    await asyncio.gather(*flood)
+    assert flood_done == list(range(10))
+
+
+@pytest.mark.asyncio
+async def test_different_users_run_in_parallel():
+    processor = PerUserUpdateProcessor(8)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    
+    await asyncio.gather(*[
+        processor.process_update(update_from(user_id, user_id), asyncio.sleep(0.05)) for user_id in range(5)
+    ])
+    
+    assert loop.time() - started < 0.2
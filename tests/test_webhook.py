@@ -0,0 +1,63 @@
+"""
+Webhook mode: configuration checks and the listener the bot starts
+"""
+import pytest
+from telegram.ext import Application
+
+from bot import main as main_module
+from config.settings import Settings
+
+
+@pytest.fixture
+def webhook_settings(monkeypatch):
+    monkeypatch.setattr(Settings, "BOT_MODE", "webhook")
+    monkeypatch.setattr(Settings, "WEBHOOK_URL", "https://bot.example.com/")
+    monkeypatch.setattr(Settings, "WEBHOOK_PATH", "telegram")
+    monkeypatch.setattr(Settings, "WEBHOOK_SECRET_TOKEN", "s3cret_token-1")
+    monkeypatch.setattr(Settings, "WEBHOOK_MAX_CONNECTIONS", 40)
+    monkeypatch.setattr(Settings, "WEBHOOK_PORT", 8443)
+
+
+def test_valid_webhook_settings(webhook_settings):
+    assert Settings.validate()
+
+
+@pytest.mark.parametrize("name, value", [
+    ("WEBHOOK_URL", "http://bot.example.com"),
+    ("WEBHOOK_URL", ""),
+    ("WEBHOOK_SECRET_TOKEN", ""),
+    ("WEBHOOK_SECRET_TOKEN", "has spaces"),
+    ("WEBHOOK_MAX_CONNECTIONS", 0),
+    ("WEBHOOK_MAX_CONNECTIONS", 101),
+    ("BOT_MODE", "hook"),
+])
+def test_invalid_webhook_settings(webhook_settings, monkeypatch, name, value):
+    monkeypatch.setattr(Settings, name, value)
+    
+    assert not Settings.validate()
+
+
+def test_webhook_mode_starts_the_listener(webhook_settings, monkeypatch):
+    calls = {}
+    monkeypatch.setattr(Application, "run_webhook", lambda self, **kwargs: calls.setdefault("webhook", kwargs))
+    monkeypatch.setattr(Application, "run_polling", lambda self, **kwargs: calls.setdefault("polling", kwargs))
+    
+    main_module.main()
+    
+    assert "polling" not in calls
+    webhook = calls["webhook"]
+    assert webhook["webhook_url"] == "https://bot.example.com/telegram"
+    assert webhook["url_path"] == "telegram"
+    assert webhook["port"] == 8443
+    assert webhook["secret_token"] == "s3cret_token-1"
+    assert webhook["max_connections"] == 40
+
+
+def test_polling_is_the_default(monkeypatch):
+    calls = {}
+    monkeypatch.setattr(Application, "run_webhook", lambda self, **kwargs: calls.setdefault("webhook", kwargs))
+    monkeypatch.setattr(Application, "run_polling", lambda self, **kwargs: calls.setdefault("polling", kwargs))
+    
+    main_module.main()
+    
+    assert list(calls) == ["polling"]
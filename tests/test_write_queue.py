@@ -0,0 +1,270 @@
+"""
+Write-behind queue: batching, coalescing and re-queueing of failed writes
+"""
+import asyncio
+
+import gspread
+import pytest
+
+from config.settings import settings
+from database import write_queue as write_queue_module
+from database.dead_letters import DeadLetteredError
+from database.fake_sheets import FakeResponse
+from database.journal import JournalDrainer, WriteAheadJournal
+from tests.conftest import data_rows
+from utils.circuit_breaker import CircuitBreaker
+
+
+def server_error() -> gspread.exceptions.APIError:
+    return gspread.exceptions.APIError(FakeResponse(503, "The service is currently unavailable.", "UNAVAILABLE"))
+
+
+@pytest.mark.asyncio
+async def test_goals_are_batched_into_one_append(shards):
+    db = shards.db()
+    queue = shards.queue()
+    calls = []
+    append_rows = db.user_data_sheet.append_rows
+    
+    def counting_append(*args, **kwargs):
+        calls.append(len(args[0]))
+        return append_rows(*args, **kwargs)
+    
+    db.user_data_sheet.append_rows = counting_append
+    
+    futures = [queue.submit_goal(f"Цель {i}", "2026-01-01 10:00:00") for i in range(5)]
+    rows = await asyncio.wait_for(asyncio.gather(*futures), timeout=5)
+    
+    assert calls == [5]
+    assert rows == [2, 3, 4, 5, 6]
+    assert [row[0] for row in data_rows(db)] == [f"Цель {i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_failed_append_is_requeued_and_written_once(shards):
+    db = shards.db()
+    queue = shards.queue()
+    append_rows = db.user_data_sheet.append_rows
+    failures = [server_error()]
+    
+    def flaky_append(*args, **kwargs):
+        if failures:
+            raise failures.pop()
+        return append_rows(*args, **kwargs)
+    
+    db.user_data_sheet.append_rows = flaky_append
+    
+    row = await asyncio.wait_for(queue.submit_goal("Пробежать 5 км", "2026-01-01 10:00:00"), timeout=5)
+    
+    assert row == 2
+    assert not failures
+    assert len(data_rows(db)) == 1
+    assert queue.pending_count == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_connect_keeps_the_batch(shards, monkeypatch):
+    queue = shards.queue()
+    get_db_async = write_queue_module.get_db_async
+    attempts = []
+    
+    async def flaky_connect(shard=None):
+        attempts.append(shard)
+        if len(attempts) == 1:
+            raise ConnectionError("Sheets unreachable")
+        return await get_db_async(shard)
+    
+    monkeypatch.setattr(write_queue_module, "get_db_async", flaky_connect)
+    
+    row = await asyncio.wait_for(queue.submit_goal("Читать каждый день", "2026-01-01 10:00:00"), timeout=5)
+    
+    assert len(attempts) >= 2
+    assert row == 2
+    assert data_rows(shards.db())[0][0] == "Читать каждый день"
+
+
+@pytest.mark.asyncio
+async def test_batch_is_requeued_when_a_write_raises(shards):
+    db = shards.db()
+    queue = shards.queue()
+    save_user_goals = db.save_user_goals
+    failures = [RuntimeError("boom")]
+    
+    async def exploding_save(goals):
+        if failures:
+            raise failures.pop()
+        return await save_user_goals(goals)
+    
+    db.save_user_goals = exploding_save
+    
+    row = await asyncio.wait_for(queue.submit_goal("Выучить 10 слов", "2026-01-01 10:00:00"), timeout=5)
+    
+    assert row == 2
+    assert not queue._task.done()
+
+
+@pytest.mark.asyncio
+async def test_assessments_for_the_same_row_are_coalesced(shards):
+    db = shards.db()
+    queue = shards.queue()
+    row = await asyncio.wait_for(queue.submit_goal("Спать 8 часов", "2026-01-01 10:00:00"), timeout=5)
+    
+    batches = []
+    batch_update = db.user_data_sheet.batch_update
+    
+    def counting_batch_update(data, **kwargs):
+        batches.append(data)
+        return batch_update(data, **kwargs)
+    
+    db.user_data_sheet.batch_update = counting_batch_update
+    
+    first = queue.submit_assessment(row, 40, "2026-01-02 10:00:00")
+    second = queue.submit_assessment(row, 90, "2026-01-02 10:01:00")
+    
+    assert await asyncio.wait_for(asyncio.gather(first, second), timeout=5) == [True, True]
+    assert len(batches) == 1 and len(batches[0]) == 1
+    assert data_rows(db)[0][2:4] == ["90", "2026-01-02 10:01:00"]
+
+
+@pytest.mark.asyncio
+async def test_close_flushes_pending_writes(shards):
+    queue = shards.queue()
+    queue.flush_interval = 60
+    future = queue.submit_goal("Медитировать", "2026-01-01 10:00:00")
+    
+    await queue.close()
+    
+    assert future.result() == 2
+    with pytest.raises(RuntimeError):
+        queue.submit_goal("После закрытия")
+
+
+def client_error() -> gspread.exceptions.APIError:
+    return gspread.exceptions.APIError(FakeResponse(400, "Unable to parse range", "INVALID_ARGUMENT"))
+
+
+@pytest.mark.asyncio
+async def test_rejected_row_is_dead_lettered_and_the_rest_written(shards, dead_letters):
+    db = shards.db()
+    queue = shards.queue()
+    row = await asyncio.wait_for(queue.submit_goal("Спать 8 часов", "2026-01-01 10:00:00"), timeout=5)
+    batch_update = db.user_data_sheet.batch_update
+    
+    def reject_row_999(data, **kwargs):
+        if any(item["range"].startswith("C999") for item in data):
+            raise client_error()
+        return batch_update(data, **kwargs)
+    
+    db.user_data_sheet.batch_update = reject_row_999
+    
+    good = queue.submit_assessment(row, 70, "2026-01-02 10:00:00")
+    bad = queue.submit_assessment(999, 50, "2026-01-02 10:00:00")
+    
+    assert await asyncio.wait_for(good, timeout=5) is True
+    with pytest.raises(DeadLetteredError):
+        await asyncio.wait_for(bad, timeout=5)
+    
+    assert data_rows(db)[0][2] == "70"
+    assert queue.pending_count == 0
+    [letter] = dead_letters.list()
+    assert letter["kind"] == "assessment"
+    assert letter["payload"] == {"row_number": 999, "percent": 50, "final_date": "2026-01-02 10:00:00"}
+
+
+@pytest.mark.asyncio
+async def test_rejected_append_does_not_block_later_goals(shards, dead_letters):
+    db = shards.db()
+    queue = shards.queue()
+    append_rows = db.user_data_sheet.append_rows
+    rejections = [client_error()]
+    
+    def rejected_once(*args, **kwargs):
+        if rejections:
+            raise rejections.pop()
+        return append_rows(*args, **kwargs)
+    
+    db.user_data_sheet.append_rows = rejected_once
+    
+    with pytest.raises(DeadLetteredError):
+        await asyncio.wait_for(queue.submit_goal("Цель", "2026-01-01 10:00:00"), timeout=5)
+    assert await asyncio.wait_for(queue.submit_goal("Следующая цель", "2026-01-01 10:00:01"), timeout=5) == 2
+    
+    assert dead_letters.count() == 1
+    assert [row[0] for row in data_rows(db)] == ["Следующая цель"]
+
+
+@pytest.mark.asyncio
+async def test_write_is_dead_lettered_after_max_attempts(shards, dead_letters, monkeypatch):
+    monkeypatch.setattr(settings, "WRITE_QUEUE_MAX_ATTEMPTS", 3)
+    db = shards.db()
+    queue = shards.queue()
+    calls = []
+    
+    # Fails every time without Sheets being down (the circuit stays closed)
+    async def always_failing(goals):
+        calls.append(goals)
+        raise RuntimeError("unexpected")
+    
+    db.save_user_goals = always_failing
+    
+    with pytest.raises(DeadLetteredError):
+        await asyncio.wait_for(queue.submit_goal("Цель", "2026-01-01 10:00:00"), timeout=5)
+    
+    assert len(calls) == 3
+    assert dead_letters.list()[0]["attempts"] == 3
+
+
+@pytest.mark.asyncio
+async def test_failures_while_the_circuit_is_open_are_not_counted(shards, dead_letters, monkeypatch):
+    monkeypatch.setattr(settings, "WRITE_QUEUE_MAX_ATTEMPTS", 2)
+    db = shards.db()
+    db.breaker = CircuitBreaker("Test", window=1, min_calls=1, open_seconds=0.05)
+    queue = shards.queue()
+    append_rows = db.user_data_sheet.append_rows
+    calls = []
+    
+    def down_for_a_while(*args, **kwargs):
+        calls.append(args)
+        if len(calls) <= 4:
+            raise server_error()
+        return append_rows(*args, **kwargs)
+    
+    db.user_data_sheet.append_rows = down_for_a_while
+    
+    assert await asyncio.wait_for(queue.submit_goal("Цель", "2026-01-01 10:00:00"), timeout=5) == 2
+    assert len(calls) == 5
+    assert dead_letters.count() == 0
+
+
+@pytest.mark.asyncio
+async def test_dead_lettered_goal_does_not_stall_the_journal(tmp_path, shards, dead_letters):
+    db = shards.db()
+    append_rows = db.user_data_sheet.append_rows
+    
+    def reject_bad_goal(values, **kwargs):
+        if any(row[0] == "Плохая цель" for row in values):
+            raise client_error()
+        return append_rows(values, **kwargs)
+    
+    db.user_data_sheet.append_rows = reject_bad_goal
+    
+    journal = WriteAheadJournal(str(tmp_path))
+    bad_seq = await journal.append_goal("Плохая цель")
+    await journal.append_assessment(bad_seq, None, 30)
+    drainer = JournalDrainer(journal)
+    drainer.start()
+    
+    async with asyncio.timeout(5):
+        while drainer.backlog_bytes:
+            await asyncio.sleep(0.01)
+        
+        # Later records still get through
+        await journal.append_goal("Хорошая цель")
+        while drainer.backlog_bytes:
+            await asyncio.sleep(0.01)
+    
+    await drainer.stop(timeout=1)
+    await journal.close()
+    
+    assert [row[0] for row in data_rows(db)] == ["Хорошая цель"]
+    assert [letter["payload"]["goal_text"] for letter in dead_letters.list()] == ["Плохая цель"]
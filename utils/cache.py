@@ -0,0 +1,114 @@
+"""
+Read-through cache
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class ReadThroughCache:
+    """
+    Bounded async read-through cache with LRU and TTL eviction
+    
+    Concurrent misses for the same key share one load (single flight).
+    Loads that return None are not cached. Must be used from one event loop.
+    """
+    
+    def __init__(self, max_size: int, ttl: float):
+        """
+        Args:
+            max_size: Maximum number of cached entries
+            ttl: Seconds an entry stays valid
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        
+        # key -> (value, expires_at), least recently used first
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        
+        # Bumped by invalidate(), a load started before it must not be cached
+        self._generation: Dict[Hashable, int] = {}
+        
+        self.stats: Dict[str, int] = {
+            "hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expired": 0
+        }
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Get a cached value without loading (None if absent or expired)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.stats["expired"] += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries if full"""
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+    
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a cached value (write-through invalidation)"""
+        self._entries.pop(key, None)
+        if key in self._in_flight:
+            self._generation[key] = self._generation.get(key, 0) + 1
+    
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get a value, loading it on a miss
+        
+        Args:
+            key: Cache key
+            loader: Coroutine function that loads the value
+        
+        Returns:
+            Cached or freshly loaded value
+        """
+        value = self.peek(key)
+        if value is not None:
+            self.stats["hits"] += 1
+            return value
+        
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(in_flight)
+        
+        self.stats["misses"] += 1
+        generation = self._generation.get(key, 0)
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters get the exception, nobody else has to retrieve it
+            future.exception()
+            raise
+        else:
+            if value is not None and self._generation.get(key, 0) == generation:
+                self.put(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            del self._in_flight[key]
+            self._generation.pop(key, None)
@@ -0,0 +1,169 @@
+"""
+Circuit breaker for a remote dependency
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+from utils.logger import logger
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency while its circuit is open"""
+    
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit is open, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker
+    
+    Closed: calls go through, the outcomes of the last `window` calls are
+    kept. A call counts as failed if it raised a server or network error
+    or took longer than `slow_call_seconds`. Once at least `min_calls`
+    are recorded and the failure share reaches `failure_rate`, the
+    circuit opens.
+    
+    Open: calls are rejected with CircuitOpenError for `open_seconds`.
+    
+    Half-open: one probe call goes through. Success closes the circuit,
+    failure opens it again.
+    
+    before_call() hands each admitted call the current generation, which
+    changes whenever the circuit opens or admits a probe. Outcomes of
+    older generations (calls admitted before the circuit opened, a probe
+    that was replaced) are ignored, so only the probe can close the circuit.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 10.0,
+        open_seconds: float = 30.0
+    ):
+        """
+        Args:
+            name: Dependency name for logs and errors
+            window: Number of recent calls the failure rate is computed over
+            min_calls: Calls needed in the window before the circuit may open
+            failure_rate: Share of failed calls (0-1) that opens the circuit
+            slow_call_seconds: Calls slower than this count as failed
+            open_seconds: Seconds to reject calls before probing again
+        """
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        
+        self._outcomes: deque = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_started_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+        
+        self.stats: Dict[str, int] = {"opened": 0, "rejected": 0}
+    
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._open_elapsed() >= self.open_seconds:
+                return self.HALF_OPEN
+            return self._state
+    
+    @property
+    def retry_after(self) -> float:
+        """Seconds until calls are let through again (0 if they are)"""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - self._open_elapsed())
+    
+    def _open_elapsed(self) -> float:
+        return time.monotonic() - self._opened_at
+    
+    def before_call(self) -> int:
+        """
+        Let a call through or reject it
+        
+        Returns:
+            Generation to pass to record() with the call's outcome
+        
+        Raises:
+            CircuitOpenError: If the circuit is open, or a probe is already running
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return self._generation
+            
+            now = time.monotonic()
+            if self._state == self.OPEN:
+                if now - self._opened_at < self.open_seconds:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError(self.name, self.open_seconds - (now - self._opened_at))
+                self._state = self.HALF_OPEN
+                self._probe_started_at = 0.0
+            
+            # Half-open: one probe at a time (a probe that never reported is replaced)
+            if self._probe_started_at and now - self._probe_started_at < self.open_seconds:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.name, self.open_seconds - (now - self._probe_started_at))
+            self._probe_started_at = now
+            self._generation += 1
+            return self._generation
+    
+    def record(self, ok: bool, duration: float, generation: int) -> None:
+        """
+        Record the outcome of a call that was let through
+        
+        Args:
+            ok: False for server or network errors
+            duration: Seconds the call took
+            generation: Value before_call() returned for the call
+        """
+        failed = not ok or duration >= self.slow_call_seconds
+        
+        with self._lock:
+            # Admitted before the circuit last opened or probed, it says nothing about now
+            if generation != self._generation:
+                return
+            
+            if self._state != self.CLOSED:
+                if failed:
+                    self._open()
+                    logger.warning(f"⚠️ {self.name} probe failed, circuit stays open for {self.open_seconds:.0f}s")
+                else:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                    logger.info(f"✅ {self.name} recovered, circuit closed")
+                return
+            
+            self._outcomes.append(failed)
+            if len(self._outcomes) < self.min_calls:
+                return
+            
+            failures = sum(self._outcomes)
+            if failures / len(self._outcomes) >= self.failure_rate:
+                self._open()
+                self.stats["opened"] += 1
+                logger.error(
+                    f"❌ {self.name} circuit opened ({failures}/{len(self._outcomes)} recent calls "
+                    f"failed or slow), rejecting calls for {self.open_seconds:.0f}s"
+                )
+    
+    def _open(self) -> None:
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probe_started_at = 0.0
+        self._generation += 1
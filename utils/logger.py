@@ -1,14 +1,138 @@
 """
 Logging configuration for the bot
+
+Records are put on a queue and written by a background thread
+(QueueListener), so logging never does disk or console I/O on the event
+loop. The log file is rotated by size (or by time with LOG_ROTATE_WHEN)
+and rotated files are gzipped.
 """
+import atexit
+import gzip
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import shutil
+import threading
+from datetime import datetime
 from pathlib import Path
+from typing import Dict, Tuple
+
+from utils.rate_limit import TokenBucket
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line (for log collectors)"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limits how often one call site may log below ERROR
+    
+    Each logging call site (file and line) gets a token bucket, so a
+    message repeated for every participant during a burst is dropped
+    after `burst` records, while other messages still get through. The
+    next record that passes reports how many were suppressed.
+    """
+    
+    def __init__(self, rate: float, burst: float):
+        """
+        Args:
+            rate: Records per second allowed per call site
+            burst: Records a call site may log back-to-back
+        """
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[Tuple[str, int], TokenBucket] = {}
+        self._suppressed: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        
+        site = (record.pathname, record.lineno)
+        bucket = self._buckets.get(site)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.setdefault(site, TokenBucket(self.rate, self.burst))
+        
+        if bucket.try_acquire() > 0:
+            with self._lock:
+                self._suppressed[site] = self._suppressed.get(site, 0) + 1
+            return False
+        
+        with self._lock:
+            suppressed = self._suppressed.pop(site, 0)
+        if suppressed:
+            record.msg = f"{record.getMessage()} (+{suppressed} similar messages suppressed)"
+            record.args = None
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the writer falls behind"""
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _gzip_namer(name: str) -> str:
+    return name + ".gz"
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    """Compress a rotated log file (runs on the writer thread)"""
+    with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+def _file_handler(log_file: str) -> logging.Handler:
+    """Rotating file handler, by time if LOG_ROTATE_WHEN is set, by size otherwise"""
+    backup_count = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    rotate_when = os.getenv("LOG_ROTATE_WHEN", "")
+    
+    if rotate_when:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            log_file, when=rotate_when, backupCount=backup_count, encoding='utf-8'
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            log_file,
+            maxBytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+            backupCount=backup_count,
+            encoding='utf-8'
+        )
+    
+    handler.namer = _gzip_namer
+    handler.rotator = _gzip_rotator
+    return handler
 
 
 def setup_logger(name: str = "goalbuddy21") -> logging.Logger:
     """
-    Set up logger with file and console handlers
+    Set up logger with file and console handlers behind a queue
     
     Args:
         name: Logger name
@@ -32,24 +156,41 @@ def setup_logger(name: str = "goalbuddy21") -> logging.Logger:
     
     # File handler
     log_file = os.getenv("LOG_FILE", "logs/bot.log")
-    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    file_handler = _file_handler(log_file)
     file_handler.setLevel(logging.DEBUG)
     
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     
-    # Formatter
-    formatter = logging.Formatter(
-        '[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    # Formatter: "text" or "json"
+    if os.getenv("LOG_FORMAT", "text").lower() == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            '[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
     
     file_handler.setFormatter(formatter)
     console_handler.setFormatter(formatter)
     
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # Callers only enqueue, the listener thread formats and writes
+    log_queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+    queue_handler = DroppingQueueHandler(log_queue)
+    
+    rate = float(os.getenv("LOG_RATE_LIMIT", "10"))
+    if rate > 0:
+        queue_handler.addFilter(RateLimitFilter(rate, burst=rate * 3))
+    
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    listener.start()
+    # Flush queued records on exit
+    atexit.register(listener.stop)
+    
+    logger.addHandler(queue_handler)
     
     return logger
 
@@ -0,0 +1,353 @@
+"""
+Runtime metrics in Prometheus text format
+Served locally by MetricsServer (GET /metrics), no client library needed
+"""
+import asyncio
+import bisect
+import functools
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from utils.logger import logger
+
+
+# Seconds; Telegram handlers and Sheets calls range from sub-millisecond to backoff-long
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    """Named metric with optional labels"""
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+    
+    @abstractmethod
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """(suffix, formatted labels, value) triples"""
+    
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(
+            f"{self.name}{suffix}{labels} {_format_value(value)}"
+            for suffix, labels, value in self.samples()
+        )
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+    
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            return [
+                ("", _format_labels(self.labelnames, key), value)
+                for key, value in sorted(self._values.items())
+            ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+    
+    kind = "gauge"
+    
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count per label set"""
+    
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._values: Dict[LabelValues, list] = {}
+    
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+    
+    def samples(self) -> List[Tuple[str, str, float]]:
+        samples = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (math.inf,), counts):
+                    cumulative += count
+                    labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                    samples.append(("_bucket", labels, cumulative))
+                labels = _format_labels(self.labelnames, key)
+                samples.append(("_sum", labels, total))
+                samples.append(("_count", labels, cumulative))
+        return samples
+
+
+class CallbackMetric(_Metric):
+    """
+    Metric read from a component's own counters at scrape time
+    
+    The callback returns a number, or a dict of label values (a tuple,
+    or a plain string for one label) -> number.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        callback: Callable[[], object],
+        labelnames: Iterable[str] = ()
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self._callback = callback
+    
+    def samples(self) -> List[Tuple[str, str, float]]:
+        values = self._callback()
+        if not isinstance(values, dict):
+            return [("", "", values)]
+        
+        return [
+            ("", _format_labels(self.labelnames, key if isinstance(key, tuple) else (key,)), value)
+            for key, value in sorted(values.items())
+        ]
+
+
+class MetricsRegistry:
+    """All metrics of the process, rendered together"""
+    
+    def __init__(self, prefix: str = "goalbuddy_"):
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+    
+    def _register(self, metric: _Metric) -> _Metric:
+        # Get-or-create, so modules can declare the metrics they update
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+    
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(self.prefix + name, documentation, labelnames))
+    
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(self.prefix + name, documentation, labelnames))
+    
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(self.prefix + name, documentation, labelnames, buckets))
+    
+    def callback(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        callback: Callable[[], object],
+        labelnames: Iterable[str] = ()
+    ) -> None:
+        """
+        Register a metric computed at scrape time, replacing an earlier one of the same name
+        
+        Args:
+            name: Metric name without prefix
+            documentation: HELP text
+            kind: "counter" or "gauge"
+            callback: Returns the value(s), see CallbackMetric
+            labelnames: Label names for dict results
+        """
+        metric = CallbackMetric(self.prefix + name, documentation, kind, callback, labelnames)
+        with self._lock:
+            self._metrics[metric.name] = metric
+    
+    def render(self) -> str:
+        """All metrics in Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        
+        blocks = []
+        for metric in metrics:
+            try:
+                blocks.append(metric.render())
+            except Exception as e:
+                # One broken collector must not hide the other metrics
+                logger.warning(f"⚠️ Could not collect metric {metric.name}: {e}")
+        return "\n".join(blocks) + "\n"
+
+
+# Create default registry instance
+metrics = MetricsRegistry()
+
+HANDLER_SECONDS = metrics.histogram(
+    "handler_duration_seconds", "Telegram handler latency", ("handler", "outcome")
+)
+
+
+def instrument_handler(func):
+    """Record a handler's latency in HANDLER_SECONDS, labelled with its name and outcome"""
+    
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            return await func(*args, **kwargs)
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - started, handler=func.__name__, outcome=outcome)
+    
+    return wrapper
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes up a sleeping task
+    
+    Lag means a handler or callback blocked the loop, every other
+    participant waited that long.
+    """
+    
+    def __init__(self, interval: float = 0.5, registry: MetricsRegistry = metrics):
+        """
+        Args:
+            interval: Seconds between two probes
+            registry: Registry to record into
+        """
+        self.interval = interval
+        self._lag = registry.gauge("event_loop_lag_seconds", "Event loop lag at the last probe")
+        self._lag_histogram = registry.histogram("event_loop_lag_probe_seconds", "Event loop lag per probe")
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        """Start probing on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+    
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self._lag.set(lag)
+            self._lag_histogram.observe(lag)
+
+
+class MetricsServer:
+    """Minimal HTTP server answering GET /metrics on the bot's event loop"""
+    
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+    
+    def __init__(self, host: str, port: int, registry: MetricsRegistry = metrics):
+        """
+        Args:
+            host: Interface to listen on
+            port: TCP port
+            registry: Registry to serve
+        """
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self._server: Optional[asyncio.AbstractServer] = None
+    
+    async def start(self) -> None:
+        if self._server is None:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            logger.info(f"✅ Metrics available at http://{self.host}:{self.port}/metrics")
+    
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Skip headers, scrapes have no body
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+            
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, content_type, body = "200 OK", self.CONTENT_TYPE, self.registry.render().encode("utf-8")
+            else:
+                status, content_type, body = "404 Not Found", "text/plain; charset=utf-8", b"Not found\n"
+            
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,76 @@
+"""
+Rate limiting primitives
+"""
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+    
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of stored tokens (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self) -> None:
+        """Add tokens accumulated since the last update"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+    
+    def try_acquire(self, tokens: float = 1) -> float:
+        """
+        Take tokens if available
+        
+        Args:
+            tokens: Number of tokens to take
+        
+        Returns:
+            0 if the tokens were taken, otherwise seconds until they will be available
+        """
+        with self._lock:
+            self._refill()
+            
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            
+            return (tokens - self._tokens) / self.rate
+    
+    @property
+    def available(self) -> float:
+        """Tokens currently available"""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+def backoff_with_jitter(attempt: int, base: float, cap: float) -> float:
+    """
+    Exponential backoff with full jitter
+    
+    Spreads retries of many clients over the whole backoff window instead
+    of having them retry in lockstep.
+    
+    Args:
+        attempt: Zero-based retry attempt
+        base: Backoff for the first retry in seconds
+        cap: Maximum backoff in seconds
+    
+    Returns:
+        Seconds to wait before the next attempt
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))